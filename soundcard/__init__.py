@@ -1,15 +1,39 @@
+import os
 import sys
 
-if sys.platform == 'linux':
+# the backend can be chosen with the SOUNDCARD_BACKEND environment variable:
+_backend = os.environ.get('SOUNDCARD_BACKEND')
+if not _backend:
+    if sys.platform == 'linux':
+        _backend = 'pulseaudio'
+    elif sys.platform == 'darwin':
+        _backend = 'coreaudio'
+    elif sys.platform == 'win32':
+        _backend = 'mediafoundation'
+    else:
+        raise NotImplementedError('SoundCard does not support {} yet'.format(sys.platform))
+
+if _backend == 'pulseaudio':
     from soundcard.pulseaudio import *
 
     # also load main classes if building documentation:
     if 'sphinx' in sys.modules:
         from soundcard.pulseaudio import _Speaker, _Microphone, _Player, _Recorder
 
-elif sys.platform == 'darwin':
+elif _backend == 'alsa':
+    from soundcard.alsa import *
+elif _backend == 'pipewire':
+    from soundcard.pipewire import *
+elif _backend == 'jack':
+    from soundcard.jack import *
+elif _backend == 'virtual':
+    from soundcard.virtual import *
+elif _backend == 'coreaudio':
     from soundcard.coreaudio import *
-elif sys.platform == 'win32':
+elif _backend == 'mediafoundation':
     from soundcard.mediafoundation import *
 else:
-    raise NotImplementedError('SoundCard does not support {} yet'.format(sys.platform))
+    raise NotImplementedError('SoundCard does not support the {} backend'.format(_backend))
+
+from soundcard.mixer import Mixer
+from soundcard.shared import SharedRecorder, SharedMemoryReader
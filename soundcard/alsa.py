@@ -0,0 +1,941 @@
+"""Direct ALSA backend, without a sound server.
+
+Select this backend by setting the environment variable
+``SOUNDCARD_BACKEND=alsa`` before importing :mod:`soundcard`.
+
+Devices are ALSA PCMs, identified by their PCM name, such as
+``'default'``, ``'hw:0,0'``, or ``'plughw:1'``. Any PCM name can be
+used with :func:`get_speaker` and :func:`get_microphone`, including
+plugin definitions such as ``'null'`` or
+``'file:FILE=/tmp/out.raw,FORMAT=raw'``, even if ALSA does not list
+them.
+
+Since there is no sound server, a hardware device can usually only be
+opened by one stream at a time, and there is no loopback recording.
+
+"""
+
+import os
+import re
+import sys
+import math
+import time
+import errno
+import select
+import warnings
+
+import cffi
+import numpy
+
+from soundcard.shared import _SharedRecorderMixin
+
+_ffi = cffi.FFI()
+_package_dir, _ = os.path.split(__file__)
+with open(os.path.join(_package_dir, 'alsa.py.h'), 'rt') as f:
+    _ffi.cdef(f.read())
+
+try:
+    _asound = _ffi.dlopen('asound')
+except OSError:
+    # Try explicit file name, if the general does not work (e.g. on nixos)
+    _asound = _ffi.dlopen('libasound.so.2')
+_libc = _ffi.dlopen(None)
+
+# plugin PCMs such as 'default' convert any number of channels, and
+# report absurdly high channel counts:
+_max_plugin_channels = 32
+
+# the application name of new streams, see set_name:
+_name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+
+def all_speakers():
+    """A list of all connected speakers.
+
+    Returns
+    -------
+    speakers : list(_Speaker)
+
+    """
+    return [_Speaker(id=hint['id']) for hint in _device_hints() if hint['io'] in (None, 'Output')]
+
+
+def default_speaker():
+    """The default speaker of the system.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    return _Speaker(id='default')
+
+
+def get_speaker(id):
+    """Get a specific speaker by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be an ALSA PCM name, a substring of the speaker name, or
+        a fuzzy-matched pattern for the speaker name.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    return _match_device(id, all_speakers(), _Speaker, _asound.SND_PCM_STREAM_PLAYBACK)
+
+
+def all_microphones(include_loopback=False):
+    """A list of all connected microphones.
+
+    ALSA does not support loopback recording.
+
+    Parameters
+    ----------
+    include_loopback : bool
+        ignored
+
+    Returns
+    -------
+    microphones : list(_Microphone)
+
+    """
+    if include_loopback:
+        warnings.warn("ALSA does not support loopback recording functionality", Warning)
+    return [_Microphone(id=hint['id']) for hint in _device_hints() if hint['io'] in (None, 'Input')]
+
+
+def default_microphone():
+    """The default microphone of the system.
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    return _Microphone(id='default')
+
+
+def get_microphone(id, include_loopback=False):
+    """Get a specific microphone by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be an ALSA PCM name, a substring of the microphone name,
+        or a fuzzy-matched pattern for the microphone name.
+    include_loopback : bool
+        ignored
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    return _match_device(id, all_microphones(include_loopback), _Microphone,
+                         _asound.SND_PCM_STREAM_CAPTURE)
+
+
+def _match_device(id, devices, device_class, stream):
+    """Find id in a list of devices.
+
+    id can be an ALSA PCM name, a substring of the device name, or a
+    fuzzy-matched pattern for the device name.
+
+    """
+    devices_by_id = {device.id: device for device in devices}
+    if id in devices_by_id:
+        return devices_by_id[id]
+    # PCMs that are not listed, such as plugin definitions:
+    if _pcm_exists(id, stream):
+        return device_class(id=id)
+    devices_by_name = {device.name: device for device in devices}
+    # try substring match:
+    for name, device in devices_by_name.items():
+        if id in name:
+            return device
+    # try fuzzy match:
+    pattern = '.*'.join(id)
+    for name, device in devices_by_name.items():
+        if re.match(pattern, name):
+            return device
+    raise IndexError('no device with id {}'.format(id))
+
+
+def get_name():
+    """Get application name.
+
+    Returns
+    -------
+    name : str
+    """
+    return _name
+
+
+def set_name(name):
+    """Set application name.
+
+    The name applies to all streams that are opened afterwards. ALSA
+    itself has no application names, but plugins that route audio to
+    a sound server, such as the PipeWire plugin, pass it on.
+
+    Parameters
+    ----------
+    name :  str
+        The application using the soundcard
+        will be identified by the OS using this name.
+    """
+    global _name
+    _name = name
+
+
+def _pcm_open(pcm, id, stream, mode):
+    """Open the PCM `id`, and name it after the application where possible."""
+    # the PipeWire plugin reads extra stream properties from here:
+    environ_set = 'PIPEWIRE_ALSA' not in os.environ
+    if environ_set:
+        os.environ['PIPEWIRE_ALSA'] = '{{ application.name = "{}" }}'.format(_name.replace('"', "'"))
+    try:
+        return _asound.snd_pcm_open(pcm, id.encode(), stream, mode)
+    finally:
+        if environ_set:
+            del os.environ['PIPEWIRE_ALSA']
+
+
+def wait(streams, timeout=None):
+    """Wait until any of several streams can be read or written.
+
+    This lets a single thread serve many players and recorders. A
+    recorder is ready if :attr:`readable_frames` is not zero, and a
+    player is ready if :attr:`writable_frames` is not zero. Streams that
+    underran or overran are ready as well, so that reading or writing
+    them recovers.
+
+    Parameters
+    ----------
+    streams : list(_Player or _Recorder)
+        The streams to wait for.
+    timeout : float, optional
+        The maximum time to wait in seconds. Waits forever if None.
+
+    Returns
+    -------
+    ready : list(_Player or _Recorder)
+        The streams that are ready, or an empty list after a timeout.
+
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    poller = select.poll()
+    for stream in streams:
+        for fd, events in stream._poll_descriptors():
+            poller.register(fd, events)
+    while True:
+        ready = [stream for stream in streams if stream._is_ready()]
+        if ready:
+            return ready
+        wait_timeout = 1000
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            wait_timeout = min(wait_timeout, math.ceil(remaining * 1000))
+        if poller.poll(wait_timeout):
+            # some plugins wake up before a whole period is available:
+            time.sleep(0.001)
+
+
+def _device_hints():
+    """Return a list of dicts of the PCMs that ALSA knows about."""
+    hints = _ffi.new("void***")
+    _check(_asound.snd_device_name_hint(-1, b"pcm", hints), 'Listing devices')
+    devices = []
+    try:
+        idx = 0
+        while hints[0][idx] != _ffi.NULL:
+            info = {}
+            for key, hint_id in [('id', b'NAME'), ('name', b'DESC'), ('io', b'IOID')]:
+                value = _asound.snd_device_name_get_hint(hints[0][idx], hint_id)
+                if value == _ffi.NULL:
+                    info[key] = None
+                else:
+                    info[key] = _ffi.string(value).decode('utf-8')
+                    _libc.free(value)
+            if info['id'] is not None:
+                # descriptions span two lines, of card and device:
+                info['name'] = ' '.join((info['name'] or info['id']).splitlines())
+                devices.append(info)
+            idx += 1
+    finally:
+        _asound.snd_device_name_free_hint(hints[0])
+    return devices
+
+
+def _pcm_exists(id, stream):
+    """Whether `id` is the name of a PCM that can be opened."""
+    pcm = _ffi.new("snd_pcm_t**")
+    err = _pcm_open(pcm, id, stream, _asound.SND_PCM_NONBLOCK)
+    if err == 0:
+        _asound.snd_pcm_close(pcm[0])
+    # a busy device exists, too:
+    return err == 0 or err == -errno.EBUSY
+
+
+def _check(err, message):
+    """Raise a RuntimeError if an ALSA function returned an error code."""
+    if err < 0:
+        raise RuntimeError('{} failed: {}'.format(
+            message, _ffi.string(_asound.snd_strerror(err)).decode('utf-8')))
+    return err
+
+
+class _SoundCard:
+    def __init__(self, *, id):
+        self._id = id
+
+    @property
+    def channels(self):
+        """int : The number of channels of the device.
+
+        Plugin devices that convert any number of channels report two
+        channels.
+
+        """
+        pcm = _ffi.new("snd_pcm_t**")
+        _check(_pcm_open(pcm, self._id, self._stream, _asound.SND_PCM_NONBLOCK),
+               'Opening {}'.format(self._id))
+        params = _ffi.new("snd_pcm_hw_params_t**")
+        try:
+            _check(_asound.snd_pcm_hw_params_malloc(params), 'Allocating hardware parameters')
+            _check(_asound.snd_pcm_hw_params_any(pcm[0], params[0]), 'Querying hardware parameters')
+            channels = _ffi.new("unsigned int*")
+            _check(_asound.snd_pcm_hw_params_get_channels_max(params[0], channels), 'Querying channels')
+        finally:
+            if params[0] != _ffi.NULL:
+                _asound.snd_pcm_hw_params_free(params[0])
+            _asound.snd_pcm_close(pcm[0])
+        return channels[0] if channels[0] <= _max_plugin_channels else 2
+
+    @property
+    def id(self):
+        """str : The ALSA PCM name."""
+        return self._id
+
+    @property
+    def name(self):
+        """str : The human-readable name of the soundcard."""
+        for hint in _device_hints():
+            if hint['id'] == self._id:
+                return hint['name']
+        return self._id
+
+
+class _Speaker(_SoundCard):
+    """A soundcard output. Can be used to play audio.
+
+    Use the :func:`play` method to play one piece of audio, or use the
+    :func:`player` method to get a context manager for playing continuous
+    audio.
+
+    """
+
+    _stream = _asound.SND_PCM_STREAM_PLAYBACK
+
+    def __repr__(self):
+        return '<Speaker {} ({} channels)>'.format(self.name, self.channels)
+
+    def player(self, samplerate, channels=None, blocksize=None, period_size=None, periods=None,
+               mmap=False):
+        """Create Player for playing audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. This is the
+            default period size.
+        period_size : int, optional
+            The ALSA period size in frames. Defaults to ``blocksize``,
+            or to ALSA's choice.
+        periods : int, optional
+            The number of periods in the ALSA buffer. Defaults to
+            ALSA's choice.
+        mmap : bool, optional
+            Write directly into the memory-mapped ALSA buffer,
+            instead of copying through ``snd_pcm_writei``. Default is
+            ``False``.
+
+        Returns
+        -------
+        player : _Player
+        """
+        if channels is None:
+            channels = self.channels
+        return _Player(self._id, samplerate, channels, blocksize, period_size, periods, mmap)
+
+    def play(self, data, samplerate, channels=None, blocksize=None, period_size=None, periods=None,
+             mmap=False):
+        """Play some audio data.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. This is the
+            default period size.
+        period_size : int, optional
+            The ALSA period size in frames.
+        periods : int, optional
+            The number of periods in the ALSA buffer.
+        mmap : bool, optional
+            Write directly into the memory-mapped ALSA buffer.
+        """
+        with self.player(samplerate, channels, blocksize, period_size, periods, mmap) as p:
+            p.play(data)
+
+
+class _Microphone(_SoundCard, _SharedRecorderMixin):
+    """A soundcard input. Can be used to record audio.
+
+    Use the :func:`record` method to record one piece of audio, or use
+    the :func:`recorder` method to get a context manager for recording
+    continuous audio.
+
+    """
+
+    _stream = _asound.SND_PCM_STREAM_CAPTURE
+
+    def __repr__(self):
+        return '<Microphone {} ({} channels)>'.format(self.name, self.channels)
+
+    @property
+    def isloopback(self):
+        """bool : Whether this microphone is recording a speaker."""
+        return False
+
+    def recorder(self, samplerate, channels=None, blocksize=None, period_size=None, periods=None,
+                 mmap=False):
+        """Create Recorder for recording audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. This is the
+            default period size.
+        period_size : int, optional
+            The ALSA period size in frames. Defaults to ``blocksize``,
+            or to ALSA's choice.
+        periods : int, optional
+            The number of periods in the ALSA buffer. Defaults to
+            ALSA's choice.
+        mmap : bool, optional
+            Read directly from the memory-mapped ALSA buffer, instead
+            of copying through ``snd_pcm_readi``. Default is ``False``.
+
+        Returns
+        -------
+        recorder : _Recorder
+        """
+        if channels is None:
+            channels = self.channels
+        return _Recorder(self._id, samplerate, channels, blocksize, period_size, periods, mmap)
+
+    def record(self, numframes, samplerate, channels=None, blocksize=None, period_size=None,
+               periods=None, mmap=False):
+        """Record some audio data.
+
+        Parameters
+        ----------
+        numframes: int
+            The number of frames to record.
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. This is the
+            default period size.
+        period_size : int, optional
+            The ALSA period size in frames.
+        periods : int, optional
+            The number of periods in the ALSA buffer.
+        mmap : bool, optional
+            Read directly from the memory-mapped ALSA buffer.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+        """
+        with self.recorder(samplerate, channels, blocksize, period_size, periods, mmap) as r:
+            return r.record(numframes)
+
+
+class _Stream:
+    """A context manager for an open ALSA PCM.
+
+    This class is meant to be subclassed. Children must set `_stream`
+    to the ALSA stream direction, and `_start_threshold` to the
+    number of frames after which the PCM starts.
+
+    A list of channels opens the PCM with enough channels to include
+    all of them, and only transfers the given channels.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, id, samplerate, channels, blocksize=None, period_size=None, periods=None,
+                 mmap=False):
+        self._id = id
+        self._samplerate = samplerate
+        if isinstance(channels, int):
+            self._channelmap = list(range(channels))
+        else:
+            self._channelmap = list(channels)
+        if any(not isinstance(ch, int) or ch < 0 for ch in self._channelmap):
+            raise TypeError('channels must be a number of channels or a list of channel indices')
+        self.channels = len(self._channelmap)
+        self._pcm_channels = max(self._channelmap) + 1
+        self._period_size = period_size if period_size is not None else blocksize
+        self._periods = periods
+        self._mmap = mmap
+        self._xruns = 0
+
+    def __enter__(self):
+        pcm = _ffi.new("snd_pcm_t**")
+        _check(_pcm_open(pcm, self._id, self._stream, 0),
+               'Opening {}'.format(self._id))
+        self._pcm = pcm[0]
+        try:
+            self._set_hw_params()
+            self._set_sw_params()
+        except BaseException:
+            _asound.snd_pcm_close(self._pcm)
+            raise
+        return self
+
+    def _set_hw_params(self):
+        params = _ffi.new("snd_pcm_hw_params_t**")
+        _check(_asound.snd_pcm_hw_params_malloc(params), 'Allocating hardware parameters')
+        try:
+            pcm, params = self._pcm, params[0]
+            _check(_asound.snd_pcm_hw_params_any(pcm, params), 'Querying hardware parameters')
+            access = (_asound.SND_PCM_ACCESS_MMAP_INTERLEAVED if self._mmap
+                      else _asound.SND_PCM_ACCESS_RW_INTERLEAVED)
+            _check(_asound.snd_pcm_hw_params_set_access(pcm, params, access), 'Setting access')
+            _check(_asound.snd_pcm_hw_params_set_format(pcm, params, _asound.SND_PCM_FORMAT_FLOAT_LE),
+                   'Setting format')
+            _check(_asound.snd_pcm_hw_params_set_channels(pcm, params, self._pcm_channels),
+                   'Setting {} channels'.format(self._pcm_channels))
+            rate = _ffi.new("unsigned int*", self._samplerate)
+            _check(_asound.snd_pcm_hw_params_set_rate_near(pcm, params, rate, _ffi.NULL),
+                   'Setting samplerate')
+            if rate[0] != self._samplerate:
+                raise RuntimeError('samplerate {} is not supported by {}, use a plug device'
+                                   .format(self._samplerate, self._id))
+            if self._period_size is not None:
+                period_size = _ffi.new("snd_pcm_uframes_t*", self._period_size)
+                _check(_asound.snd_pcm_hw_params_set_period_size_near(pcm, params, period_size, _ffi.NULL),
+                       'Setting period size')
+            if self._periods is not None:
+                periods = _ffi.new("unsigned int*", self._periods)
+                _check(_asound.snd_pcm_hw_params_set_periods_near(pcm, params, periods, _ffi.NULL),
+                       'Setting periods')
+            _check(_asound.snd_pcm_hw_params(pcm, params), 'Setting hardware parameters')
+            period_size = _ffi.new("snd_pcm_uframes_t*")
+            _check(_asound.snd_pcm_hw_params_get_period_size(params, period_size, _ffi.NULL),
+                   'Querying period size')
+            buffer_size = _ffi.new("snd_pcm_uframes_t*")
+            _check(_asound.snd_pcm_hw_params_get_buffer_size(params, buffer_size),
+                   'Querying buffer size')
+            self.period_size = period_size[0]
+            self.buffer_size = buffer_size[0]
+        finally:
+            _asound.snd_pcm_hw_params_free(params)
+
+    def _set_sw_params(self):
+        params = _ffi.new("snd_pcm_sw_params_t**")
+        _check(_asound.snd_pcm_sw_params_malloc(params), 'Allocating software parameters')
+        try:
+            pcm, params = self._pcm, params[0]
+            _check(_asound.snd_pcm_sw_params_current(pcm, params), 'Querying software parameters')
+            _check(_asound.snd_pcm_sw_params_set_start_threshold(pcm, params, self._start_threshold()),
+                   'Setting start threshold')
+            _check(_asound.snd_pcm_sw_params_set_avail_min(pcm, params, self.period_size),
+                   'Setting minimum available frames')
+            _check(_asound.snd_pcm_sw_params(pcm, params), 'Setting software parameters')
+        finally:
+            _asound.snd_pcm_sw_params_free(params)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _asound.snd_pcm_close(self._pcm)
+
+    @property
+    def latency(self):
+        """float : Latency of the stream in seconds"""
+        delay = _ffi.new("snd_pcm_sframes_t*")
+        _check(_asound.snd_pcm_delay(self._pcm, delay), 'Querying delay')
+        return delay[0] / self._samplerate
+
+    @property
+    def xruns(self):
+        """int : The number of buffer underruns or overruns so far."""
+        return self._xruns
+
+    def _recover(self, err):
+        """Recover from an underrun or overrun, or raise the error."""
+        if err == -errno.EPIPE:
+            self._xruns += 1
+        _check(_asound.snd_pcm_recover(self._pcm, err, 1), 'Recovering')
+        if self._stream == _asound.SND_PCM_STREAM_CAPTURE and \
+           _asound.snd_pcm_state(self._pcm) == _asound.SND_PCM_STATE_PREPARED:
+            # recovering stops capture streams:
+            _check(_asound.snd_pcm_start(self._pcm), 'Restarting')
+
+    def _poll_descriptors(self):
+        """The file descriptors and events to poll for this PCM."""
+        count = _asound.snd_pcm_poll_descriptors_count(self._pcm)
+        pfds = _ffi.new("struct pollfd[]", max(count, 0))
+        count = _asound.snd_pcm_poll_descriptors(self._pcm, pfds, len(pfds))
+        return [(pfds[idx].fd, pfds[idx].events) for idx in range(max(count, 0))]
+
+    def _wait_available(self, numframes, timeout):
+        """Wait until `numframes` frames can be transferred without blocking.
+
+        Returns False if this takes longer than `timeout` seconds.
+
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            avail = _asound.snd_pcm_avail_update(self._pcm)
+            if avail < 0:
+                self._recover(avail)
+                continue
+            if avail >= numframes:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            err = _asound.snd_pcm_wait(self._pcm, min(1000, math.ceil(remaining * 1000)))
+            if err < 0:
+                self._recover(err)
+
+    def _mmap_begin(self, numframes):
+        """Wait until the buffer has room or data, and map part of it.
+
+        Returns the mapped frames as a writable *frames x channels*
+        Numpy view, and the offset of the frames in the buffer.
+
+        """
+        while True:
+            avail = _asound.snd_pcm_avail_update(self._pcm)
+            if avail < 0:
+                self._recover(avail)
+                continue
+            if avail >= min(numframes, self.period_size):
+                break
+            if self._stream == _asound.SND_PCM_STREAM_PLAYBACK and \
+               _asound.snd_pcm_state(self._pcm) == _asound.SND_PCM_STATE_PREPARED:
+                # the buffer is full, but was never started:
+                _check(_asound.snd_pcm_start(self._pcm), 'Starting')
+            err = _asound.snd_pcm_wait(self._pcm, 1000)
+            if err < 0:
+                self._recover(err)
+        areas = _ffi.new("snd_pcm_channel_area_t**")
+        offset = _ffi.new("snd_pcm_uframes_t*")
+        frames = _ffi.new("snd_pcm_uframes_t*", min(numframes, avail))
+        _check(_asound.snd_pcm_mmap_begin(self._pcm, areas, offset, frames), 'Mapping buffer')
+        framesize = 4 * self._pcm_channels
+        area = areas[0][0]
+        if area.first != 0 or area.step != 8 * framesize:
+            raise RuntimeError('{} does not provide an interleaved buffer'.format(self._id))
+        buffer = _ffi.buffer(_ffi.cast("char*", area.addr) + offset[0] * framesize,
+                             frames[0] * framesize)
+        return numpy.frombuffer(buffer, dtype='float32').reshape([-1, self._pcm_channels]), offset[0]
+
+    def _mmap_commit(self, offset, numframes):
+        committed = _asound.snd_pcm_mmap_commit(self._pcm, offset, numframes)
+        if committed < 0:
+            self._recover(committed)
+        elif committed != numframes:
+            self._recover(-errno.EPIPE)
+
+
+class _Player(_Stream):
+    """A context manager for an active output stream.
+
+    Audio playback is available as soon as the context manager is
+    entered. Audio data can be played using the :func:`play` method.
+    Successive calls to :func:`play` will queue up the audio one piece
+    after another. If no audio is queued up, the PCM underruns, and
+    recovers with the next call to :func:`play`.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    _stream = _asound.SND_PCM_STREAM_PLAYBACK
+
+    def _start_threshold(self):
+        # start as soon as the buffer is full:
+        return self.buffer_size
+
+    @property
+    def writable_frames(self):
+        """int : The number of frames that can be played without blocking.
+
+        Use :func:`wait` to wait until any of several players can be
+        written to.
+
+        """
+        avail = _asound.snd_pcm_avail_update(self._pcm)
+        # after an underrun, the whole buffer is free:
+        return avail if avail >= 0 else self.buffer_size
+
+    def _is_ready(self):
+        return self.writable_frames > 0
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            if _asound.snd_pcm_state(self._pcm) == _asound.SND_PCM_STATE_PREPARED:
+                # less than one buffer was played:
+                _asound.snd_pcm_start(self._pcm)
+            _asound.snd_pcm_drain(self._pcm)
+        super(_Player, self).__exit__(exc_type, exc_value, traceback)
+
+    def play(self, data):
+        """Play some audio data.
+
+        Internally, all data is handled as ``float32`` and with the
+        appropriate number of channels. For maximum performance,
+        provide data as a *frames × channels* float32 numpy array.
+
+        If single-channel or one-dimensional data is given, this data
+        will be played on all available channels.
+
+        This function blocks until all data has been handed to ALSA,
+        which buffers up to :attr:`buffer_size` frames.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+
+        """
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        if data.shape[1] == 1 and self.channels != 1:
+            data = numpy.tile(data, [1, self.channels])
+        if data.shape[1] != self.channels:
+            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        if self._channelmap != list(range(self._pcm_channels)):
+            frames = numpy.zeros([len(data), self._pcm_channels], dtype='float32')
+            frames[:, self._channelmap] = data
+            data = frames
+        if self._mmap:
+            self._play_mmap(data)
+        else:
+            self._play_rw(data)
+
+    def _play_rw(self, data):
+        while len(data) > 0:
+            written = _asound.snd_pcm_writei(self._pcm, _ffi.from_buffer(data), len(data))
+            if written < 0:
+                self._recover(written)
+                continue
+            data = data[written:]
+
+    def _play_mmap(self, data):
+        while len(data) > 0:
+            buffer, offset = self._mmap_begin(len(data))
+            buffer[:] = data[:len(buffer)]
+            self._mmap_commit(offset, len(buffer))
+            data = data[len(buffer):]
+
+
+class _Recorder(_Stream):
+    """A context manager for an active input stream.
+
+    Audio recording is available as soon as the context manager is
+    entered. Recorded audio data can be read using the :func:`record`
+    method. If no audio data is available, :func:`record` will block until
+    the requested amount of audio data has been recorded.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    _stream = _asound.SND_PCM_STREAM_CAPTURE
+
+    def _start_threshold(self):
+        # start right away:
+        return 1
+
+    def __enter__(self):
+        super(_Recorder, self).__enter__()
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+        _check(_asound.snd_pcm_start(self._pcm), 'Starting')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _asound.snd_pcm_drop(self._pcm)
+        super(_Recorder, self).__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def readable_frames(self):
+        """int : The number of frames that can be recorded without blocking.
+
+        This includes frames that are pending from previous calls to
+        :func:`record`, and all complete periods in the buffer. Use
+        :func:`wait` to wait until any of several recorders can be read
+        from.
+
+        """
+        avail = max(0, _asound.snd_pcm_avail_update(self._pcm))
+        return len(self._pending_chunk) + avail // self.period_size * self.period_size
+
+    def _is_ready(self):
+        # after an overrun, recording recovers right away:
+        return self.readable_frames > 0 or _asound.snd_pcm_avail_update(self._pcm) < 0
+
+    def _record_chunk(self, timeout=None):
+        """Record one period of audio data, as a *frames × channels* array.
+
+        If no period is available within `timeout` seconds, returns None.
+
+        """
+        if timeout is not None and not self._wait_available(self.period_size, timeout):
+            return None
+        if self._mmap:
+            buffer, offset = self._mmap_begin(self.period_size)
+            chunk = buffer[:, self._channelmap].copy()
+            self._mmap_commit(offset, len(buffer))
+            return chunk
+        chunk = numpy.empty([self.period_size, self._pcm_channels], dtype='float32')
+        while True:
+            read = _asound.snd_pcm_readi(self._pcm, _ffi.from_buffer(chunk), self.period_size)
+            if read >= 0:
+                break
+            self._recover(read)
+        return chunk[:read, self._channelmap]
+
+    def record(self, numframes=None, timeout=None):
+        """Record a block of audio data.
+
+        The data will be returned as a *frames × channels* float32
+        numpy array. This function will wait until ``numframes``
+        frames have been recorded. If numframes is given, it will
+        return exactly ``numframes`` frames, and buffer the rest for
+        later.
+
+        If ``numframes`` is None, it will return one period of audio
+        data, along with any buffered frames.
+
+        If ``timeout`` is given, and not enough data arrives in time,
+        this raises a `TimeoutError`. All data recorded so far is kept
+        for the next call, or can be retrieved with
+        :func:`record_nowait` or :func:`flush`.
+
+        Parameters
+        ----------
+        numframes : int, optional
+            The number of frames to record.
+        timeout : float, optional
+            The maximum time to wait in seconds.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        def remaining():
+            return max(0, deadline - time.monotonic()) if deadline is not None else None
+        if numframes is None:
+            chunk = self._record_chunk(remaining())
+            if chunk is None:
+                raise TimeoutError('no audio data was recorded within {} seconds'.format(timeout))
+            blocks = [self.flush(), chunk]
+        else:
+            blocks = [self._pending_chunk]
+            self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+            recorded_frames = len(blocks[0])
+            while recorded_frames < numframes:
+                block = self._record_chunk(remaining())
+                if block is None:
+                    # keep everything for the next call:
+                    self._pending_chunk = numpy.concatenate(blocks, axis=0)
+                    raise TimeoutError('only {} of {} frames were recorded within {} seconds'
+                                       .format(recorded_frames, numframes, timeout))
+                blocks.append(block)
+                recorded_frames += len(block)
+            if recorded_frames > numframes:
+                to_split = -(recorded_frames-numframes)
+                blocks[-1], self._pending_chunk = numpy.split(blocks[-1], [to_split])
+        return numpy.concatenate(blocks, axis=0)
+
+    def record_nowait(self):
+        """Record all audio data that is available right now.
+
+        This never blocks. It returns the pending chunk and all data
+        of all complete periods ALSA has recorded so far, which might be no data at all.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        blocks = [self.flush()]
+        while True:
+            chunk = self._record_chunk(timeout=0)
+            if chunk is None:
+                break
+            blocks.append(chunk)
+        return numpy.concatenate(blocks, axis=0)
+
+    def flush(self):
+        """Return the last pending chunk.
+
+        After using the :func:`record` method, this will return the
+        last incomplete chunk and delete it.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        last_chunk = self._pending_chunk
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+        return last_chunk
@@ -0,0 +1,106 @@
+// from poll.h
+
+struct pollfd {
+    int fd;
+    short events;
+    short revents;
+};
+
+// from alsa/pcm.h
+
+typedef struct _snd_pcm snd_pcm_t;
+typedef struct _snd_pcm_hw_params snd_pcm_hw_params_t;
+typedef struct _snd_pcm_sw_params snd_pcm_sw_params_t;
+typedef unsigned long snd_pcm_uframes_t;
+typedef long snd_pcm_sframes_t;
+
+typedef enum _snd_pcm_stream {
+    SND_PCM_STREAM_PLAYBACK = 0,
+    SND_PCM_STREAM_CAPTURE = 1
+} snd_pcm_stream_t;
+
+typedef enum _snd_pcm_access {
+    SND_PCM_ACCESS_MMAP_INTERLEAVED = 0,
+    SND_PCM_ACCESS_MMAP_NONINTERLEAVED = 1,
+    SND_PCM_ACCESS_MMAP_COMPLEX = 2,
+    SND_PCM_ACCESS_RW_INTERLEAVED = 3,
+    SND_PCM_ACCESS_RW_NONINTERLEAVED = 4
+} snd_pcm_access_t;
+
+typedef enum _snd_pcm_format {
+    SND_PCM_FORMAT_UNKNOWN = -1,
+    SND_PCM_FORMAT_FLOAT_LE = 14
+} snd_pcm_format_t;
+
+typedef enum _snd_pcm_state {
+    SND_PCM_STATE_OPEN = 0,
+    SND_PCM_STATE_SETUP,
+    SND_PCM_STATE_PREPARED,
+    SND_PCM_STATE_RUNNING,
+    SND_PCM_STATE_XRUN,
+    SND_PCM_STATE_DRAINING,
+    SND_PCM_STATE_PAUSED,
+    SND_PCM_STATE_SUSPENDED,
+    SND_PCM_STATE_DISCONNECTED
+} snd_pcm_state_t;
+
+#define SND_PCM_NONBLOCK 1
+
+typedef struct _snd_pcm_channel_area {
+    void *addr;
+    unsigned int first;
+    unsigned int step;
+} snd_pcm_channel_area_t;
+
+int snd_pcm_open(snd_pcm_t **pcm, const char *name, snd_pcm_stream_t stream, int mode);
+int snd_pcm_close(snd_pcm_t *pcm);
+
+int snd_pcm_hw_params_malloc(snd_pcm_hw_params_t **ptr);
+void snd_pcm_hw_params_free(snd_pcm_hw_params_t *obj);
+int snd_pcm_hw_params_any(snd_pcm_t *pcm, snd_pcm_hw_params_t *params);
+int snd_pcm_hw_params_set_access(snd_pcm_t *pcm, snd_pcm_hw_params_t *params, snd_pcm_access_t access);
+int snd_pcm_hw_params_set_format(snd_pcm_t *pcm, snd_pcm_hw_params_t *params, snd_pcm_format_t val);
+int snd_pcm_hw_params_set_channels(snd_pcm_t *pcm, snd_pcm_hw_params_t *params, unsigned int val);
+int snd_pcm_hw_params_get_channels_max(const snd_pcm_hw_params_t *params, unsigned int *val);
+int snd_pcm_hw_params_set_rate_near(snd_pcm_t *pcm, snd_pcm_hw_params_t *params, unsigned int *val, int *dir);
+int snd_pcm_hw_params_set_period_size_near(snd_pcm_t *pcm, snd_pcm_hw_params_t *params, snd_pcm_uframes_t *val, int *dir);
+int snd_pcm_hw_params_set_periods_near(snd_pcm_t *pcm, snd_pcm_hw_params_t *params, unsigned int *val, int *dir);
+int snd_pcm_hw_params_get_period_size(const snd_pcm_hw_params_t *params, snd_pcm_uframes_t *frames, int *dir);
+int snd_pcm_hw_params_get_buffer_size(const snd_pcm_hw_params_t *params, snd_pcm_uframes_t *val);
+int snd_pcm_hw_params(snd_pcm_t *pcm, snd_pcm_hw_params_t *params);
+
+int snd_pcm_sw_params_malloc(snd_pcm_sw_params_t **ptr);
+void snd_pcm_sw_params_free(snd_pcm_sw_params_t *obj);
+int snd_pcm_sw_params_current(snd_pcm_t *pcm, snd_pcm_sw_params_t *params);
+int snd_pcm_sw_params_set_start_threshold(snd_pcm_t *pcm, snd_pcm_sw_params_t *params, snd_pcm_uframes_t val);
+int snd_pcm_sw_params_set_avail_min(snd_pcm_t *pcm, snd_pcm_sw_params_t *params, snd_pcm_uframes_t val);
+int snd_pcm_sw_params(snd_pcm_t *pcm, snd_pcm_sw_params_t *params);
+
+int snd_pcm_prepare(snd_pcm_t *pcm);
+int snd_pcm_start(snd_pcm_t *pcm);
+int snd_pcm_drop(snd_pcm_t *pcm);
+int snd_pcm_drain(snd_pcm_t *pcm);
+snd_pcm_state_t snd_pcm_state(snd_pcm_t *pcm);
+int snd_pcm_recover(snd_pcm_t *pcm, int err, int silent);
+int snd_pcm_wait(snd_pcm_t *pcm, int timeout);
+int snd_pcm_delay(snd_pcm_t *pcm, snd_pcm_sframes_t *delayp);
+snd_pcm_sframes_t snd_pcm_avail_update(snd_pcm_t *pcm);
+int snd_pcm_poll_descriptors_count(snd_pcm_t *pcm);
+int snd_pcm_poll_descriptors(snd_pcm_t *pcm, struct pollfd *pfds, unsigned int space);
+
+snd_pcm_sframes_t snd_pcm_writei(snd_pcm_t *pcm, const void *buffer, snd_pcm_uframes_t size);
+snd_pcm_sframes_t snd_pcm_readi(snd_pcm_t *pcm, void *buffer, snd_pcm_uframes_t size);
+
+int snd_pcm_mmap_begin(snd_pcm_t *pcm, const snd_pcm_channel_area_t **areas, snd_pcm_uframes_t *offset, snd_pcm_uframes_t *frames);
+snd_pcm_sframes_t snd_pcm_mmap_commit(snd_pcm_t *pcm, snd_pcm_uframes_t offset, snd_pcm_uframes_t frames);
+
+// from alsa/control.h and alsa/error.h
+
+int snd_device_name_hint(int card, const char *iface, void ***hints);
+int snd_device_name_free_hint(void **hints);
+char *snd_device_name_get_hint(const void *hint, const char *id);
+const char *snd_strerror(int errnum);
+
+// from stdlib.h, for freeing hint strings
+
+void free(void *ptr);
@@ -0,0 +1,647 @@
+"""Benchmarks for SoundCard.
+
+Run a benchmark with ``python -m soundcard.bench <benchmark>``. Results
+are written as JSON to stdout (or to the file given with ``--output``),
+so that they can be stored and compared across versions.
+
+The benchmarks play into and record from a loopback device. On Linux,
+this is a PulseAudio null sink and its monitor source, which can be
+created with::
+
+    pactl load-module module-null-sink sink_name=Null channels=2 rate=48000
+
+Available benchmarks:
+
+latency
+    Plays short impulses through the speaker with a ``_Player``,
+    captures them from the speaker's monitor with a ``_Recorder``, and
+    reports the distribution of round-trip latencies for each
+    blocksize. The latency of one trial is the time between handing
+    the impulse to :func:`_Player.play` and the moment
+    :func:`_Recorder.record` returns the block that contains it.
+
+throughput
+    Measures the hot paths of :func:`_Player.play` and
+    :func:`_Recorder.record` for every combination of channel count and
+    blocksize: frames per second, CPU seconds per second of audio, and
+    the transient memory allocated per block. Since the loopback device
+    runs in real time, frames per second will be close to the sampling
+    rate; CPU time is the more sensitive measure.
+
+streams
+    Measures how many players and recorders can be opened and closed
+    per second.
+
+mixer
+    Plays many short overlapping sounds, once through a single
+    :class:`Mixer`, and once through one player per sound, and reports
+    the wall time and CPU time of both.
+
+import
+    Measures the time it takes to set up the cffi declarations of the
+    pulseaudio backend in a fresh interpreter, once by parsing
+    ``pulseaudio.py.h``, and once by loading the precompiled module
+    generated by ``python -m soundcard.build_ffi``.
+
+lock
+    Measures the cost of taking the mainloop lock once per call versus
+    once per block, on the actual hot paths. For every blocksize, it
+    plays and records through the loopback device, once with
+    :func:`_Player.play` and :func:`_Recorder.record`, which take the
+    lock once per block, and once with the same loops as they were
+    before batching, which take the lock for every pulseaudio call. It
+    reports the time per block and the CPU seconds per second of
+    audio. Linux only.
+
+simple
+    Compares single calls of :func:`_Speaker.play` and
+    :func:`_Microphone.record` with ``simple=True`` (a blocking
+    pa_simple connection per call) and ``simple=False`` (a stream on
+    the shared threaded mainloop). For every blocksize, it reports the
+    wall time and CPU time per call of playing or recording one block.
+    Linux only.
+
+Every benchmark can store its results as a baseline with
+``--save-baseline FILE``, and compare against a stored baseline with
+``--baseline FILE``. The comparison reports the relative change of
+every numeric result, e.g. to check a change in ``pulseaudio.py``::
+
+    python -m soundcard.bench throughput --save-baseline before.json
+    # ... apply change ...
+    python -m soundcard.bench throughput --baseline before.json
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy
+
+import soundcard
+
+
+def _loopback_devices(speaker_id):
+    """Find a speaker and the microphone that records its output."""
+    speaker = soundcard.get_speaker(speaker_id)
+    if soundcard._backend == 'pulseaudio':
+        # pulseaudio names the monitor source of every sink after the sink:
+        microphone = soundcard.get_microphone(speaker.id + '.monitor', include_loopback=True)
+    else:
+        microphone = soundcard.get_microphone(speaker_id, include_loopback=True)
+    return speaker, microphone
+
+
+def _summary(values):
+    """Distribution statistics of a list of measurements."""
+    values = numpy.asarray(values, dtype='float64')
+    if len(values) == 0:
+        return dict(count=0)
+    return dict(count=len(values),
+                min=float(values.min()),
+                mean=float(values.mean()),
+                median=float(numpy.median(values)),
+                p90=float(numpy.percentile(values, 90)),
+                p99=float(numpy.percentile(values, 99)),
+                max=float(values.max()),
+                std=float(values.std()))
+
+
+def _environment():
+    """Information about the machine a benchmark was run on."""
+    info = dict(python=platform.python_version(),
+                platform=platform.platform(),
+                numpy=numpy.__version__,
+                backend=soundcard._backend)
+    if soundcard._backend == 'pulseaudio':
+        server_info = soundcard.pulseaudio._pulse.server_info
+        info['server'] = server_info['server name']
+        info['server version'] = server_info['server version']
+    return info
+
+
+def measure_latency(speaker, microphone, samplerate, blocksize, trials=20,
+                    channels=2, threshold=0.5, timeout=2.0):
+    """Measure the round-trip latency of a player and a recorder.
+
+    Parameters
+    ----------
+    speaker : _Speaker
+        The speaker to play impulses on.
+    microphone : _Microphone
+        A loopback microphone that records `speaker`.
+    samplerate : int
+        The sampling rate in Hz.
+    blocksize : int
+        The blocksize of both the player and the recorder.
+    trials : int
+        The number of impulses to measure.
+    channels : int
+        The number of channels of both streams.
+    threshold : float
+        The recorded amplitude that counts as a detected impulse.
+    timeout : float
+        Number of seconds after which an impulse counts as lost.
+
+    Returns
+    -------
+    latencies : list(float)
+        Round-trip latency in seconds of every detected impulse.
+    lost : int
+        Number of impulses that were never detected.
+
+    """
+    impulse = numpy.zeros([blocksize, channels], dtype='float32')
+    impulse[0] = 1.0
+    silence = numpy.zeros([blocksize, channels], dtype='float32')
+    detected = threading.Event()
+    stop = threading.Event()
+    detection_time = [None]
+
+    def capture(recorder):
+        while not stop.is_set():
+            block = recorder.record(blocksize)
+            if numpy.abs(block).max() > threshold:
+                detection_time[0] = time.perf_counter()
+                detected.set()
+
+    def play_silence():
+        # about 0.1 seconds, so that the player never runs dry:
+        for _ in range(max(1, samplerate // blocksize // 10)):
+            player.play(silence)
+
+    latencies = []
+    lost = 0
+    with microphone.recorder(samplerate, channels=channels, blocksize=blocksize) as recorder, \
+         speaker.player(samplerate, channels=channels, blocksize=blocksize) as player:
+        thread = threading.Thread(target=capture, args=(recorder,), daemon=True)
+        thread.start()
+        # let both streams settle before the first impulse:
+        play_silence()
+        for _ in range(trials):
+            detected.clear()
+            start_time = time.perf_counter()
+            player.play(impulse)
+            while not detected.is_set() and time.perf_counter() - start_time < timeout:
+                player.play(silence)
+            if detected.is_set():
+                latencies.append(detection_time[0] - start_time)
+            else:
+                lost += 1
+            # keep the impulses well apart, and keep the stream
+            # running between them, so that it does not underrun:
+            play_silence()
+        stop.set()
+        # keep playing silence so the recorder thread can finish:
+        play_silence()
+        thread.join(timeout)
+    return latencies, lost
+
+
+def bench_latency(args):
+    speaker, microphone = _loopback_devices(args.speaker)
+    results = []
+    for blocksize in args.blocksizes:
+        latencies, lost = measure_latency(speaker, microphone, args.samplerate, blocksize,
+                                          trials=args.trials, channels=args.channels)
+        result = dict(case='blocksize={}'.format(blocksize),
+                      blocksize=blocksize,
+                      blocksize_seconds=blocksize / args.samplerate,
+                      lost=lost,
+                      latency=_summary(latencies),
+                      latencies=latencies)
+        results.append(result)
+        print('blocksize {:>5}: median latency {:.2f} ms ({} lost)'
+              .format(blocksize, result['latency'].get('median', float('nan'))*1000, lost),
+              file=sys.stderr)
+    return dict(speaker=speaker.id, microphone=microphone.id,
+                samplerate=args.samplerate, channels=args.channels,
+                trials=args.trials, results=results)
+
+
+def _run_blocks(process, numblocks):
+    """Call `process` `numblocks` times and measure its cost.
+
+    Returns the wall time, the CPU time, and the average transient
+    memory in bytes allocated by one call.
+
+    """
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    for _ in range(numblocks):
+        process()
+    wall_time = time.perf_counter() - start_wall
+    cpu_time = time.process_time() - start_cpu
+
+    # tracemalloc slows down every allocation, so measure allocations
+    # separately from the timing above:
+    numtraced = max(1, min(numblocks, 50))
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(numtraced):
+            if hasattr(tracemalloc, 'reset_peak'):
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            else:
+                # Python < 3.9 can not reset the peak, so restart tracing:
+                tracemalloc.stop()
+                tracemalloc.start()
+                current, _ = tracemalloc.get_traced_memory()
+            process()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+    finally:
+        tracemalloc.stop()
+    return wall_time, cpu_time, float(numpy.mean(peaks))
+
+
+def measure_play(speaker, samplerate, channels, blocksize, duration):
+    """Measure the cost of `_Player.play` for `duration` seconds of audio."""
+    block = numpy.random.uniform(-0.1, 0.1, [blocksize, channels]).astype('float32')
+    numblocks = max(1, int(duration * samplerate / blocksize))
+    with speaker.player(samplerate, channels=channels, blocksize=blocksize) as player:
+        wall_time, cpu_time, alloc = _run_blocks(lambda: player.play(block), numblocks)
+    audio_time = numblocks * blocksize / samplerate
+    return dict(frames_per_second=numblocks * blocksize / wall_time,
+                cpu_per_audio_second=cpu_time / audio_time,
+                alloc_bytes_per_block=alloc)
+
+
+def measure_record(microphone, samplerate, channels, blocksize, duration):
+    """Measure the cost of `_Recorder.record` for `duration` seconds of audio."""
+    numblocks = max(1, int(duration * samplerate / blocksize))
+    with microphone.recorder(samplerate, channels=channels, blocksize=blocksize) as recorder:
+        wall_time, cpu_time, alloc = _run_blocks(lambda: recorder.record(blocksize), numblocks)
+    audio_time = numblocks * blocksize / samplerate
+    return dict(frames_per_second=numblocks * blocksize / wall_time,
+                cpu_per_audio_second=cpu_time / audio_time,
+                alloc_bytes_per_block=alloc)
+
+
+def bench_throughput(args):
+    speaker, microphone = _loopback_devices(args.speaker)
+    results = []
+    for channels in args.channel_counts:
+        for blocksize in args.blocksizes:
+            for direction, measure, device in [('play', measure_play, speaker),
+                                               ('record', measure_record, microphone)]:
+                metrics = measure(device, args.samplerate, channels, blocksize, args.duration)
+                results.append(dict(case='{} channels={} blocksize={}'.format(direction, channels, blocksize),
+                                    direction=direction, channels=channels, blocksize=blocksize,
+                                    **metrics))
+                print('{:<6} {} channels, blocksize {:>5}: {:.4f} s CPU per s audio'
+                      .format(direction, channels, blocksize, metrics['cpu_per_audio_second']),
+                      file=sys.stderr)
+    return dict(speaker=speaker.id, microphone=microphone.id,
+                samplerate=args.samplerate, duration=args.duration, results=results)
+
+
+def bench_streams(args):
+    speaker, microphone = _loopback_devices(args.speaker)
+    results = []
+    for blocksize in args.blocksizes:
+        for kind, open_stream in [('player', speaker.player), ('recorder', microphone.recorder)]:
+            start_time = time.perf_counter()
+            for _ in range(args.iterations):
+                with open_stream(args.samplerate, channels=args.channels, blocksize=blocksize):
+                    pass
+            elapsed = time.perf_counter() - start_time
+            results.append(dict(case='{} blocksize={}'.format(kind, blocksize),
+                                kind=kind, blocksize=blocksize,
+                                streams_per_second=args.iterations / elapsed))
+            print('{:<8} blocksize {:>5}: {:.1f} streams per second'
+                  .format(kind, blocksize, args.iterations / elapsed),
+                  file=sys.stderr)
+    return dict(speaker=speaker.id, microphone=microphone.id,
+                samplerate=args.samplerate, channels=args.channels,
+                iterations=args.iterations, results=results)
+
+
+def measure_mixer(speaker, samplerate, channels, blocksize, voices, duration):
+    """Play `voices` random sounds within `duration` seconds through a `Mixer`."""
+    sounds, offsets = _random_voices(samplerate, channels, voices, duration)
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    with soundcard.Mixer(speaker, samplerate, channels=channels, blocksize=blocksize) as mixer:
+        for sound, offset in zip(sounds, offsets):
+            mixer.submit(sound, offset=offset, gain=1 / voices)
+        while mixer.active_voices:
+            time.sleep(blocksize / samplerate)
+    return dict(wall_time=time.perf_counter() - start_wall,
+                cpu_time=time.process_time() - start_cpu,
+                streams=1)
+
+
+def measure_players(speaker, samplerate, channels, blocksize, voices, duration):
+    """Play `voices` random sounds within `duration` seconds through one player each."""
+    sounds, offsets = _random_voices(samplerate, channels, voices, duration)
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+
+    def play(sound, offset):
+        time.sleep(offset / samplerate)
+        speaker.play(sound / voices, samplerate, channels=channels, blocksize=blocksize)
+
+    threads = [threading.Thread(target=play, args=(sound, offset))
+               for sound, offset in zip(sounds, offsets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(wall_time=time.perf_counter() - start_wall,
+                cpu_time=time.process_time() - start_cpu,
+                streams=voices)
+
+
+def _random_voices(samplerate, channels, voices, duration):
+    """Short noise bursts with random start offsets in frames."""
+    random = numpy.random.RandomState(0)
+    sounds = [random.uniform(-0.5, 0.5, [int(samplerate * random.uniform(0.05, 0.2)), channels])
+              .astype('float32') for _ in range(voices)]
+    offsets = random.randint(0, int(samplerate * duration), voices)
+    return sounds, offsets
+
+
+def bench_mixer(args):
+    speaker = soundcard.get_speaker(args.speaker)
+    results = []
+    for voices in args.voices:
+        for method, measure in [('mixer', measure_mixer), ('players', measure_players)]:
+            metrics = measure(speaker, args.samplerate, args.channels, args.blocksizes[0],
+                              voices, args.duration)
+            results.append(dict(case='{} voices={}'.format(method, voices),
+                                method=method, voices=voices, **metrics))
+            print('{:<7} {:>4} voices: {:.3f} s CPU, {:.3f} s wall'
+                  .format(method, voices, metrics['cpu_time'], metrics['wall_time']),
+                  file=sys.stderr)
+    return dict(speaker=speaker.id, samplerate=args.samplerate, channels=args.channels,
+                blocksize=args.blocksizes[0], duration=args.duration, results=results)
+
+
+_import_snippets = {
+    'cdef': """
+import time, cffi
+start_time = time.perf_counter()
+ffi = cffi.FFI()
+with open({header!r}, 'rt') as f:
+    ffi.cdef(f.read())
+print(time.perf_counter() - start_time)
+""",
+    'precompiled': """
+import time, importlib.util, _cffi_backend
+start_time = time.perf_counter()
+spec = importlib.util.spec_from_file_location('_pulseaudio_ffi', {module!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - start_time)
+""",
+}
+
+
+def measure_import(method, header, module, trials):
+    """Time the declaration setup of `method` in `trials` fresh interpreters."""
+    code = _import_snippets[method].format(header=header, module=module)
+    durations = []
+    for _ in range(trials):
+        output = subprocess.check_output([sys.executable, '-c', code])
+        durations.append(float(output))
+    return durations
+
+
+def bench_import(args):
+    from soundcard import build_ffi
+    header = os.path.join(os.path.dirname(os.path.abspath(build_ffi.__file__)), 'pulseaudio.py.h')
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        module = build_ffi.build(tmpdir)
+        for method in ['cdef', 'precompiled']:
+            durations = measure_import(method, header, module, args.trials)
+            results.append(dict(case=method, method=method, import_time=_summary(durations)))
+            print('{:<11}: {:.2f} ms median'.format(method, 1000 * numpy.median(durations)),
+                  file=sys.stderr)
+    return dict(trials=args.trials, results=results)
+
+
+def _play_per_call(player, data):
+    """The write loop of `_Player.play` before batching, locked once per call."""
+    from soundcard.pulseaudio import _pulse, _pa, _ffi
+    data = numpy.array(data, dtype='float32', order='C')
+    while data.nbytes > 0:
+        writable_bytes = _pulse._pa_stream_writable_size(player.stream)
+        nwrite = writable_bytes // (4 * player.channels) # 4 bytes per sample
+        if nwrite == 0:
+            time.sleep(0.001)
+            continue
+        bytes = data[:nwrite].ravel().tobytes()
+        _pulse._pa_stream_write(player.stream, bytes, len(bytes), _ffi.NULL, 0, _pa.PA_SEEK_RELATIVE)
+        data = data[nwrite:]
+
+
+def _record_per_call(recorder, numframes):
+    """The read loop of `_Recorder._record_chunk` before batching, locked once per call."""
+    from soundcard.pulseaudio import _pulse, _ffi
+    data_ptr = _ffi.new('void**')
+    nbytes_ptr = _ffi.new('size_t*')
+    recorded_frames = 0
+    while recorded_frames < numframes:
+        if not _pulse._pa_stream_readable_size(recorder.stream):
+            recorder._record_event.wait(timeout=1)
+            recorder._record_event.clear()
+            continue
+        data_ptr[0] = _ffi.NULL
+        nbytes_ptr[0] = 0
+        _pulse._pa_stream_peek(recorder.stream, data_ptr, nbytes_ptr)
+        if data_ptr[0] != _ffi.NULL:
+            numpy.frombuffer(_ffi.buffer(data_ptr[0], nbytes_ptr[0]), dtype='float32').copy()
+        if nbytes_ptr[0] > 0:
+            _pulse._pa_stream_drop(recorder.stream)
+            recorded_frames += nbytes_ptr[0] // (4 * recorder.channels)
+
+
+def measure_lock(speaker, microphone, samplerate, channels, blocksize, duration):
+    """Measure playing and recording `duration` seconds of audio, locked per block and per call.
+
+    The per-block cases run the actual `_Player.play` and
+    `_Recorder.record`, the per-call cases run the same loops as they
+    were before batching, with one lock acquisition per pulseaudio call.
+
+    """
+    block = numpy.random.uniform(-0.1, 0.1, [blocksize, channels]).astype('float32')
+    numblocks = max(1, int(duration * samplerate / blocksize))
+    audio_time = numblocks * blocksize / samplerate
+    metrics = {}
+    with speaker.player(samplerate, channels=channels, blocksize=blocksize) as player:
+        for method, process in [('batched', lambda: player.play(block)),
+                                ('separate', lambda: _play_per_call(player, block))]:
+            wall_time, cpu_time, _ = _run_blocks(process, numblocks)
+            metrics[('play', method)] = dict(time_per_block=wall_time / numblocks,
+                                             cpu_per_audio_second=cpu_time / audio_time)
+    with microphone.recorder(samplerate, channels=channels, blocksize=blocksize) as recorder:
+        for method, process in [('batched', lambda: recorder.record(blocksize)),
+                                ('separate', lambda: _record_per_call(recorder, blocksize))]:
+            recorder.flush()
+            wall_time, cpu_time, _ = _run_blocks(process, numblocks)
+            metrics[('record', method)] = dict(time_per_block=wall_time / numblocks,
+                                               cpu_per_audio_second=cpu_time / audio_time)
+    return metrics
+
+
+def bench_lock(args):
+    speaker, microphone = _loopback_devices(args.speaker)
+    results = []
+    for blocksize in args.blocksizes:
+        metrics = measure_lock(speaker, microphone, args.samplerate, args.channels,
+                               blocksize, args.duration)
+        for (direction, method), values in metrics.items():
+            results.append(dict(case='{} {} blocksize={}'.format(direction, method, blocksize),
+                                direction=direction, method=method, blocksize=blocksize,
+                                **values))
+        for direction in ['play', 'record']:
+            separate = metrics[(direction, 'separate')]['cpu_per_audio_second']
+            batched = metrics[(direction, 'batched')]['cpu_per_audio_second']
+            print('{:<6} blocksize {:>5}: {:.4f} s CPU per s audio separately, {:.4f} s batched'
+                  .format(direction, blocksize, separate, batched),
+                  file=sys.stderr)
+    return dict(speaker=speaker.id, microphone=microphone.id, samplerate=args.samplerate,
+                channels=args.channels, duration=args.duration, results=results)
+
+
+def measure_calls(call, iterations):
+    """Wall time and CPU time per call of `call()`."""
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    for _ in range(iterations):
+        call()
+    return dict(wall_time_per_call=(time.perf_counter() - start_wall) / iterations,
+                cpu_time_per_call=(time.process_time() - start_cpu) / iterations)
+
+
+def bench_simple(args):
+    speaker, microphone = _loopback_devices(args.speaker)
+    results = []
+    for blocksize in args.blocksizes:
+        block = numpy.zeros([blocksize, args.channels], dtype='float32')
+        for simple in [False, True]:
+            method = 'simple' if simple else 'mainloop'
+            calls = [('play', lambda: speaker.play(block, args.samplerate, channels=args.channels,
+                                                   blocksize=blocksize, simple=simple)),
+                     ('record', lambda: microphone.record(blocksize, args.samplerate,
+                                                          channels=args.channels,
+                                                          blocksize=blocksize, simple=simple))]
+            for direction, call in calls:
+                metrics = measure_calls(call, args.iterations)
+                results.append(dict(case='{} {} blocksize={}'.format(direction, method, blocksize),
+                                    direction=direction, method=method, blocksize=blocksize,
+                                    **metrics))
+                print('{:<6} {:<8} blocksize {:>5}: {:.2f} ms per call, {:.2f} ms CPU'
+                      .format(direction, method, blocksize, 1000 * metrics['wall_time_per_call'],
+                              1000 * metrics['cpu_time_per_call']),
+                      file=sys.stderr)
+    return dict(speaker=speaker.id, microphone=microphone.id, samplerate=args.samplerate,
+                channels=args.channels, iterations=args.iterations, results=results)
+
+
+def compare(result, baseline):
+    """Compare benchmark results against a baseline.
+
+    Returns a dict of cases, each with the relative change of every
+    numeric result that is present in both. A value of ``0.1`` means
+    that the new result is 10% larger than the baseline.
+
+    """
+    baseline_cases = {r['case']: r for r in baseline['results']}
+    comparison = {}
+    for new in result['results']:
+        old = baseline_cases.get(new['case'])
+        if old is None:
+            continue
+        old_values = dict(_numeric_items(old))
+        changes = {}
+        for key, value in _numeric_items(new):
+            old_value = old_values.get(key)
+            # parameters such as the blocksize never change:
+            if old_value and value != old_value:
+                changes[key] = (value - old_value) / old_value
+        comparison[new['case']] = changes
+    return comparison
+
+
+def _numeric_items(result, prefix=''):
+    """All numeric values of a (nested) result dict, with dotted keys."""
+    for key, value in result.items():
+        if isinstance(value, dict):
+            yield from _numeric_items(value, prefix + key + '.')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield prefix + key, value
+
+
+_benchmarks = {
+    'latency': bench_latency,
+    'throughput': bench_throughput,
+    'streams': bench_streams,
+    'mixer': bench_mixer,
+    'import': bench_import,
+    'lock': bench_lock,
+    'simple': bench_simple,
+}
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m soundcard.bench',
+                                     description='Benchmarks for SoundCard.')
+    parser.add_argument('benchmark', choices=sorted(_benchmarks))
+    parser.add_argument('--speaker', default='Null',
+                        help='loopback speaker to play into (default: %(default)s)')
+    parser.add_argument('--samplerate', type=int, default=48000)
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--channel-counts', type=int, nargs='+', default=[1, 2, 6])
+    parser.add_argument('--blocksizes', type=int, nargs='+', default=[64, 128, 256, 512, 1024, 2048])
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=2.0,
+                        help='seconds of audio per throughput measurement')
+    parser.add_argument('--iterations', type=int, default=50,
+                        help='number of streams to open in the streams and simple benchmarks')
+    parser.add_argument('--voices', type=int, nargs='+', default=[10, 100],
+                        help='numbers of overlapping sounds in the mixer benchmark')
+    parser.add_argument('--output', help='write results to this file instead of stdout')
+    parser.add_argument('--save-baseline', metavar='FILE',
+                        help='store the results as a baseline in this file')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare the results against the baseline in this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    result = _benchmarks[args.benchmark](args)
+    result = dict(benchmark=args.benchmark,
+                  timestamp=time.time(),
+                  environment=_environment(),
+                  **result)
+    if args.baseline:
+        with open(args.baseline, 'rt') as f:
+            result['comparison'] = compare(result, json.load(f))
+        for case, changes in result['comparison'].items():
+            print('{}: {}'.format(case, ', '.join('{} {:+.1%}'.format(key, change)
+                                                  for key, change in sorted(changes.items()))),
+                  file=sys.stderr)
+    if args.save_baseline:
+        with open(args.save_baseline, 'wt') as f:
+            json.dump(result, f, indent=2)
+    if args.output:
+        with open(args.output, 'wt') as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
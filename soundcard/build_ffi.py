@@ -0,0 +1,78 @@
+"""Generate precompiled cffi declarations for the pulseaudio backend.
+
+By default, :mod:`soundcard.pulseaudio` parses ``pulseaudio.py.h``
+with ``cffi.FFI.cdef`` on every import. Running::
+
+    python -m soundcard.build_ffi
+
+(or ``python soundcard/build_ffi.py``, which does not import
+:mod:`soundcard` and therefore works without a sound server) writes
+an out-of-line ABI-mode module ``_pulseaudio_ffi.py`` next to
+``pulseaudio.py``, which contains the already parsed declarations.
+No C compiler is needed, neither for generating the module nor at
+runtime. If the module is present and was generated from the current
+``pulseaudio.py.h``, it is used instead of parsing the header.
+Otherwise, the header is parsed as before.
+
+Use ``python -m soundcard.bench import`` to compare the import time of
+both variants.
+
+"""
+
+import argparse
+import hashlib
+import os
+
+import cffi
+
+_package_dir = os.path.dirname(os.path.abspath(__file__))
+_header = os.path.join(_package_dir, 'pulseaudio.py.h')
+_module_name = 'soundcard._pulseaudio_ffi'
+
+
+def header_hash(filename=_header):
+    """Return the SHA-1 hex digest of a header file."""
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def build(output_dir=None):
+    """Generate the precompiled declarations.
+
+    Parameters
+    ----------
+    output_dir : str, optional
+        The module is written to ``output_dir/soundcard/``. Defaults
+        to the directory that contains the ``soundcard`` package, so
+        the module is written into the package itself.
+
+    Returns
+    -------
+    filename : str
+        The file name of the generated module.
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(_package_dir)
+    ffibuilder = cffi.FFI()
+    with open(_header, 'rt') as f:
+        ffibuilder.cdef(f.read())
+    ffibuilder.set_source(_module_name, None)
+    filename = ffibuilder.compile(tmpdir=output_dir)
+    # record which header the module was generated from, so that a
+    # stale module is not used after the header changed:
+    with open(filename, 'at') as f:
+        f.write("\nheader_hash = '{}'\n".format(header_hash()))
+    return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m soundcard.build_ffi',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('--output-dir', default=None,
+                        help='write the module to OUTPUT_DIR/soundcard/ instead of the package')
+    args = parser.parse_args()
+    print(build(args.output_dir))
+
+
+if __name__ == '__main__':
+    main()
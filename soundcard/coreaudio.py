@@ -17,6 +17,7 @@ _ca = _ffi.dlopen('CoreAudio')
 _au = _ffi.dlopen('AudioUnit')
 
 from soundcard import coreaudioconstants as _cac
+from soundcard.shared import _SharedRecorderMixin
 
 
 def all_speakers():
@@ -177,7 +178,7 @@ class _Speaker(_Soundcard):
             p.play(data)
 
 
-class _Microphone(_Soundcard):
+class _Microphone(_Soundcard, _SharedRecorderMixin):
     """A soundcard input. Can be used to record audio.
 
     Use the `record` method to record a piece of audio, or use the
@@ -0,0 +1,853 @@
+"""JACK backend.
+
+Select this backend by setting the environment variable
+``SOUNDCARD_BACKEND=jack`` before importing :mod:`soundcard`.
+
+Devices are JACK clients, identified by their client name, such as
+``'system'``, and their audio ports are the channels of the device.
+Speakers are clients with audio input ports, microphones are clients
+with physical audio output ports. The audio output ports of other
+applications can be recorded as loopback microphones.
+
+Every player and recorder is a JACK client of its own, whose ports are
+connected to the ports of the device. Audio is handed between Python
+and the JACK process callback through lock-free JACK ringbuffers.
+JACK does not resample, so streams must use the sample rate of the
+JACK server.
+
+"""
+
+import os
+import re
+import time
+import atexit
+import threading
+
+import cffi
+import numpy
+
+from soundcard.shared import _SharedRecorderMixin
+
+_ffi = cffi.FFI()
+_package_dir, _ = os.path.split(__file__)
+with open(os.path.join(_package_dir, 'jack.py.h'), 'rt') as f:
+    _ffi.cdef(f.read())
+
+try:
+    _jack = _ffi.dlopen('jack')
+except OSError:
+    # Try explicit file name, if the general does not work (e.g. on nixos)
+    _jack = _ffi.dlopen('libjack.so.0')
+
+_audio_port_type = b'32 bit float mono audio'
+
+
+def _open_client(name):
+    """Open a JACK client, without starting a JACK server."""
+    status = _ffi.new("jack_status_t*")
+    client = _jack.jack_client_open(name.encode(), _jack.JackNoStartServer, status)
+    if client == _ffi.NULL:
+        raise RuntimeError('Connecting to the JACK server failed with status {:#x}'.format(status[0]))
+    return client
+
+
+class _JackClient:
+    """Proxy for communication with the JACK server.
+
+    This holds an inactive JACK client, which is used to list the
+    ports of the other clients. Players and recorders open clients of
+    their own.
+
+    """
+
+    def __init__(self):
+        self.name = self._infer_program_name()
+        self.client = _open_client(self.name)
+        self._own_clients = {_ffi.string(_jack.jack_get_client_name(self.client)).decode()}
+        # notified after every process cycle of any stream, and when a stream fails:
+        self.readiness = threading.Condition()
+
+    @staticmethod
+    def _infer_program_name():
+        import sys
+        return os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+    @property
+    def samplerate(self):
+        """int : The sample rate of the JACK server."""
+        return _jack.jack_get_sample_rate(self.client)
+
+    def ports(self, flags, client_name=None):
+        """List the names of all audio ports with the given flags.
+
+        If `client_name` is given, list only the ports of this client.
+
+        """
+        pattern = b'^' + re.escape(client_name).encode() + b':' if client_name else _ffi.NULL
+        names = _jack.jack_get_ports(self.client, pattern, _audio_port_type, flags)
+        if names == _ffi.NULL:
+            return []
+        ports = []
+        idx = 0
+        while names[idx] != _ffi.NULL:
+            ports.append(_ffi.string(names[idx]).decode())
+            idx += 1
+        _jack.jack_free(names)
+        return ports
+
+    def clients(self, flags):
+        """List the names of all other clients with audio ports of the given flags."""
+        clients = []
+        for port in self.ports(flags):
+            client_name = port.split(':', 1)[0]
+            if client_name not in clients and client_name not in self._own_clients:
+                clients.append(client_name)
+        return clients
+
+    def _shutdown(self):
+        _jack.jack_client_close(self.client)
+
+_jack_client = _JackClient()
+atexit.register(_jack_client._shutdown)
+
+
+def all_speakers():
+    """A list of all connected speakers.
+
+    Returns
+    -------
+    speakers : list(_Speaker)
+
+    """
+    return [_Speaker(id=name) for name in _jack_client.clients(_jack.JackPortIsInput)]
+
+
+def default_speaker():
+    """The default speaker of the system.
+
+    This is the first client with physical playback ports, usually
+    ``'system'``.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    clients = _jack_client.clients(_jack.JackPortIsInput | _jack.JackPortIsPhysical)
+    if not clients:
+        raise RuntimeError('there is no default speaker')
+    return _Speaker(id=clients[0])
+
+
+def get_speaker(id):
+    """Get a specific speaker by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be a JACK client name, a substring of the speaker name, or
+        a fuzzy-matched pattern for the speaker name.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    return _match_device(id, all_speakers())
+
+
+def all_microphones(include_loopback=False):
+    """A list of all connected microphones.
+
+    By default, this does not include loopbacks (the audio outputs of
+    other applications).
+
+    Parameters
+    ----------
+    include_loopback : bool
+        allow recording of other applications
+
+    Returns
+    -------
+    microphones : list(_Microphone)
+
+    """
+    flags = _jack.JackPortIsOutput
+    if not include_loopback:
+        flags |= _jack.JackPortIsPhysical
+    return [_Microphone(id=name) for name in _jack_client.clients(flags)]
+
+
+def default_microphone():
+    """The default microphone of the system.
+
+    This is the first client with physical capture ports, usually
+    ``'system'``.
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    clients = _jack_client.clients(_jack.JackPortIsOutput | _jack.JackPortIsPhysical)
+    if not clients:
+        raise RuntimeError('there is no default microphone')
+    return _Microphone(id=clients[0])
+
+
+def get_microphone(id, include_loopback=False):
+    """Get a specific microphone by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be a JACK client name, a substring of the microphone name,
+        or a fuzzy-matched pattern for the microphone name.
+    include_loopback : bool
+        allow recording of other applications
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    return _match_device(id, all_microphones(include_loopback))
+
+
+def _match_device(id, devices):
+    """Find id in a list of devices.
+
+    id can be a JACK client name, a substring of the device name, or
+    a fuzzy-matched pattern for the device name.
+
+    """
+    devices_by_id = {device.id: device for device in devices}
+    devices_by_name = {device.name: device for device in devices}
+    if id in devices_by_id:
+        return devices_by_id[id]
+    # try substring match:
+    for name, device in devices_by_name.items():
+        if id in name:
+            return device
+    # try fuzzy match:
+    pattern = '.*'.join(id)
+    for name, device in devices_by_name.items():
+        if re.match(pattern, name):
+            return device
+    raise IndexError('no device with id {}'.format(id))
+
+
+def get_name():
+    """Get application name.
+
+    Returns
+    -------
+    name : str
+    """
+    return _jack_client.name
+
+
+def set_name(name):
+    """Set application name.
+
+    The name applies to the JACK clients of all streams that are
+    opened afterwards.
+
+    Parameters
+    ----------
+    name :  str
+        The application using the soundcard
+        will be identified by the OS using this name.
+    """
+    _jack_client.name = name
+
+
+def wait(streams, timeout=None):
+    """Wait until any of several streams can be read or written.
+
+    This lets a single thread serve many players and recorders. A
+    recorder is ready if :attr:`readable_frames` is not zero, and a
+    player is ready if :attr:`writable_frames` is not zero. Failed
+    streams are ready as well, so that reading or writing them raises
+    an error.
+
+    Parameters
+    ----------
+    streams : list(_Player or _Recorder)
+        The streams to wait for.
+    timeout : float, optional
+        The maximum time to wait in seconds. Waits forever if None.
+
+    Returns
+    -------
+    ready : list(_Player or _Recorder)
+        The streams that are ready, or an empty list after a timeout.
+
+    """
+    with _jack_client.readiness:
+        _jack_client.readiness.wait_for(lambda: any(stream._is_ready() for stream in streams), timeout)
+    return [stream for stream in streams if stream._is_ready()]
+
+
+class _SoundCard:
+    def __init__(self, *, id):
+        self._id = id
+
+    @property
+    def channels(self):
+        """int : The number of audio ports of the device."""
+        return len(self._ports())
+
+    @property
+    def id(self):
+        """str : The JACK client name."""
+        return self._id
+
+    @property
+    def name(self):
+        """str : The human-readable name of the soundcard."""
+        return self._id
+
+    def _ports(self):
+        return _jack_client.ports(self._port_flags, self._id)
+
+
+class _Speaker(_SoundCard):
+    """A soundcard output. Can be used to play audio.
+
+    Use the :func:`play` method to play one piece of audio, or use the
+    :func:`player` method to get a context manager for playing continuous
+    audio.
+
+    """
+
+    _port_flags = _jack.JackPortIsInput
+
+    def __repr__(self):
+        return '<Speaker {} ({} channels)>'.format(self.name, self.channels)
+
+    def player(self, samplerate, channels=None, blocksize=None):
+        """Create Player for playing audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz. Must be the sample rate
+            of the JACK server.
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. The JACK period is
+            set by the server; this only sizes the ringbuffer.
+
+        Returns
+        -------
+        player : _Player
+        """
+        if channels is None:
+            channels = self.channels
+        return _Player(self._ports(), samplerate, channels, blocksize)
+
+    def play(self, data, samplerate, channels=None, blocksize=None):
+        """Play some audio data.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+        samplerate : int
+            The desired sampling rate in Hz. Must be the sample rate
+            of the JACK server.
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. The JACK period is
+            set by the server; this only sizes the ringbuffer.
+        """
+        with self.player(samplerate, channels, blocksize) as p:
+            p.play(data)
+
+
+class _Microphone(_SoundCard, _SharedRecorderMixin):
+    """A soundcard input. Can be used to record audio.
+
+    Use the :func:`record` method to record one piece of audio, or use
+    the :func:`recorder` method to get a context manager for recording
+    continuous audio.
+
+    """
+
+    _port_flags = _jack.JackPortIsOutput
+
+    def __repr__(self):
+        if self.isloopback:
+            return '<Loopback {} ({} channels)>'.format(self.name, self.channels)
+        else:
+            return '<Microphone {} ({} channels)>'.format(self.name, self.channels)
+
+    @property
+    def isloopback(self):
+        """bool : Whether this microphone records another application."""
+        return not _jack_client.ports(_jack.JackPortIsOutput | _jack.JackPortIsPhysical, self._id)
+
+    def recorder(self, samplerate, channels=None, blocksize=None):
+        """Create Recorder for recording audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz. Must be the sample rate
+            of the JACK server.
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. The JACK period
+            is set by the server; this only sizes the ringbuffer.
+
+        Returns
+        -------
+        recorder : _Recorder
+        """
+        if channels is None:
+            channels = self.channels
+        return _Recorder(self._ports(), samplerate, channels, blocksize)
+
+    def record(self, numframes, samplerate, channels=None, blocksize=None):
+        """Record some audio data.
+
+        Parameters
+        ----------
+        numframes: int
+            The number of frames to record.
+        samplerate : int
+            The desired sampling rate in Hz. Must be the sample rate
+            of the JACK server.
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. The JACK period
+            is set by the server; this only sizes the ringbuffer.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+        """
+        with self.recorder(samplerate, channels, blocksize) as r:
+            return r.record(numframes)
+
+
+class _Stream:
+    """A context manager for an active JACK client.
+
+    This class is meant to be subclassed. Children must implement the
+    `_process` method, which is called from the JACK process thread,
+    and set `_port_flags` to the flags of their own ports and
+    `_connect_ports` to connect them.
+
+    Audio data is exchanged with the process callback through a JACK
+    ringbuffer of interleaved float32 frames, which needs no locking
+    between one reader and one writer.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, device_ports, samplerate, channels, blocksize=None):
+        if isinstance(channels, int):
+            channelmap = list(range(channels))
+        else:
+            channelmap = list(channels)
+        if any(not isinstance(ch, int) or ch < 0 or ch >= len(device_ports) for ch in channelmap):
+            raise TypeError('channels must be a number of channels or a list of channel indices '
+                            'of the {} available channels'.format(len(device_ports)))
+        self._device_ports = [device_ports[ch] for ch in channelmap]
+        self._samplerate = samplerate
+        self.channels = len(channelmap)
+        self._framesize = 4 * self.channels
+        self._blocksize = blocksize
+        self._xruns = 0
+        self._error = None
+        self._processed = threading.Event()
+
+    def __enter__(self):
+        self._client = _open_client(_jack_client.name)
+        client_name = _ffi.string(_jack.jack_get_client_name(self._client)).decode()
+        _jack_client._own_clients.add(client_name)
+        if _jack.jack_get_sample_rate(self._client) != self._samplerate:
+            samplerate = _jack.jack_get_sample_rate(self._client)
+            self._close_client()
+            raise RuntimeError('JACK runs at {} Hz and can not play or record at {} Hz'
+                               .format(samplerate, self._samplerate))
+        buffer_size = _jack.jack_get_buffer_size(self._client)
+        # a ringbuffer of at least four periods, whose size is a power of two:
+        ringbuffer_frames = 4 * max(buffer_size, self._blocksize or 0)
+        self._ringbuffer = _jack.jack_ringbuffer_create(ringbuffer_frames * self._framesize)
+        _jack.jack_ringbuffer_mlock(self._ringbuffer)
+        self._allocate_scratch(buffer_size)
+
+        self._ports = []
+        for idx in range(self.channels):
+            port = _jack.jack_port_register(self._client, '{}_{}'.format(self._port_prefix, idx+1).encode(),
+                                            _audio_port_type, self._port_flags, 0)
+            if port == _ffi.NULL:
+                self._close_client()
+                raise RuntimeError('Registering JACK port {} failed'.format(idx+1))
+            self._ports.append(port)
+
+        @_ffi.callback("JackProcessCallback")
+        def process(nframes, arg):
+            if nframes > len(self._scratch):
+                self._allocate_scratch(nframes)
+            self._process(nframes)
+            self._processed.set()
+            self._notify_readiness()
+            return 0
+        @_ffi.callback("JackXRunCallback")
+        def xrun(arg):
+            self._xruns += 1
+            return 0
+        @_ffi.callback("JackShutdownCallback")
+        def shutdown(arg):
+            self._error = 'the JACK server shut down'
+            self._processed.set()
+            self._notify_readiness()
+        self._callbacks = [process, xrun, shutdown]
+        _jack.jack_set_process_callback(self._client, process, _ffi.NULL)
+        _jack.jack_set_xrun_callback(self._client, xrun, _ffi.NULL)
+        _jack.jack_on_shutdown(self._client, shutdown, _ffi.NULL)
+
+        if _jack.jack_activate(self._client) != 0:
+            self._close_client()
+            raise RuntimeError('Activating the JACK client failed')
+        for port, device_port in zip(self._ports, self._device_ports):
+            self._connect_ports(_ffi.string(_jack.jack_port_name(port)), device_port.encode())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _jack.jack_deactivate(self._client)
+        self._close_client()
+
+    def _close_client(self):
+        _jack_client._own_clients.discard(_ffi.string(_jack.jack_get_client_name(self._client)).decode())
+        _jack.jack_client_close(self._client)
+        if getattr(self, '_ringbuffer', None) is not None:
+            _jack.jack_ringbuffer_free(self._ringbuffer)
+            self._ringbuffer = None
+
+    def _allocate_scratch(self, numframes):
+        """Allocate the interleaved buffer used by the process callback."""
+        self._scratch = numpy.zeros([numframes, self.channels], dtype='float32')
+        self._scratch_pointer = _ffi.from_buffer('char[]', self._scratch)
+
+    def _port_buffer(self, port, nframes):
+        """The samples of a port in the current process cycle."""
+        buffer = _ffi.buffer(_jack.jack_port_get_buffer(port, nframes), nframes * 4)
+        return numpy.frombuffer(buffer, dtype='float32')
+
+    def _notify_readiness(self):
+        with _jack_client.readiness:
+            _jack_client.readiness.notify_all()
+
+    def _failed(self):
+        return self._error is not None
+
+    def _wait(self, timeout=None):
+        """Wait for the next process cycle, for at most `timeout` seconds.
+
+        Returns False if the timeout passed first.
+
+        """
+        wait_timeout = 1 if timeout is None else min(timeout, 1)
+        processed = self._processed.wait(timeout=wait_timeout)
+        # no cycle for a whole second means that the server is stuck:
+        if not processed and wait_timeout >= 1 and self._error is None:
+            self._error = 'the JACK server stopped processing'
+        self._processed.clear()
+        if self._error is not None:
+            raise RuntimeError('JACK stream failed: {}'.format(self._error))
+        return processed
+
+    @property
+    def xruns(self):
+        """int : The number of xruns reported by the JACK server."""
+        return self._xruns
+
+
+class _Player(_Stream):
+    """A context manager for an active output stream.
+
+    Audio playback is available as soon as the context manager is
+    entered. Audio data can be played using the :func:`play` method.
+    Successive calls to :func:`play` will queue up the audio one piece
+    after another. If no audio is queued up, this will play silence.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    _port_flags = _jack.JackPortIsOutput
+    _port_prefix = 'out'
+
+    def __init__(self, *args, **kwargs):
+        super(_Player, self).__init__(*args, **kwargs)
+        self._underflows = 0
+
+    def _connect_ports(self, own_port, device_port):
+        _jack.jack_connect(self._client, own_port, device_port)
+
+    @property
+    def underflows(self):
+        """int : The number of periods that were played without enough data."""
+        return self._underflows
+
+    @property
+    def writable_frames(self):
+        """int : The number of frames that can be played without blocking.
+
+        Use :func:`wait` to wait until any of several players can be
+        written to.
+
+        """
+        return _jack.jack_ringbuffer_write_space(self._ringbuffer) // self._framesize
+
+    def _is_ready(self):
+        return self.writable_frames > 0 or self._failed()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self._error is None:
+            while _jack.jack_ringbuffer_read_space(self._ringbuffer) > 0:
+                self._wait()
+            # the last period has been handed to the ports, and is
+            # played during the next one:
+            self._wait()
+        super(_Player, self).__exit__(exc_type, exc_value, traceback)
+
+    def _process(self, nframes):
+        available = _jack.jack_ringbuffer_read_space(self._ringbuffer)
+        numbytes = min(nframes * self._framesize, available - available % self._framesize)
+        numframes = _jack.jack_ringbuffer_read(self._ringbuffer, self._scratch_pointer, numbytes) // self._framesize
+        scratch = self._scratch[:nframes]
+        if numframes < nframes:
+            scratch[numframes:] = 0
+            if numframes > 0:
+                self._underflows += 1
+        for idx, port in enumerate(self._ports):
+            self._port_buffer(port, nframes)[:] = scratch[:, idx]
+
+    def play(self, data):
+        """Play some audio data.
+
+        Internally, all data is handled as ``float32`` and with the
+        appropriate number of channels. For maximum performance,
+        provide data as a *frames × channels* float32 numpy array.
+
+        If single-channel or one-dimensional data is given, this data
+        will be played on all available channels.
+
+        This function will return *before* all data has been played,
+        so that additional data can be provided for gapless playback.
+        It blocks while the ringbuffer is full.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+
+        """
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        if data.shape[1] == 1 and self.channels != 1:
+            data = numpy.tile(data, [1, self.channels])
+        if data.shape[1] != self.channels:
+            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        while len(data) > 0:
+            writable_frames = _jack.jack_ringbuffer_write_space(self._ringbuffer) // self._framesize
+            if writable_frames == 0:
+                self._wait()
+                continue
+            block = data[:writable_frames]
+            _jack.jack_ringbuffer_write(self._ringbuffer, _ffi.from_buffer(block), len(block) * self._framesize)
+            data = data[writable_frames:]
+
+
+class _Recorder(_Stream):
+    """A context manager for an active input stream.
+
+    Audio recording is available as soon as the context manager is
+    entered. Recorded audio data can be read using the :func:`record`
+    method. If no audio data is available, :func:`record` will block until
+    the requested amount of audio data has been recorded.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    _port_flags = _jack.JackPortIsInput
+    _port_prefix = 'in'
+
+    def __init__(self, *args, **kwargs):
+        super(_Recorder, self).__init__(*args, **kwargs)
+        self._overflows = 0
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+
+    def _connect_ports(self, own_port, device_port):
+        _jack.jack_connect(self._client, device_port, own_port)
+
+    @property
+    def overflows(self):
+        """int : The number of periods that were dropped because the ringbuffer was full."""
+        return self._overflows
+
+    def _process(self, nframes):
+        scratch = self._scratch[:nframes]
+        for idx, port in enumerate(self._ports):
+            scratch[:, idx] = self._port_buffer(port, nframes)
+        writable = _jack.jack_ringbuffer_write_space(self._ringbuffer)
+        numbytes = min(nframes * self._framesize, writable - writable % self._framesize)
+        if numbytes < nframes * self._framesize:
+            self._overflows += 1
+        _jack.jack_ringbuffer_write(self._ringbuffer, self._scratch_pointer, numbytes)
+
+    @property
+    def readable_frames(self):
+        """int : The number of frames that can be recorded without blocking.
+
+        This includes frames that are pending from previous calls to
+        :func:`record`. Use :func:`wait` to wait until any of several
+        recorders can be read from.
+
+        """
+        return (len(self._pending_chunk) +
+                _jack.jack_ringbuffer_read_space(self._ringbuffer) // self._framesize)
+
+    def _is_ready(self):
+        return self.readable_frames > 0 or self._failed()
+
+    def _record_chunk(self, timeout=None):
+        """Record all audio data that is available in the ringbuffer.
+
+        If no data arrives within `timeout` seconds, returns None.
+
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            readable_frames = _jack.jack_ringbuffer_read_space(self._ringbuffer) // self._framesize
+            if readable_frames > 0:
+                break
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+            self._wait(remaining)
+        chunk = numpy.empty([readable_frames, self.channels], dtype='float32')
+        _jack.jack_ringbuffer_read(self._ringbuffer, _ffi.from_buffer('char[]', chunk),
+                                   readable_frames * self._framesize)
+        return chunk
+
+    def record(self, numframes=None, timeout=None):
+        """Record a block of audio data.
+
+        The data will be returned as a *frames × channels* float32
+        numpy array. This function will wait until ``numframes``
+        frames have been recorded. If numframes is given, it will
+        return exactly ``numframes`` frames, and buffer the rest for
+        later.
+
+        If ``numframes`` is None, it will return whatever the audio
+        backend has available right now.
+
+        If ``timeout`` is given, and not enough data arrives in time,
+        this raises a `TimeoutError`. All data recorded so far is kept
+        for the next call, or can be retrieved with
+        :func:`record_nowait` or :func:`flush`.
+
+        Parameters
+        ----------
+        numframes : int, optional
+            The number of frames to record.
+        timeout : float, optional
+            The maximum time to wait in seconds.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        def remaining():
+            return max(0, deadline - time.monotonic()) if deadline is not None else None
+        if numframes is None:
+            chunk = self._record_chunk(remaining())
+            if chunk is None:
+                raise TimeoutError('no audio data was recorded within {} seconds'.format(timeout))
+            blocks = [self.flush(), chunk]
+        else:
+            blocks = [self._pending_chunk]
+            self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+            recorded_frames = len(blocks[0])
+            while recorded_frames < numframes:
+                block = self._record_chunk(remaining())
+                if block is None:
+                    # keep everything for the next call:
+                    self._pending_chunk = numpy.concatenate(blocks, axis=0)
+                    raise TimeoutError('only {} of {} frames were recorded within {} seconds'
+                                       .format(recorded_frames, numframes, timeout))
+                blocks.append(block)
+                recorded_frames += len(block)
+            if recorded_frames > numframes:
+                to_split = -(recorded_frames-numframes)
+                blocks[-1], self._pending_chunk = numpy.split(blocks[-1], [to_split])
+        return numpy.concatenate(blocks, axis=0)
+
+    def record_nowait(self):
+        """Record all audio data that is available right now.
+
+        This never blocks. It returns the pending chunk and all data
+        the JACK server has delivered so far, which might be no data at all.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        blocks = [self.flush()]
+        while True:
+            chunk = self._record_chunk(timeout=0)
+            if chunk is None:
+                break
+            blocks.append(chunk)
+        return numpy.concatenate(blocks, axis=0)
+
+    def flush(self):
+        """Return the last pending chunk.
+
+        After using the :func:`record` method, this will return the
+        last incomplete chunk and delete it.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        last_chunk = self._pending_chunk
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+        return last_chunk
@@ -0,0 +1,82 @@
+// from jack/types.h
+
+typedef uint32_t jack_nframes_t;
+typedef struct _jack_client jack_client_t;
+typedef struct _jack_port jack_port_t;
+typedef float jack_default_audio_sample_t;
+
+typedef enum JackOptions {
+    JackNullOption = 0x00,
+    JackNoStartServer = 0x01,
+    JackUseExactName = 0x02,
+    JackServerName = 0x04,
+    JackLoadName = 0x08,
+    JackLoadInit = 0x10,
+    JackSessionID = 0x20
+} jack_options_t;
+
+typedef enum JackStatus {
+    JackFailure = 0x01,
+    JackInvalidOption = 0x02,
+    JackNameNotUnique = 0x04,
+    JackServerStarted = 0x08,
+    JackServerFailed = 0x10,
+    JackServerError = 0x20,
+    JackNoSuchClient = 0x40,
+    JackLoadFailure = 0x80,
+    JackInitFailure = 0x100,
+    JackShmFailure = 0x200,
+    JackVersionError = 0x400,
+    JackBackendError = 0x800,
+    JackClientZombie = 0x1000
+} jack_status_t;
+
+enum JackPortFlags {
+    JackPortIsInput = 0x1,
+    JackPortIsOutput = 0x2,
+    JackPortIsPhysical = 0x4,
+    JackPortCanMonitor = 0x8,
+    JackPortIsTerminal = 0x10
+};
+
+typedef int (*JackProcessCallback)(jack_nframes_t nframes, void *arg);
+typedef int (*JackXRunCallback)(void *arg);
+typedef void (*JackShutdownCallback)(void *arg);
+
+// from jack/jack.h
+
+jack_client_t *jack_client_open(const char *client_name, jack_options_t options, jack_status_t *status, ...);
+int jack_client_close(jack_client_t *client);
+char *jack_get_client_name(jack_client_t *client);
+int jack_activate(jack_client_t *client);
+int jack_deactivate(jack_client_t *client);
+
+int jack_set_process_callback(jack_client_t *client, JackProcessCallback process_callback, void *arg);
+int jack_set_xrun_callback(jack_client_t *client, JackXRunCallback xrun_callback, void *arg);
+void jack_on_shutdown(jack_client_t *client, JackShutdownCallback function, void *arg);
+
+jack_nframes_t jack_get_sample_rate(jack_client_t *client);
+jack_nframes_t jack_get_buffer_size(jack_client_t *client);
+
+jack_port_t *jack_port_register(jack_client_t *client, const char *port_name, const char *port_type, unsigned long flags, unsigned long buffer_size);
+int jack_port_unregister(jack_client_t *client, jack_port_t *port);
+void *jack_port_get_buffer(jack_port_t *port, jack_nframes_t nframes);
+const char *jack_port_name(const jack_port_t *port);
+int jack_port_flags(const jack_port_t *port);
+jack_port_t *jack_port_by_name(jack_client_t *client, const char *port_name);
+const char **jack_get_ports(jack_client_t *client, const char *port_name_pattern, const char *type_name_pattern, unsigned long flags);
+int jack_connect(jack_client_t *client, const char *source_port, const char *destination_port);
+
+void jack_free(void *ptr);
+
+// from jack/ringbuffer.h
+
+typedef struct _jack_ringbuffer jack_ringbuffer_t;
+
+jack_ringbuffer_t *jack_ringbuffer_create(size_t sz);
+void jack_ringbuffer_free(jack_ringbuffer_t *rb);
+int jack_ringbuffer_mlock(jack_ringbuffer_t *rb);
+size_t jack_ringbuffer_read(jack_ringbuffer_t *rb, char *dest, size_t cnt);
+size_t jack_ringbuffer_write(jack_ringbuffer_t *rb, const char *src, size_t cnt);
+size_t jack_ringbuffer_read_space(const jack_ringbuffer_t *rb);
+size_t jack_ringbuffer_write_space(const jack_ringbuffer_t *rb);
@@ -11,6 +11,8 @@ import warnings
 
 import numpy
 
+from soundcard.shared import _SharedRecorderMixin
+
 _ffi = cffi.FFI()
 _package_dir, _ = os.path.split(__file__)
 with open(os.path.join(_package_dir, 'mediafoundation.py.h'), 'rt') as f:
@@ -448,7 +450,7 @@ class _Speaker(_Device):
             p.play(data)
 
 
-class _Microphone(_Device):
+class _Microphone(_Device, _SharedRecorderMixin):
     """A soundcard input. Can be used to record audio.
 
     Use the `record` method to record one piece of audio, or use the
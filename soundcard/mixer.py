@@ -0,0 +1,152 @@
+import threading
+
+import numpy
+
+
+class Mixer:
+    """A context manager for playing many overlapping sounds at once.
+
+    Instead of opening one player for every sound, the mixer holds a
+    single player, and mixes all active sounds (voices) into it, one
+    block at a time. Voices can be submitted at any time with
+    :func:`submit`, and start playing at the next block, or at a given
+    offset after that.
+
+    Mixing happens in a background thread. Voices are scaled by their
+    gain when they are submitted, so mixing only adds them into a
+    preallocated block buffer. If no voices are active, the mixer
+    plays silence.
+
+    Parameters
+    ----------
+    speaker : _Speaker
+        The speaker to play on.
+    samplerate : int
+        The desired sampling rate in Hz
+    channels : {int, list(int)}, optional
+        Play on these channels. Defaults to use all available channels.
+    blocksize : int
+        Mix and play this many frames at a time. Since submitted
+        voices start at the next block, this determines the latency of
+        the mixer.
+
+    """
+
+    def __init__(self, speaker, samplerate, channels=None, blocksize=512):
+        self._speaker = speaker
+        self._samplerate = samplerate
+        self._channels = channels
+        self._blocksize = blocksize
+        self._voices = {}
+        self._next_voice = 0
+        self._position = 0 # in frames
+        self._lock = threading.Lock()
+        self._running = False
+        self._error = None
+
+    def __enter__(self):
+        channels = self._channels if self._channels is not None else self._speaker.channels
+        self.channels = channels if isinstance(channels, int) else len(channels)
+        self._player = self._speaker.player(self._samplerate, channels, self._blocksize)
+        self._player.__enter__()
+        self._buffer = numpy.zeros([self._blocksize, self.channels], dtype='float32')
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._running = False
+        self._thread.join()
+        self._player.__exit__(exc_type, exc_value, traceback)
+        self._raise_error()
+
+    def submit(self, data, offset=0, gain=1.0):
+        """Start playing a voice.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy
+            array. Single-channel or one-dimensional data is played on
+            all channels.
+        offset : int
+            Number of frames after the next block to start playing.
+        gain : float
+            Linear gain of the voice.
+
+        Returns
+        -------
+        voice : int
+            An identifier of the voice, for use with :func:`cancel`.
+
+        """
+        self._raise_error()
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        if data.shape[1] != 1 and data.shape[1] != self.channels:
+            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        if gain != 1.0:
+            data *= gain
+        with self._lock:
+            voice = self._next_voice
+            self._next_voice += 1
+            self._voices[voice] = (self._position + offset, data)
+        return voice
+
+    def cancel(self, voice):
+        """Stop playing a voice.
+
+        Parameters
+        ----------
+        voice : int
+            A voice identifier as returned by :func:`submit`.
+
+        """
+        with self._lock:
+            self._voices.pop(voice, None)
+
+    @property
+    def active_voices(self):
+        """int : The number of voices that are playing or waiting to play."""
+        return len(self._voices)
+
+    def _mix(self):
+        """Mix the next block of all active voices into the block buffer."""
+        buffer = self._buffer
+        buffer.fill(0)
+        block_start = self._position
+        block_end = block_start + self._blocksize
+        finished = []
+        with self._lock:
+            for voice, (start, data) in self._voices.items():
+                if start >= block_end:
+                    continue
+                source_start = max(block_start - start, 0)
+                target_start = max(start - block_start, 0)
+                numframes = min(self._blocksize - target_start, len(data) - source_start)
+                numpy.add(buffer[target_start:target_start+numframes],
+                          data[source_start:source_start+numframes],
+                          out=buffer[target_start:target_start+numframes])
+                if source_start + numframes >= len(data):
+                    finished.append(voice)
+            for voice in finished:
+                del self._voices[voice]
+            self._position = block_end
+        return buffer
+
+    def _run(self):
+        try:
+            while self._running:
+                # play copies the buffer, so it can be reused right away:
+                self._player.play(self._mix())
+        except Exception as error:
+            self._error = error
+            self._running = False
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError('mixing failed') from self._error
@@ -0,0 +1,1039 @@
+"""Native PipeWire backend.
+
+Select this backend by setting the environment variable
+``SOUNDCARD_BACKEND=pipewire`` before importing :mod:`soundcard`.
+
+Speakers and microphones are PipeWire nodes of media class
+``Audio/Sink`` and ``Audio/Source``, identified by their node name.
+Like on PulseAudio, every speaker can be recorded through a loopback
+microphone, whose id is the node name of the speaker followed by
+``.monitor``.
+
+Streams are PipeWire streams, which are processed in the PipeWire
+thread loop, without any protocol translation through
+pipewire-pulse.
+
+"""
+
+import os
+import re
+import json
+import atexit
+import time
+import struct
+import threading
+import collections
+
+import cffi
+import numpy
+
+from soundcard.shared import _SharedRecorderMixin
+
+_ffi = cffi.FFI()
+_package_dir, _ = os.path.split(__file__)
+with open(os.path.join(_package_dir, 'pipewire.py.h'), 'rt') as f:
+    _ffi.cdef(f.read())
+
+try:
+    _pw = _ffi.dlopen('pipewire-0.3')
+except OSError:
+    # Try explicit file name, if the general does not work (e.g. on nixos)
+    _pw = _ffi.dlopen('libpipewire-0.3.so.0')
+
+_pw.pw_init(_ffi.NULL, _ffi.NULL)
+
+# interface versions of pipewire/core.h and pipewire/extensions/metadata.h:
+_registry_version = 3
+_metadata_version = 3
+
+# constants of spa/utils/type.h, spa/param/param.h, spa/param/format.h,
+# and spa/param/audio/raw.h, for building the stream format:
+_SPA_TYPE_Id = 3
+_SPA_TYPE_Int = 4
+_SPA_TYPE_Object = 15
+_SPA_TYPE_OBJECT_Format = 0x40003
+_SPA_PARAM_EnumFormat = 3
+_SPA_FORMAT_mediaType = 1
+_SPA_FORMAT_mediaSubtype = 2
+_SPA_FORMAT_AUDIO_format = 0x10001
+_SPA_FORMAT_AUDIO_rate = 0x10003
+_SPA_FORMAT_AUDIO_channels = 0x10004
+_SPA_MEDIA_TYPE_audio = 1
+_SPA_MEDIA_SUBTYPE_raw = 1
+_SPA_AUDIO_FORMAT_F32_LE = 0x11b
+
+
+def _format_pod(samplerate, channels):
+    """Build a `spa_pod` of an interleaved float32 audio format.
+
+    The pod builder of libspa consists of inline functions, which are
+    not available through cffi. This builds the same binary object of
+    id and int properties, each padded to 8 bytes.
+
+    """
+    def prop(key, pod_type, value):
+        return struct.pack('<IIIIiI', key, 0, 4, pod_type, value, 0)
+    body = (struct.pack('<II', _SPA_TYPE_OBJECT_Format, _SPA_PARAM_EnumFormat) +
+            prop(_SPA_FORMAT_mediaType, _SPA_TYPE_Id, _SPA_MEDIA_TYPE_audio) +
+            prop(_SPA_FORMAT_mediaSubtype, _SPA_TYPE_Id, _SPA_MEDIA_SUBTYPE_raw) +
+            prop(_SPA_FORMAT_AUDIO_format, _SPA_TYPE_Id, _SPA_AUDIO_FORMAT_F32_LE) +
+            prop(_SPA_FORMAT_AUDIO_rate, _SPA_TYPE_Int, samplerate) +
+            prop(_SPA_FORMAT_AUDIO_channels, _SPA_TYPE_Int, channels))
+    return struct.pack('<II', len(body), _SPA_TYPE_Object) + body
+
+
+def _methods(proxy, methods_type):
+    """Return the method table and the object of a PipeWire interface.
+
+    Interface methods such as `pw_core_get_registry` are inline
+    functions that call through the `spa_interface` at the start of
+    every proxy, so they are called through the same table here.
+
+    """
+    interface = _ffi.cast("struct spa_interface*", proxy)
+    return _ffi.cast(methods_type, interface.cb.funcs), interface.cb.data
+
+
+def _dict_to_python(spa_dict):
+    """Convert a `spa_dict*` to a dict of strings."""
+    if spa_dict == _ffi.NULL:
+        return {}
+    items = {}
+    for idx in range(spa_dict.n_items):
+        item = spa_dict.items[idx]
+        if item.key != _ffi.NULL and item.value != _ffi.NULL:
+            items[_ffi.string(item.key).decode('utf-8')] = _ffi.string(item.value).decode('utf-8')
+    return items
+
+
+class _PipeWire:
+    """Proxy for communication with PipeWire.
+
+    This holds a PipeWire thread loop, a context, and a connection to
+    the PipeWire daemon. Audio nodes and the default devices are
+    tracked through the registry and the ``default`` metadata, which
+    are updated from the thread loop.
+
+    Hold :func:`locked` while calling any PipeWire function outside
+    of callbacks.
+
+    """
+
+    def __init__(self):
+        self.name = self._infer_program_name()
+        self.nodes = {} # node id -> node properties
+        self.defaults = {} # metadata key -> node name
+        self._done = threading.Condition()
+        self._done_seq = None
+        # notified whenever any stream becomes readable, writable, or fails:
+        self.readiness = threading.Condition()
+        self._callbacks = []
+        self.loop = _pw.pw_thread_loop_new(b'soundcard', _ffi.NULL)
+        self.context = _pw.pw_context_new(_pw.pw_thread_loop_get_loop(self.loop), _ffi.NULL, 0)
+        if self.context == _ffi.NULL:
+            raise RuntimeError('Creating a PipeWire context failed')
+        _pw.pw_thread_loop_start(self.loop)
+        with self.locked():
+            self.core = _pw.pw_context_connect(self.context, _ffi.NULL, 0)
+            if self.core == _ffi.NULL:
+                raise RuntimeError('Connecting to PipeWire failed')
+            self._add_core_listener()
+            methods, data = _methods(self.core, "struct pw_core_methods*")
+            self.registry = methods.get_registry(data, _registry_version, 0)
+            self._add_registry_listener()
+        # once the core has answered, all globals have been announced,
+        # and once it answers again, the metadata has been received:
+        self.sync()
+        self.sync()
+
+    @staticmethod
+    def _infer_program_name():
+        import sys
+        return os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+    def locked(self):
+        """Context manager for locking the thread loop."""
+        loop = self.loop
+        class Lock():
+            def __enter__(self_):
+                _pw.pw_thread_loop_lock(loop)
+            def __exit__(self_, exc_type, exc_value, traceback):
+                _pw.pw_thread_loop_unlock(loop)
+        return Lock()
+
+    def _keep(self, *objects):
+        """Keep callbacks and listener structs alive as long as the connection."""
+        self._callbacks.extend(objects)
+
+    def _add_core_listener(self):
+        @_ffi.callback("void(void*, uint32_t, int)")
+        def done(data, id, seq):
+            if id == _pw.PW_ID_CORE:
+                with self._done:
+                    self._done_seq = seq
+                    self._done.notify_all()
+        events = _ffi.new("struct pw_core_events*")
+        events.version = 0
+        events.done = done
+        hook = _ffi.new("struct spa_hook*")
+        methods, data = _methods(self.core, "struct pw_core_methods*")
+        methods.add_listener(data, hook, events, _ffi.NULL)
+        self._keep(done, events, hook)
+
+    def _add_registry_listener(self):
+        @_ffi.callback("void(void*, uint32_t, uint32_t, const char*, uint32_t, const struct spa_dict*)")
+        def global_added(data, id, permissions, type, version, props):
+            type = _ffi.string(type).decode('utf-8')
+            props = _dict_to_python(props)
+            if type == 'PipeWire:Interface:Node' and props.get('media.class') in ('Audio/Sink', 'Audio/Source'):
+                self.nodes[id] = props
+            elif type == 'PipeWire:Interface:Metadata' and props.get('metadata.name') == 'default':
+                self._bind_metadata(id)
+        @_ffi.callback("void(void*, uint32_t)")
+        def global_removed(data, id):
+            self.nodes.pop(id, None)
+        events = _ffi.new("struct pw_registry_events*")
+        events.version = 0
+        setattr(events, 'global', global_added) # 'global' is a Python keyword
+        events.global_remove = global_removed
+        hook = _ffi.new("struct spa_hook*")
+        methods, data = _methods(self.registry, "struct pw_registry_methods*")
+        methods.add_listener(data, hook, events, _ffi.NULL)
+        self._keep(global_added, global_removed, events, hook)
+
+    def _bind_metadata(self, id):
+        methods, data = _methods(self.registry, "struct pw_registry_methods*")
+        metadata = methods.bind(data, id, b'PipeWire:Interface:Metadata', _metadata_version, 0)
+        @_ffi.callback("int(void*, uint32_t, const char*, const char*, const char*)")
+        def property_changed(data, subject, key, type, value):
+            if key == _ffi.NULL:
+                self.defaults.clear()
+                return 0
+            key = _ffi.string(key).decode('utf-8')
+            if value == _ffi.NULL:
+                self.defaults.pop(key, None)
+                return 0
+            value = _ffi.string(value).decode('utf-8')
+            try:
+                # values are JSON objects like {"name": "alsa_output.pci-0000_00_1f.3.analog-stereo"}
+                self.defaults[key] = json.loads(value)['name']
+            except (ValueError, KeyError, TypeError):
+                self.defaults[key] = value
+            return 0
+        events = _ffi.new("struct pw_metadata_events*")
+        events.version = 0
+        events.property = property_changed
+        hook = _ffi.new("struct spa_hook*")
+        methods, data = _methods(metadata, "struct pw_metadata_methods*")
+        methods.add_listener(data, hook, events, _ffi.NULL)
+        self._keep(metadata, property_changed, events, hook)
+
+    def sync(self):
+        """Wait until the daemon has processed all previous requests."""
+        with self.locked():
+            methods, data = _methods(self.core, "struct pw_core_methods*")
+            seq = methods.sync(data, _pw.PW_ID_CORE, 0)
+        with self._done:
+            if not self._done.wait_for(lambda: self._done_seq == seq, timeout=5):
+                raise RuntimeError('PipeWire did not respond')
+
+    def node_list(self, media_class):
+        """Return the properties of all nodes of a media class."""
+        return [props for props in list(self.nodes.values())
+                if props.get('media.class') == media_class]
+
+    def node_info(self, name):
+        """Return the properties of the node with the given node name."""
+        for props in list(self.nodes.values()):
+            if props.get('node.name') == name:
+                return props
+        raise IndexError('no node with name {}'.format(name))
+
+    def _shutdown(self):
+        with self.locked():
+            _pw.pw_core_disconnect(self.core)
+        _pw.pw_thread_loop_stop(self.loop)
+        _pw.pw_context_destroy(self.context)
+        _pw.pw_thread_loop_destroy(self.loop)
+
+_pipewire = _PipeWire()
+atexit.register(_pipewire._shutdown)
+
+
+def all_speakers():
+    """A list of all connected speakers.
+
+    Returns
+    -------
+    speakers : list(_Speaker)
+
+    """
+    return [_Speaker(id=props['node.name']) for props in _pipewire.node_list('Audio/Sink')]
+
+
+def default_speaker():
+    """The default speaker of the system.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    name = _pipewire.defaults.get('default.audio.sink')
+    if name is None:
+        raise RuntimeError('there is no default speaker')
+    return _Speaker(id=name)
+
+
+def get_speaker(id):
+    """Get a specific speaker by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be a node name, a substring of the speaker name, or a
+        fuzzy-matched pattern for the speaker name.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    return _match_device(id, all_speakers())
+
+
+def all_microphones(include_loopback=False):
+    """A list of all connected microphones.
+
+    By default, this does not include loopbacks (virtual microphones
+    that record the output of a speaker).
+
+    Parameters
+    ----------
+    include_loopback : bool
+        allow recording of speaker outputs
+
+    Returns
+    -------
+    microphones : list(_Microphone)
+
+    """
+    mics = [_Microphone(id=props['node.name']) for props in _pipewire.node_list('Audio/Source')]
+    if include_loopback:
+        mics += [_Microphone(id=props['node.name'] + '.monitor')
+                 for props in _pipewire.node_list('Audio/Sink')]
+    return mics
+
+
+def default_microphone():
+    """The default microphone of the system.
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    name = _pipewire.defaults.get('default.audio.source')
+    if name is None:
+        raise RuntimeError('there is no default microphone')
+    return _Microphone(id=name)
+
+
+def get_microphone(id, include_loopback=False):
+    """Get a specific microphone by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be a node name, a substring of the microphone name, or a
+        fuzzy-matched pattern for the microphone name.
+    include_loopback : bool
+        allow recording of speaker outputs
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    return _match_device(id, all_microphones(include_loopback))
+
+
+def _match_device(id, devices):
+    """Find id in a list of devices.
+
+    id can be a node name, a substring of the device name, or a
+    fuzzy-matched pattern for the device name.
+
+    """
+    devices_by_id = {device.id: device for device in devices}
+    devices_by_name = {device.name: device for device in devices}
+    if id in devices_by_id:
+        return devices_by_id[id]
+    # try substring match:
+    for name, device in devices_by_name.items():
+        if id in name:
+            return device
+    # try fuzzy match:
+    pattern = '.*'.join(id)
+    for name, device in devices_by_name.items():
+        if re.match(pattern, name):
+            return device
+    raise IndexError('no device with id {}'.format(id))
+
+
+def get_name():
+    """Get application name.
+
+    Returns
+    -------
+    name : str
+    """
+    return _pipewire.name
+
+
+def set_name(name):
+    """Set application name.
+
+    The name applies to all streams that are opened afterwards.
+
+    Parameters
+    ----------
+    name :  str
+        The application using the soundcard
+        will be identified by the OS using this name.
+    """
+    _pipewire.name = name
+
+
+def wait(streams, timeout=None):
+    """Wait until any of several streams can be read or written.
+
+    This lets a single thread serve many players and recorders. A
+    recorder is ready if :attr:`readable_frames` is not zero, and a
+    player is ready if :attr:`writable_frames` is not zero. Failed
+    streams are ready as well, so that reading or writing them raises
+    an error.
+
+    Parameters
+    ----------
+    streams : list(_Player or _Recorder)
+        The streams to wait for.
+    timeout : float, optional
+        The maximum time to wait in seconds. Waits forever if None.
+
+    Returns
+    -------
+    ready : list(_Player or _Recorder)
+        The streams that are ready, or an empty list after a timeout.
+
+    """
+    with _pipewire.readiness:
+        _pipewire.readiness.wait_for(lambda: any(stream._is_ready() for stream in streams), timeout)
+    return [stream for stream in streams if stream._is_ready()]
+
+
+class _SoundCard:
+    def __init__(self, *, id):
+        self._id = id
+
+    @property
+    def channels(self):
+        """int : The number of channels of the device."""
+        return int(self._get_info().get('audio.channels', 2))
+
+    @property
+    def id(self):
+        """str : The PipeWire node name."""
+        return self._id
+
+    @property
+    def name(self):
+        """str : The human-readable name of the soundcard."""
+        info = self._get_info()
+        return info.get('node.description', info.get('node.nick', info['node.name']))
+
+    def _get_info(self):
+        return _pipewire.node_info(self._id)
+
+
+class _Speaker(_SoundCard):
+    """A soundcard output. Can be used to play audio.
+
+    Use the :func:`play` method to play one piece of audio, or use the
+    :func:`player` method to get a context manager for playing continuous
+    audio.
+
+    """
+
+    def __repr__(self):
+        return '<Speaker {} ({} channels)>'.format(self.name, self.channels)
+
+    def player(self, samplerate, channels=None, blocksize=None):
+        """Create Player for playing audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. This requests a
+            PipeWire quantum of this size.
+
+        Returns
+        -------
+        player : _Player
+        """
+        if channels is None:
+            channels = self.channels
+        return _Player(self._id, samplerate, channels, blocksize)
+
+    def play(self, data, samplerate, channels=None, blocksize=None):
+        """Play some audio data.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. This requests a
+            PipeWire quantum of this size.
+        """
+        with self.player(samplerate, channels, blocksize) as p:
+            p.play(data)
+
+
+class _Microphone(_SoundCard, _SharedRecorderMixin):
+    """A soundcard input. Can be used to record audio.
+
+    Use the :func:`record` method to record one piece of audio, or use
+    the :func:`recorder` method to get a context manager for recording
+    continuous audio.
+
+    """
+
+    def __repr__(self):
+        if self.isloopback:
+            return '<Loopback {} ({} channels)>'.format(self.name, self.channels)
+        else:
+            return '<Microphone {} ({} channels)>'.format(self.name, self.channels)
+
+    @property
+    def isloopback(self):
+        """bool : Whether this microphone is recording a speaker."""
+        return self._id.endswith('.monitor') and self._get_info()['media.class'] == 'Audio/Sink'
+
+    def _get_info(self):
+        try:
+            return _pipewire.node_info(self._id)
+        except IndexError:
+            if not self._id.endswith('.monitor'):
+                raise
+            return _pipewire.node_info(self._id[:-len('.monitor')])
+
+    def recorder(self, samplerate, channels=None, blocksize=None):
+        """Create Recorder for recording audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. This requests a
+            PipeWire quantum of this size.
+
+        Returns
+        -------
+        recorder : _Recorder
+        """
+        if channels is None:
+            channels = self.channels
+        return _Recorder(self._id, samplerate, channels, blocksize)
+
+    def record(self, numframes, samplerate, channels=None, blocksize=None):
+        """Record some audio data.
+
+        Parameters
+        ----------
+        numframes: int
+            The number of frames to record.
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. This requests a
+            PipeWire quantum of this size.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+        """
+        with self.recorder(samplerate, channels, blocksize) as r:
+            return r.record(numframes)
+
+
+class _Stream:
+    """A context manager for an active PipeWire stream.
+
+    This class is meant to be subclassed. Children must implement the
+    `_process` method, which is called from the thread loop whenever
+    the stream needs or provides a buffer, and set `_direction` and
+    `_category`.
+
+    A list of channels opens the stream with enough channels to
+    include all of them, and only transfers the given channels.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, id, samplerate, channels, blocksize=None):
+        self._id = id
+        self._samplerate = samplerate
+        if isinstance(channels, int):
+            self._channelmap = list(range(channels))
+        else:
+            self._channelmap = list(channels)
+        if any(not isinstance(ch, int) or ch < 0 for ch in self._channelmap):
+            raise TypeError('channels must be a number of channels or a list of channel indices')
+        self.channels = len(self._channelmap)
+        self._stream_channels = max(self._channelmap) + 1
+        self._blocksize = blocksize
+        self._state = _pw.PW_STREAM_STATE_UNCONNECTED
+        self._error = None
+        self._state_changed = threading.Condition()
+
+    def _properties(self):
+        props = _pw.pw_properties_new(_ffi.NULL)
+        values = {'media.type': 'Audio',
+                  'media.category': self._category,
+                  'application.name': _pipewire.name}
+        if self._id is not None:
+            target = self._id
+            if self._id.endswith('.monitor') and \
+               _pipewire.node_info(self._id[:-len('.monitor')])['media.class'] == 'Audio/Sink':
+                target = self._id[:-len('.monitor')]
+                values['stream.capture.sink'] = 'true'
+            values['target.object'] = target
+        if self._blocksize:
+            values['node.latency'] = '{}/{}'.format(self._blocksize, self._samplerate)
+        for key, value in values.items():
+            _pw.pw_properties_set(props, key.encode(), value.encode())
+        return props
+
+    def __enter__(self):
+        @_ffi.callback("void(void*, enum pw_stream_state, enum pw_stream_state, const char*)")
+        def state_changed(data, old, state, error):
+            self._set_state(state, _ffi.string(error).decode('utf-8') if error != _ffi.NULL else None)
+        @_ffi.callback("void(void*)")
+        def process(data):
+            self._process()
+        @_ffi.callback("void(void*)")
+        def drained(data):
+            self._drained.set()
+        self._events = _ffi.new("struct pw_stream_events*")
+        self._events.version = 0
+        self._events.state_changed = state_changed
+        self._events.process = process
+        self._events.drained = drained
+        self._event_callbacks = [state_changed, process, drained]
+        self._drained = threading.Event()
+        self._pod = _ffi.new("char[]", _format_pod(self._samplerate, self._stream_channels))
+        params = _ffi.new("const struct spa_pod*[1]", [_ffi.cast("struct spa_pod*", self._pod)])
+        self._framesize = 4 * self._stream_channels
+        with _pipewire.locked():
+            self.stream = _pw.pw_stream_new_simple(_pw.pw_thread_loop_get_loop(_pipewire.loop),
+                                                   self._category.encode(), self._properties(),
+                                                   self._events, _ffi.NULL)
+            if self.stream == _ffi.NULL:
+                raise RuntimeError('Creating the stream failed')
+            err = _pw.pw_stream_connect(self.stream, self._direction, _pw.PW_ID_ANY,
+                                        _pw.PW_STREAM_FLAG_AUTOCONNECT | _pw.PW_STREAM_FLAG_MAP_BUFFERS,
+                                        params, 1)
+        if err < 0:
+            self._destroy()
+            raise RuntimeError('Connecting the stream failed with error {}'.format(err))
+        with self._state_changed:
+            connected = self._state_changed.wait_for(
+                lambda: self._state in (_pw.PW_STREAM_STATE_STREAMING,
+                                        _pw.PW_STREAM_STATE_PAUSED,
+                                        _pw.PW_STREAM_STATE_ERROR),
+                timeout=5)
+        if not connected:
+            self._destroy()
+            raise RuntimeError('Stream creation timed out')
+        if self._state == _pw.PW_STREAM_STATE_ERROR:
+            self._destroy()
+            raise RuntimeError('Stream creation failed: {}'.format(self._error))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._destroy()
+
+    def _set_state(self, state, error):
+        """Record a state change of the stream, and wake up all waiters."""
+        with self._state_changed:
+            self._state = state
+            if error is not None:
+                self._error = error
+            self._state_changed.notify_all()
+        self._notify_readiness()
+
+    def _notify_readiness(self):
+        with _pipewire.readiness:
+            _pipewire.readiness.notify_all()
+
+    def _failed(self):
+        return self._state == _pw.PW_STREAM_STATE_ERROR
+
+    def _destroy(self):
+        with _pipewire.locked():
+            _pw.pw_stream_destroy(self.stream)
+
+    def _buffer_frames(self, pw_buffer):
+        """Map the data of a `pw_buffer*` as a *frames x channels* array."""
+        data = pw_buffer.buffer.datas[0]
+        if data.data == _ffi.NULL:
+            return None
+        buffer = _ffi.buffer(data.data, data.maxsize)
+        return numpy.frombuffer(buffer, dtype='float32').reshape([-1, self._stream_channels])
+
+
+class _Player(_Stream):
+    """A context manager for an active output stream.
+
+    Audio playback is available as soon as the context manager is
+    entered. Audio data can be played using the :func:`play` method.
+    Successive calls to :func:`play` will queue up the audio one piece
+    after another. If no audio is queued up, this will play silence.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    _direction = _pw.SPA_DIRECTION_OUTPUT
+    _category = 'Playback'
+
+    def __init__(self, *args, **kwargs):
+        super(_Player, self).__init__(*args, **kwargs)
+        self._queue = collections.deque()
+        self._queued_frames = 0
+        self._consumed = threading.Condition()
+        self._underflows = 0
+        # since 0.3.49, buffers report how many frames are needed:
+        version = _ffi.string(_pw.pw_get_library_version()).decode('utf-8')
+        self._has_requested = tuple(int(v) for v in version.split('.')[:3]) >= (0, 3, 49)
+
+    @property
+    def underflows(self):
+        """int : The number of blocks that were played without enough data."""
+        return self._underflows
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            try:
+                self._wait_consumed(lambda: self._queued_frames == 0)
+            except RuntimeError:
+                super(_Player, self).__exit__(exc_type, exc_value, traceback)
+                raise
+            with _pipewire.locked():
+                _pw.pw_stream_flush(self.stream, True)
+            self._drained.wait(timeout=1)
+        super(_Player, self).__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def writable_frames(self):
+        """int : The number of frames that can be played without blocking.
+
+        Use :func:`wait` to wait until any of several players can be
+        written to.
+
+        """
+        return max(0, (self._blocksize or 1024) - self._queued_frames)
+
+    def _is_ready(self):
+        return self.writable_frames > 0 or self._failed()
+
+    def _set_state(self, state, error):
+        super(_Player, self)._set_state(state, error)
+        with self._consumed:
+            self._consumed.notify_all()
+
+    def _wait_consumed(self, predicate):
+        """Wait until `predicate` holds, while PipeWire keeps playing.
+
+        Raises a RuntimeError if the stream fails, or if PipeWire stops
+        consuming the queued data for five seconds, e.g. because its
+        target node disappeared.
+
+        """
+        failed = lambda: self._state == _pw.PW_STREAM_STATE_ERROR
+        with self._consumed:
+            queued_frames = self._queued_frames
+            stalled = 0
+            while not self._consumed.wait_for(lambda: predicate() or failed(), timeout=1):
+                if self._queued_frames != queued_frames:
+                    queued_frames = self._queued_frames
+                    stalled = 0
+                else:
+                    stalled += 1
+                    if stalled >= 5:
+                        raise RuntimeError('Playback stalled: PipeWire stopped consuming audio')
+            if failed():
+                raise RuntimeError('Playback failed: {}'.format(self._error))
+
+    def _process(self):
+        pw_buffer = _pw.pw_stream_dequeue_buffer(self.stream)
+        if pw_buffer == _ffi.NULL:
+            return
+        frames = self._buffer_frames(pw_buffer)
+        if frames is not None:
+            numframes = len(frames)
+            if self._has_requested and pw_buffer.requested:
+                numframes = min(numframes, pw_buffer.requested)
+            with self._consumed:
+                filled = 0
+                while filled < numframes and self._queue:
+                    block = self._queue[0]
+                    n = min(len(block), numframes - filled)
+                    frames[filled:filled+n] = block[:n]
+                    filled += n
+                    if n == len(block):
+                        self._queue.popleft()
+                    else:
+                        self._queue[0] = block[n:]
+                self._queued_frames -= filled
+                self._consumed.notify_all()
+            self._notify_readiness()
+            if filled < numframes:
+                frames[filled:numframes] = 0
+                if filled > 0:
+                    self._underflows += 1
+            chunk = pw_buffer.buffer.datas[0].chunk
+            chunk.offset = 0
+            chunk.stride = self._framesize
+            chunk.size = numframes * self._framesize
+        _pw.pw_stream_queue_buffer(self.stream, pw_buffer)
+
+    def play(self, data):
+        """Play some audio data.
+
+        Internally, all data is handled as ``float32`` and with the
+        appropriate number of channels. For maximum performance,
+        provide data as a *frames × channels* float32 numpy array.
+
+        If single-channel or one-dimensional data is given, this data
+        will be played on all available channels.
+
+        This function will return *before* all data has been played,
+        so that additional data can be provided for gapless playback.
+        It blocks while more than one block of data is queued up.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+
+        """
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        if data.shape[1] == 1 and self.channels != 1:
+            data = numpy.tile(data, [1, self.channels])
+        if data.shape[1] != self.channels:
+            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        if self._channelmap != list(range(self._stream_channels)):
+            frames = numpy.zeros([len(data), self._stream_channels], dtype='float32')
+            frames[:, self._channelmap] = data
+            data = frames
+        blocksize = self._blocksize or 1024
+        with self._consumed:
+            self._queue.append(data)
+            self._queued_frames += len(data)
+        self._wait_consumed(lambda: self._queued_frames <= blocksize)
+
+
+class _Recorder(_Stream):
+    """A context manager for an active input stream.
+
+    Audio recording is available as soon as the context manager is
+    entered. Recorded audio data can be read using the :func:`record`
+    method. If no audio data is available, :func:`record` will block until
+    the requested amount of audio data has been recorded.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    _direction = _pw.SPA_DIRECTION_INPUT
+    _category = 'Capture'
+
+    def __init__(self, *args, **kwargs):
+        super(_Recorder, self).__init__(*args, **kwargs)
+        self._queue = collections.deque()
+        self._record_event = threading.Event()
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+
+    def _process(self):
+        pw_buffer = _pw.pw_stream_dequeue_buffer(self.stream)
+        if pw_buffer == _ffi.NULL:
+            return
+        frames = self._buffer_frames(pw_buffer)
+        if frames is not None:
+            chunk = pw_buffer.buffer.datas[0].chunk
+            start = chunk.offset // self._framesize
+            stop = start + chunk.size // self._framesize
+            self._queue.append(frames[start:stop, self._channelmap].copy())
+            self._record_event.set()
+            self._notify_readiness()
+        _pw.pw_stream_queue_buffer(self.stream, pw_buffer)
+
+    @property
+    def readable_frames(self):
+        """int : The number of frames that can be recorded without blocking.
+
+        This includes frames that are pending from previous calls to
+        :func:`record`. Use :func:`wait` to wait until any of several
+        recorders can be read from.
+
+        """
+        return len(self._pending_chunk) + sum(len(chunk) for chunk in list(self._queue))
+
+    def _is_ready(self):
+        return self.readable_frames > 0 or self._failed()
+
+    def _record_chunk(self, timeout=None):
+        """Record one chunk of audio data, as provided by PipeWire.
+
+        If no data arrives within `timeout` seconds, returns None.
+
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self._queue:
+            # wake up at least once a second, to check for failed streams:
+            wait_timeout = 1
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait_timeout = min(wait_timeout, remaining)
+            if not self._record_event.wait(timeout=wait_timeout) and self._state == _pw.PW_STREAM_STATE_ERROR:
+                raise RuntimeError('Recording failed: {}'.format(self._error))
+            self._record_event.clear()
+        return self._queue.popleft()
+
+    def record(self, numframes=None, timeout=None):
+        """Record a block of audio data.
+
+        The data will be returned as a *frames × channels* float32
+        numpy array. This function will wait until ``numframes``
+        frames have been recorded. If numframes is given, it will
+        return exactly ``numframes`` frames, and buffer the rest for
+        later.
+
+        If ``numframes`` is None, it will return whatever the audio
+        backend has available right now.
+
+        If ``timeout`` is given, and not enough data arrives in time,
+        this raises a `TimeoutError`. All data recorded so far is kept
+        for the next call, or can be retrieved with
+        :func:`record_nowait` or :func:`flush`.
+
+        Parameters
+        ----------
+        numframes : int, optional
+            The number of frames to record.
+        timeout : float, optional
+            The maximum time to wait in seconds.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        def remaining():
+            return max(0, deadline - time.monotonic()) if deadline is not None else None
+        if numframes is None:
+            chunk = self._record_chunk(remaining())
+            if chunk is None:
+                raise TimeoutError('no audio data was recorded within {} seconds'.format(timeout))
+            blocks = [self.flush(), chunk]
+            while self._queue:
+                blocks.append(self._queue.popleft())
+        else:
+            blocks = [self._pending_chunk]
+            self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+            recorded_frames = len(blocks[0])
+            while recorded_frames < numframes:
+                block = self._record_chunk(remaining())
+                if block is None:
+                    # keep everything for the next call:
+                    self._pending_chunk = numpy.concatenate(blocks, axis=0)
+                    raise TimeoutError('only {} of {} frames were recorded within {} seconds'
+                                       .format(recorded_frames, numframes, timeout))
+                blocks.append(block)
+                recorded_frames += len(block)
+            if recorded_frames > numframes:
+                to_split = -(recorded_frames-numframes)
+                blocks[-1], self._pending_chunk = numpy.split(blocks[-1], [to_split])
+        return numpy.concatenate(blocks, axis=0)
+
+    def record_nowait(self):
+        """Record all audio data that is available right now.
+
+        This never blocks. It returns the pending chunk and all data
+        PipeWire has delivered so far, which might be no data at all.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        blocks = [self.flush()]
+        while True:
+            chunk = self._record_chunk(timeout=0)
+            if chunk is None:
+                break
+            blocks.append(chunk)
+        return numpy.concatenate(blocks, axis=0)
+
+    def flush(self):
+        """Return the last pending chunk.
+
+        After using the :func:`record` method, this will return the
+        last incomplete chunk and delete it.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        last_chunk = self._pending_chunk
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+        return last_chunk
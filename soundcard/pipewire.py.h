@@ -0,0 +1,212 @@
+// from spa/utils/dict.h, spa/utils/hook.h, and spa/utils/defs.h
+
+struct spa_dict_item {
+    const char *key;
+    const char *value;
+};
+
+struct spa_dict {
+    uint32_t flags;
+    uint32_t n_items;
+    const struct spa_dict_item *items;
+};
+
+struct spa_list {
+    struct spa_list *next;
+    struct spa_list *prev;
+};
+
+struct spa_callbacks {
+    const void *funcs;
+    void *data;
+};
+
+struct spa_interface {
+    const char *type;
+    uint32_t version;
+    struct spa_callbacks cb;
+};
+
+struct spa_hook {
+    struct spa_list link;
+    struct spa_callbacks cb;
+    void (*removed) (struct spa_hook *hook);
+    void *priv;
+};
+
+enum spa_direction {
+    SPA_DIRECTION_INPUT = 0,
+    SPA_DIRECTION_OUTPUT = 1
+};
+
+// from spa/pod/pod.h and spa/buffer/buffer.h
+
+struct spa_pod {
+    uint32_t size;
+    uint32_t type;
+};
+
+struct spa_chunk {
+    uint32_t offset;
+    uint32_t size;
+    int32_t stride;
+    int32_t flags;
+};
+
+struct spa_data {
+    uint32_t type;
+    uint32_t flags;
+    int64_t fd;
+    uint32_t mapoffset;
+    uint32_t maxsize;
+    void *data;
+    struct spa_chunk *chunk;
+};
+
+struct spa_buffer {
+    uint32_t n_metas;
+    uint32_t n_datas;
+    void *metas;
+    struct spa_data *datas;
+};
+
+// from pipewire/pipewire.h, pipewire/properties.h, and pipewire/thread-loop.h
+
+void pw_init(int *argc, char **argv[]);
+const char *pw_get_library_version(void);
+
+struct pw_properties {
+    struct spa_dict dict;
+    uint32_t flags;
+};
+struct pw_properties *pw_properties_new(const char *key, ...);
+int pw_properties_set(struct pw_properties *properties, const char *key, const char *value);
+
+struct pw_loop;
+struct pw_thread_loop;
+struct pw_thread_loop *pw_thread_loop_new(const char *name, const struct spa_dict *props);
+struct pw_loop *pw_thread_loop_get_loop(struct pw_thread_loop *loop);
+int pw_thread_loop_start(struct pw_thread_loop *loop);
+void pw_thread_loop_stop(struct pw_thread_loop *loop);
+void pw_thread_loop_destroy(struct pw_thread_loop *loop);
+void pw_thread_loop_lock(struct pw_thread_loop *loop);
+void pw_thread_loop_unlock(struct pw_thread_loop *loop);
+
+// from pipewire/context.h, pipewire/core.h, and pipewire/proxy.h
+
+struct pw_context;
+struct pw_core;
+struct pw_registry;
+struct pw_proxy;
+struct pw_context *pw_context_new(struct pw_loop *main_loop, struct pw_properties *props, size_t user_data_size);
+void pw_context_destroy(struct pw_context *context);
+struct pw_core *pw_context_connect(struct pw_context *context, struct pw_properties *properties, size_t user_data_size);
+int pw_core_disconnect(struct pw_core *core);
+void pw_proxy_destroy(struct pw_proxy *proxy);
+
+#define PW_ID_CORE 0
+#define PW_ID_ANY 0xffffffff
+
+struct pw_core_events {
+    uint32_t version;
+    void (*info) (void *data, const void *info);
+    void (*done) (void *data, uint32_t id, int seq);
+    void (*ping) (void *data, uint32_t id, int seq);
+    void (*error) (void *data, uint32_t id, int seq, int res, const char *message);
+    void (*remove_id) (void *data, uint32_t id);
+    void (*bound_id) (void *data, uint32_t id, uint32_t global_id);
+    void (*add_mem) (void *data, uint32_t id, uint32_t type, int fd, uint32_t flags);
+    void (*remove_mem) (void *data, uint32_t id);
+};
+
+struct pw_core_methods {
+    uint32_t version;
+    int (*add_listener) (void *object, struct spa_hook *listener, const struct pw_core_events *events, void *data);
+    int (*hello) (void *object, uint32_t version);
+    int (*sync) (void *object, uint32_t id, int seq);
+    int (*pong) (void *object, uint32_t id, int seq);
+    int (*error) (void *object, uint32_t id, int seq, int res, const char *message);
+    struct pw_registry *(*get_registry) (void *object, uint32_t version, size_t user_data_size);
+    void *(*create_object) (void *object, const char *factory_name, const char *type, uint32_t version, const struct spa_dict *props, size_t user_data_size);
+    int (*destroy) (void *object, void *proxy);
+};
+
+struct pw_registry_events {
+    uint32_t version;
+    void (*global) (void *data, uint32_t id, uint32_t permissions, const char *type, uint32_t version, const struct spa_dict *props);
+    void (*global_remove) (void *data, uint32_t id);
+};
+
+struct pw_registry_methods {
+    uint32_t version;
+    int (*add_listener) (void *object, struct spa_hook *listener, const struct pw_registry_events *events, void *data);
+    void *(*bind) (void *object, uint32_t id, const char *type, uint32_t version, size_t use_data_size);
+    int (*destroy) (void *object, uint32_t id);
+};
+
+// from pipewire/extensions/metadata.h
+
+struct pw_metadata_events {
+    uint32_t version;
+    int (*property) (void *data, uint32_t subject, const char *key, const char *type, const char *value);
+};
+
+struct pw_metadata_methods {
+    uint32_t version;
+    int (*add_listener) (void *object, struct spa_hook *listener, const struct pw_metadata_events *events, void *data);
+    int (*set_property) (void *object, uint32_t subject, const char *key, const char *type, const char *value);
+    int (*clear) (void *object);
+};
+
+// from pipewire/stream.h
+
+enum pw_stream_state {
+    PW_STREAM_STATE_ERROR = -1,
+    PW_STREAM_STATE_UNCONNECTED = 0,
+    PW_STREAM_STATE_CONNECTING = 1,
+    PW_STREAM_STATE_PAUSED = 2,
+    PW_STREAM_STATE_STREAMING = 3
+};
+
+enum pw_stream_flags {
+    PW_STREAM_FLAG_NONE = 0,
+    PW_STREAM_FLAG_AUTOCONNECT = 1,
+    PW_STREAM_FLAG_INACTIVE = 2,
+    PW_STREAM_FLAG_MAP_BUFFERS = 4,
+    PW_STREAM_FLAG_DRIVER = 8,
+    PW_STREAM_FLAG_RT_PROCESS = 16,
+    PW_STREAM_FLAG_NO_CONVERT = 32,
+    PW_STREAM_FLAG_EXCLUSIVE = 64,
+    PW_STREAM_FLAG_DONT_RECONNECT = 128
+};
+
+struct pw_buffer {
+    struct spa_buffer *buffer;
+    void *user_data;
+    uint64_t size;
+    uint64_t requested;
+};
+
+struct pw_stream;
+
+struct pw_stream_events {
+    uint32_t version;
+    void (*destroy) (void *data);
+    void (*state_changed) (void *data, enum pw_stream_state old, enum pw_stream_state state, const char *error);
+    void (*control_info) (void *data, uint32_t id, const void *control);
+    void (*io_changed) (void *data, uint32_t id, void *area, uint32_t size);
+    void (*param_changed) (void *data, uint32_t id, const struct spa_pod *param);
+    void (*add_buffer) (void *data, struct pw_buffer *buffer);
+    void (*remove_buffer) (void *data, struct pw_buffer *buffer);
+    void (*process) (void *data);
+    void (*drained) (void *data);
+};
+
+struct pw_stream *pw_stream_new_simple(struct pw_loop *loop, const char *name, struct pw_properties *props, const struct pw_stream_events *events, void *data);
+void pw_stream_destroy(struct pw_stream *stream);
+int pw_stream_connect(struct pw_stream *stream, enum spa_direction direction, uint32_t target_id, enum pw_stream_flags flags, const struct spa_pod **params, uint32_t n_params);
+int pw_stream_disconnect(struct pw_stream *stream);
+enum pw_stream_state pw_stream_get_state(struct pw_stream *stream, const char **error);
+struct pw_buffer *pw_stream_dequeue_buffer(struct pw_stream *stream);
+int pw_stream_queue_buffer(struct pw_stream *stream, struct pw_buffer *buffer);
+int pw_stream_flush(struct pw_stream *stream, bool drain);
@@ -1,24 +1,54 @@
 import os
 import atexit
+import collections
 import collections.abc
+import hashlib
+import json
+import queue
 import time
+import traceback
 import re
 import threading
 import warnings
 import numpy
 import cffi
 
-_ffi = cffi.FFI()
+from soundcard.shared import _SharedRecorderMixin
+
 _package_dir, _ = os.path.split(__file__)
-with open(os.path.join(_package_dir, 'pulseaudio.py.h'), 'rt') as f:
-    _ffi.cdef(f.read())
+with open(os.path.join(_package_dir, 'pulseaudio.py.h'), 'rb') as f:
+    _header = f.read()
+
+try:
+    # declarations precompiled by `python -m soundcard.build_ffi`:
+    from soundcard._pulseaudio_ffi import ffi as _ffi, header_hash as _header_hash
+    if _header_hash != hashlib.sha1(_header).hexdigest():
+        raise ImportError('precompiled declarations are out of date')
+except ImportError:
+    _ffi = cffi.FFI()
+    _ffi.cdef(_header.decode())
 
 try:
     _pa = _ffi.dlopen('pulse')
 except OSError:
     # Try explicit file name, if the general does not work (e.g. on nixos)
     _pa = _ffi.dlopen('libpulse.so')
-    
+
+# pa_stream_readable_size and pa_stream_writable_size return (size_t)-1 on errors:
+_size_t_error = 2**(8*_ffi.sizeof('size_t')) - 1
+
+_pa_simple = None
+
+def _load_pa_simple():
+    """Load the pa_simple library on first use."""
+    global _pa_simple
+    if _pa_simple is None:
+        try:
+            _pa_simple = _ffi.dlopen('pulse-simple')
+        except OSError:
+            _pa_simple = _ffi.dlopen('libpulse-simple.so')
+    return _pa_simple
+
 # First, we need to define a global _PulseAudio proxy for interacting
 # with the C API:
 
@@ -26,7 +56,7 @@ def _lock(func):
     """Call a pulseaudio function while holding the mainloop lock."""
     def func_with_lock(*args, **kwargs):
         self = args[0]
-        with self._lock_mainloop():
+        with self._mainloop_lock:
             return func(*args[1:], **kwargs)
     return func_with_lock
 
@@ -40,7 +70,7 @@ def _lock_and_block(func):
     """
     def func_with_lock(*args, **kwargs):
         self = args[0]
-        with self._lock_mainloop():
+        with self._mainloop_lock:
             operation = func(*args[1:], **kwargs)
         self._block_operation(operation)
         self._pa_operation_unref(operation)
@@ -71,6 +101,120 @@ def channel_name_map():
     return channel_indices
 
 
+class _Instrumentation:
+    """Opt-in counters and trace events for the hot paths.
+
+    While disabled, the hot paths only check the `enabled` flag, so
+    instrumentation costs next to nothing unless it is used. Counters
+    are collected per stream and for the whole process. If `trace` is
+    set, timed events are collected as well, and can be exported in
+    the Chrome trace event format.
+
+    Counters are updated from several threads, and are guarded by a
+    single lock, so that no increments are lost.
+
+    """
+
+    def __init__(self, max_events=1000000):
+        self.enabled = False
+        self.trace = False
+        self.counters = collections.Counter()
+        self.events = collections.deque(maxlen=max_events)
+        self._start_time = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+        self.events.clear()
+        self._start_time = time.perf_counter()
+
+    def count(self, name, value=1, counters=None):
+        """Add `value` to a process counter, and to `counters` if given."""
+        with self.lock:
+            self.counters[name] += value
+            if counters is not None:
+                counters[name] += value
+
+    def snapshot(self, counters=None):
+        """Return a copy of `counters`, or of the process counters."""
+        with self.lock:
+            return dict(self.counters if counters is None else counters)
+
+    def event(self, name, start_time, end_time, **args):
+        """Record a timed event, if tracing is enabled."""
+        if self.trace:
+            self.events.append(dict(name=name, ph='X', pid=os.getpid(), tid=threading.get_ident(),
+                                    ts=(start_time - self._start_time) * 1e6,
+                                    dur=(end_time - start_time) * 1e6,
+                                    args=args))
+
+    def export_trace(self, filename):
+        """Write all recorded events as a Chrome trace JSON file."""
+        with open(filename, 'wt') as f:
+            json.dump(dict(traceEvents=list(self.events), displayTimeUnit='ms'), f)
+
+
+class _MainloopLock:
+    """Context manager that holds the lock of a threaded mainloop.
+
+    This is a single reusable object, so that locking does not create
+    any objects.
+
+    """
+
+    def __init__(self, pulse):
+        self._pulse = pulse
+
+    def __enter__(self):
+        instrumentation = self._pulse.instrumentation
+        if not instrumentation.enabled:
+            _pa.pa_threaded_mainloop_lock(self._pulse.mainloop)
+            return
+        start_time = time.perf_counter()
+        _pa.pa_threaded_mainloop_lock(self._pulse.mainloop)
+        end_time = time.perf_counter()
+        instrumentation.count('lock_acquisitions')
+        instrumentation.count('lock_wait_time', end_time - start_time)
+        instrumentation.event('lock', start_time, end_time)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _pa.pa_threaded_mainloop_unlock(self._pulse.mainloop)
+
+
+class _Readiness:
+    """A shared notification for all streams that became readable or writable.
+
+    The read, write, and state callbacks of all streams notify this
+    object, so that a single thread can wait for any number of
+    streams. Waiters remember the generation before checking their
+    streams, and wait for a newer one, so no notification is lost.
+
+    The callbacks hold the mainloop lock while notifying, so waiters
+    must never hold the condition while locking the mainloop.
+
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        with self._condition:
+            return self._generation
+
+    def notify(self):
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout=None):
+        """Wait until notified after `generation`, or until `timeout` seconds passed."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._generation != generation, timeout)
+
+
 class _PulseAudio:
     """Proxy for communication with Pulseaudio.
 
@@ -85,20 +229,102 @@ class _PulseAudio:
     Any function that would return a `pa_operation *` in pulseaudio
     will block until the operation has finished.
 
+    The mainloop and context are only created, and connected to the
+    server, on first use. After a fork, the child process connects to
+    the server again on first use. Streams opened before the fork can
+    only be used in the parent process.
+
     """
 
     def __init__(self):
+        self.instrumentation = _Instrumentation()
+        self._mainloop_lock = _MainloopLock(self)
+        self.readiness = _Readiness()
+        # uploaded samples and their size in bytes, least recently used first:
+        self._samples = collections.OrderedDict()
+        self._samples_lock = threading.Lock()
+        self.sample_cache_limit = None
+        self._device_callbacks = []
+        self._device_events = None
+        # connect on first use, so that merely importing soundcard
+        # does not start the mainloop thread:
+        self._unconnected = True
+        self._connecting = False
+        self._fork_locked = False
+        self._connect_lock = threading.RLock()
+        # the mainloop thread does not survive a fork, so child
+        # processes connect again when they first talk to the server:
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(before=self._before_fork,
+                                after_in_parent=self._after_fork_in_parent,
+                                after_in_child=self._after_fork_in_child)
+
+    def _connect(self):
+        """Start a new mainloop, and connect a new context to the server."""
         # these functions are called before the mainloop starts, so we
         # don't need to hold the lock:
-        self.mainloop = _pa.pa_threaded_mainloop_new()
-        self.mainloop_api = _pa.pa_threaded_mainloop_get_api(self.mainloop)
-        self.context = _pa.pa_context_new(self.mainloop_api, self._infer_program_name().encode())
-        _pa.pa_context_connect(self.context, _ffi.NULL, _pa.PA_CONTEXT_NOFLAGS, _ffi.NULL)
-        _pa.pa_threaded_mainloop_start(self.mainloop)
+        self._mainloop = _pa.pa_threaded_mainloop_new()
+        self.mainloop_api = _pa.pa_threaded_mainloop_get_api(self._mainloop)
+        self._context = _pa.pa_context_new(self.mainloop_api, self._infer_program_name().encode())
+        _pa.pa_context_connect(self._context, _ffi.NULL, _pa.PA_CONTEXT_NOFLAGS, _ffi.NULL)
+        _pa.pa_threaded_mainloop_start(self._mainloop)
 
-        while self._pa_context_get_state(self.context) in (_pa.PA_CONTEXT_UNCONNECTED, _pa.PA_CONTEXT_CONNECTING, _pa.PA_CONTEXT_AUTHORIZING, _pa.PA_CONTEXT_SETTING_NAME):
+        while self._pa_context_get_state(self._context) in (_pa.PA_CONTEXT_UNCONNECTED, _pa.PA_CONTEXT_CONNECTING, _pa.PA_CONTEXT_AUTHORIZING, _pa.PA_CONTEXT_SETTING_NAME):
             time.sleep(0.001)
-        assert self._pa_context_get_state(self.context)==_pa.PA_CONTEXT_READY
+        assert self._pa_context_get_state(self._context)==_pa.PA_CONTEXT_READY
+
+    @property
+    def mainloop(self):
+        """The threaded mainloop of this process."""
+        if self._unconnected:
+            self._connect_on_first_use()
+        return self._mainloop
+
+    @property
+    def context(self):
+        """The context of this process."""
+        if self._unconnected:
+            self._connect_on_first_use()
+        return self._context
+
+    def _before_fork(self):
+        # make sure the mainloop thread is not inside any pulseaudio
+        # function while the process is copied:
+        self._fork_locked = not self._unconnected
+        if self._fork_locked:
+            _pa.pa_threaded_mainloop_lock(self._mainloop)
+
+    def _after_fork_in_parent(self):
+        if self._fork_locked:
+            _pa.pa_threaded_mainloop_unlock(self._mainloop)
+
+    def _after_fork_in_child(self):
+        # The inherited mainloop has no thread, and its context shares
+        # the socket of the parent. They must neither be used nor
+        # freed, since that would disturb the parent's connection:
+        self._unconnected = True
+        self._connect_lock = threading.RLock()
+        self._samples_lock = threading.Lock()
+        self.instrumentation.lock = threading.Lock()
+        self.readiness = _Readiness()
+
+    def _connect_on_first_use(self):
+        """Connect to the server, the first time this process needs it."""
+        with self._connect_lock:
+            # _connect itself uses the new mainloop and context:
+            if not self._unconnected or self._connecting:
+                return
+            self._connecting = True
+            try:
+                self._connect()
+            finally:
+                self._connecting = False
+            self._unconnected = False
+            # after a fork, the subscription and its dispatch thread
+            # did not survive:
+            self._device_events = None
+            if self._device_callbacks:
+                self._subscribe_device_events()
 
     @staticmethod
     def _infer_program_name():
@@ -109,10 +335,11 @@ class _PulseAudio:
         See https://docs.python.org/3/using/cmdline.html#interface-options
         """
         import sys
-        prog_name = sys.argv[0]
+        prog_name = sys.argv[0] if sys.argv and sys.argv[0] else 'python'
         if prog_name == "-c":
-            return sys.argv[1][:30] + "..."
-        if prog_name == "-m":
+            # `python -c code` leaves only '-c' in sys.argv:
+            return sys.argv[1][:30] + "..." if len(sys.argv) > 1 else 'python'
+        if prog_name == "-m" and len(sys.argv) > 1:
             prog_name = sys.argv[1]
         # Usually even with -m, sys.argv[0] will already be a path,
         # so do the following outside the above check
@@ -123,6 +350,9 @@ class _PulseAudio:
         return os.path.basename(prog_name)
 
     def _shutdown(self):
+        if self._unconnected:
+            # this process never connected:
+            return
         operation = self._pa_context_drain(self.context, _ffi.NULL, _ffi.NULL)
         self._block_operation(operation)
         self._pa_context_disconnect(self.context)
@@ -136,6 +366,8 @@ class _PulseAudio:
         if operation == _ffi.NULL:
             return
         while self._pa_operation_get_state(operation) == _pa.PA_OPERATION_RUNNING:
+            if self.instrumentation.enabled:
+                self.instrumentation.count('sleeps')
             time.sleep(0.001)
 
     @property
@@ -174,7 +406,8 @@ class _PulseAudio:
         def callback(context, source_info, eol, userdata):
             if not eol:
                 info.append(dict(name=_ffi.string(source_info.description).decode('utf-8'),
-                                 id=_ffi.string(source_info.name).decode('utf-8')))
+                                 id=_ffi.string(source_info.name).decode('utf-8'),
+                                 index=source_info.index))
         self._pa_context_get_source_info_list(self.context, callback, _ffi.NULL)
         return info
 
@@ -204,7 +437,8 @@ class _PulseAudio:
         def callback(context, sink_info, eol, userdata):
             if not eol:
                 info.append((dict(name=_ffi.string(sink_info.description).decode('utf-8'),
-                                  id=_ffi.string(sink_info.name).decode('utf-8'))))
+                                  id=_ffi.string(sink_info.name).decode('utf-8'),
+                                  index=sink_info.index)))
         self._pa_context_get_sink_info_list(self.context, callback, _ffi.NULL)
         return info
 
@@ -217,7 +451,8 @@ class _PulseAudio:
                 info_dict = dict(latency=sink_info.latency,
                                  configured_latency=sink_info.configured_latency,
                                  channels=sink_info.sample_spec.channels,
-                                 name=_ffi.string(sink_info.description).decode('utf-8'))
+                                 name=_ffi.string(sink_info.description).decode('utf-8'),
+                                 monitor_source=_ffi.string(sink_info.monitor_source_name).decode('utf-8'))
                 for prop in ['device.class', 'device.api', 'device.bus']:
                     data = _pa.pa_proplist_gets(sink_info.proplist, prop.encode())
                     info_dict[prop] = _ffi.string(data).decode('utf-8') if data else None
@@ -225,6 +460,53 @@ class _PulseAudio:
         self._pa_context_get_sink_info_by_name(self.context, id.encode(), callback, _ffi.NULL)
         return info[0]
 
+    def _sink_input_dict(self, sink_input_info):
+        info_dict = dict(index=sink_input_info.index,
+                         channels=sink_input_info.sample_spec.channels,
+                         sink=sink_input_info.sink)
+        for key, prop in [('name', 'media.name'), ('application', 'application.name')]:
+            data = _pa.pa_proplist_gets(sink_input_info.proplist, prop.encode())
+            info_dict[key] = _ffi.string(data).decode('utf-8') if data else None
+        if info_dict['name'] is None:
+            info_dict['name'] = _ffi.string(sink_input_info.name).decode('utf-8')
+        return info_dict
+
+    @property
+    def sink_input_list(self):
+        """Return a list of dicts of information about playing streams."""
+        info = []
+        @_ffi.callback("pa_sink_input_info_cb_t")
+        def callback(context, sink_input_info, eol, userdata):
+            if not eol:
+                info.append(self._sink_input_dict(sink_input_info))
+        self._pa_context_get_sink_input_info_list(self.context, callback, _ffi.NULL)
+        return info
+
+    def sink_input_info(self, index):
+        """Return a dictionary of information about a specific playing stream."""
+        info = []
+        @_ffi.callback("pa_sink_input_info_cb_t")
+        def callback(context, sink_input_info, eol, userdata):
+            if not eol:
+                info.append(self._sink_input_dict(sink_input_info))
+        self._pa_context_get_sink_input_info(self.context, index, callback, _ffi.NULL)
+        if not info:
+            raise IndexError('no application stream with index {}'.format(index))
+        return info[0]
+
+    def _device_id(self, kind, index):
+        """Return the id of the sink or source with the given index, or None."""
+        ids = []
+        @_ffi.callback("pa_{}_info_cb_t".format(kind))
+        def callback(context, info, eol, userdata):
+            if not eol:
+                ids.append(_ffi.string(info.name).decode('utf-8'))
+        if kind == 'sink':
+            self._pa_context_get_sink_info_by_index(self.context, index, callback, _ffi.NULL)
+        else:
+            self._pa_context_get_source_info_by_index(self.context, index, callback, _ffi.NULL)
+        return ids[0] if ids else None
+
     @property
     def server_info(self):
         """Return a dictionary of information about the server."""
@@ -238,20 +520,202 @@ class _PulseAudio:
         self._pa_context_get_server_info(self.context, callback, _ffi.NULL)
         return info
 
-    def _lock_mainloop(self):
+    def add_device_callback(self, callback):
+        """Call `callback(event, device)` for every device change.
+
+        The first callback subscribes to sink, source, and server
+        events of the context. Events are dispatched from a separate
+        thread, since the mainloop thread must not block.
+
+        """
+        # connect before subscribing, since connecting subscribes
+        # again for all known callbacks:
+        if self._unconnected:
+            self._connect_on_first_use()
+        with self._connect_lock:
+            self._device_callbacks.append(callback)
+            if self._device_events is None:
+                self._subscribe_device_events()
+
+    def _subscribe_device_events(self):
+        """Subscribe to device events, and start their dispatch thread."""
+        self._device_events = queue.Queue()
+        self._device_ids = {'sink': {s['index']: s['id'] for s in self.sink_list},
+                            'source': {s['index']: s['id'] for s in self.source_list}}
+        info = self.server_info
+        self._default_device_ids = {'sink': info['default sink id'],
+                                    'source': info['default source id']}
+        @_ffi.callback("pa_context_subscribe_cb_t")
+        def subscribe_callback(context, event_type, index, userdata):
+            self._device_events.put((event_type, index))
+        self._subscribe_callback = subscribe_callback
+        self._pa_context_set_subscribe_callback(self.context, subscribe_callback, _ffi.NULL)
+        self._pa_context_subscribe(self.context,
+                                   _pa.PA_SUBSCRIPTION_MASK_SINK |
+                                   _pa.PA_SUBSCRIPTION_MASK_SOURCE |
+                                   _pa.PA_SUBSCRIPTION_MASK_SERVER,
+                                   _ffi.NULL, _ffi.NULL)
+        threading.Thread(target=self._dispatch_device_events, daemon=True).start()
+
+    def remove_device_callback(self, callback):
+        self._device_callbacks.remove(callback)
+
+    def _dispatch_device_events(self):
+        """Translate subscription events, and pass them on to all callbacks."""
+        while True:
+            event_type, index = self._device_events.get()
+            facility = event_type & _pa.PA_SUBSCRIPTION_EVENT_FACILITY_MASK
+            change = event_type & _pa.PA_SUBSCRIPTION_EVENT_TYPE_MASK
+            events = []
+            if facility == _pa.PA_SUBSCRIPTION_EVENT_SERVER:
+                info = self.server_info
+                for kind, device_class in [('sink', _Speaker), ('source', _Microphone)]:
+                    default_id = info['default {} id'.format(kind)]
+                    if default_id != self._default_device_ids[kind]:
+                        self._default_device_ids[kind] = default_id
+                        events.append(('default-changed', device_class(id=default_id)))
+            elif facility in (_pa.PA_SUBSCRIPTION_EVENT_SINK, _pa.PA_SUBSCRIPTION_EVENT_SOURCE):
+                if facility == _pa.PA_SUBSCRIPTION_EVENT_SINK:
+                    kind, device_class = 'sink', _Speaker
+                else:
+                    kind, device_class = 'source', _Microphone
+                if change == _pa.PA_SUBSCRIPTION_EVENT_REMOVE:
+                    device_id = self._device_ids[kind].pop(index, None)
+                    if device_id is not None:
+                        events.append(('removed', device_class(id=device_id)))
+                else:
+                    device_id = self._device_id(kind, index)
+                    if device_id is None: # already removed again
+                        continue
+                    self._device_ids[kind][index] = device_id
+                    if change == _pa.PA_SUBSCRIPTION_EVENT_NEW:
+                        events.append(('added', device_class(id=device_id)))
+                    else:
+                        events.append(('changed', device_class(id=device_id)))
+            for event, device in events:
+                for callback in list(self._device_callbacks):
+                    try:
+                        callback(event, device)
+                    except Exception:
+                        traceback.print_exc()
+
+    def upload_sample(self, name, data, samplerate):
+        """Upload audio data into the server's sample cache.
+
+        If `sample_cache_limit` is set, the least recently played
+        samples are removed to make room.
+
+        """
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        bytes = data.tobytes()
+
+        with self._samples_lock:
+            self._samples.pop(name, None)
+            while (self.sample_cache_limit is not None and self._samples and
+                   sum(self._samples.values()) + len(bytes) > self.sample_cache_limit):
+                evicted, _ = self._samples.popitem(last=False)
+                self._remove_sample(evicted)
+
+        samplespec = _ffi.new("pa_sample_spec*")
+        samplespec.format = _pa.PA_SAMPLE_FLOAT32LE
+        samplespec.rate = samplerate
+        samplespec.channels = data.shape[1]
+        if not self._pa_sample_spec_valid(samplespec):
+            raise RuntimeError('invalid sample spec')
+        stream = self._pa_stream_new(self.context, name.encode(), samplespec, _ffi.NULL)
+        if not stream:
+            errno = self._pa_context_errno(self.context)
+            raise RuntimeError("stream creation failed with error ", errno)
+        try:
+            if self._pa_stream_connect_upload(stream, len(bytes)) < 0:
+                raise RuntimeError('Uploading sample {} failed'.format(name))
+            while self._pa_stream_get_state(stream) not in [_pa.PA_STREAM_READY, _pa.PA_STREAM_FAILED]:
+                time.sleep(0.001)
+            if self._pa_stream_get_state(stream) == _pa.PA_STREAM_FAILED:
+                raise RuntimeError('Uploading sample {} failed'.format(name))
+            self._pa_stream_write(stream, bytes, len(bytes), _ffi.NULL, 0, _pa.PA_SEEK_RELATIVE)
+            self._pa_stream_finish_upload(stream)
+            # the stream terminates once the server has stored the sample:
+            while self._pa_stream_get_state(stream) not in [_pa.PA_STREAM_TERMINATED, _pa.PA_STREAM_FAILED]:
+                time.sleep(0.001)
+            if self._pa_stream_get_state(stream) == _pa.PA_STREAM_FAILED:
+                raise RuntimeError('Uploading sample {} failed'.format(name))
+        finally:
+            self._pa_stream_unref(stream)
+        with self._samples_lock:
+            self._samples[name] = len(bytes)
+
+    def play_sample(self, name, device, volume=None):
+        """Play a sample from the server's sample cache on a device."""
+        rv = None
+        @_ffi.callback("pa_context_success_cb_t")
+        def callback(context, success, userdata):
+            nonlocal rv
+            rv = success
+        # PA_VOLUME_INVALID plays at the sample's default volume:
+        pa_volume = _pa.pa_sw_volume_from_linear(volume) if volume is not None else 2**32-1
+        self._pa_context_play_sample(self.context, name.encode(),
+                                     device.encode() if device is not None else _ffi.NULL,
+                                     pa_volume, callback, _ffi.NULL)
+        if not rv:
+            raise RuntimeError('Playing sample {} failed'.format(name))
+        with self._samples_lock:
+            if name in self._samples:
+                self._samples.move_to_end(name)
+
+    def remove_sample(self, name):
+        """Remove a sample from the server's sample cache."""
+        with self._samples_lock:
+            self._samples.pop(name, None)
+        self._remove_sample(name)
+
+    def _remove_sample(self, name):
+        rv = None
+        @_ffi.callback("pa_context_success_cb_t")
+        def callback(context, success, userdata):
+            nonlocal rv
+            rv = success
+        self._pa_context_remove_sample(self.context, name.encode(), callback, _ffi.NULL)
+        if not rv:
+            raise RuntimeError('Removing sample {} failed'.format(name))
+
+    @property
+    def samples(self):
+        """Return a dict of all samples uploaded by this process, and their size in bytes."""
+        with self._samples_lock:
+            return dict(self._samples)
+
+    def locked(self):
         """Context manager for locking the mainloop.
 
         Hold this lock before calling any pulseaudio function while
-        the mainloop is running.
+        the mainloop is running. All `_pa_*` methods of this class
+        take the lock for a single call. To run a sequence of calls
+        under one lock acquisition, call the `_pa.pa_*` functions
+        directly within ``with _pulse.locked():``. The lock is
+        recursive, so `_pa_*` methods can be used within, too, except
+        for those that block on an operation, which would deadlock.
 
         """
+        return self._mainloop_lock
+
+    def enable_instrumentation(self, trace=False):
+        """Start collecting counters, and trace events if `trace`."""
+        self.instrumentation.trace = trace
+        self.instrumentation.enabled = True
+
+    def disable_instrumentation(self):
+        """Stop collecting counters and trace events."""
+        self.instrumentation.enabled = False
+        self.instrumentation.trace = False
 
-        class Lock():
-            def __enter__(self_):
-                _pa.pa_threaded_mainloop_lock(self.mainloop)
-            def __exit__(self_, exc_type, exc_value, traceback):
-                _pa.pa_threaded_mainloop_unlock(self.mainloop)
-        return Lock()
+    def stats(self):
+        """Return a dict of all instrumentation counters of this process."""
+        return self.instrumentation.snapshot()
 
     # create thread-safe versions of all used pulseaudio functions:
     _pa_context_get_source_info_list = _lock_and_block(_pa.pa_context_get_source_info_list)
@@ -260,6 +724,10 @@ class _PulseAudio:
     _pa_context_get_sink_info_by_name = _lock_and_block(_pa.pa_context_get_sink_info_by_name)
     _pa_context_get_client_info = _lock_and_block(_pa.pa_context_get_client_info)
     _pa_context_get_server_info = _lock_and_block(_pa.pa_context_get_server_info)
+    _pa_context_get_sink_info_by_index = _lock_and_block(_pa.pa_context_get_sink_info_by_index)
+    _pa_context_get_source_info_by_index = _lock_and_block(_pa.pa_context_get_source_info_by_index)
+    _pa_context_subscribe = _lock_and_block(_pa.pa_context_subscribe)
+    _pa_context_set_subscribe_callback = _lock(_pa.pa_context_set_subscribe_callback)
     _pa_context_get_index = _lock(_pa.pa_context_get_index)
     _pa_context_get_state = _lock(_pa.pa_context_get_state)
     _pa_context_set_name = _lock_and_block(_pa.pa_context_set_name)
@@ -270,9 +738,22 @@ class _PulseAudio:
     _pa_operation_get_state = _lock(_pa.pa_operation_get_state)
     _pa_operation_unref = _lock(_pa.pa_operation_unref)
     _pa_stream_get_state = _lock(_pa.pa_stream_get_state)
+    _pa_stream_get_index = _lock(_pa.pa_stream_get_index)
+    _pa_context_move_sink_input_by_name = _lock_and_block(_pa.pa_context_move_sink_input_by_name)
+    _pa_context_get_sink_input_info = _lock_and_block(_pa.pa_context_get_sink_input_info)
+    _pa_context_get_sink_input_info_list = _lock_and_block(_pa.pa_context_get_sink_input_info_list)
+    _pa_stream_set_monitor_stream = _lock(_pa.pa_stream_set_monitor_stream)
+    _pa_context_get_source_output_info = _lock_and_block(_pa.pa_context_get_source_output_info)
+    _pa_context_set_sink_input_volume = _lock_and_block(_pa.pa_context_set_sink_input_volume)
+    _pa_context_set_sink_input_mute = _lock_and_block(_pa.pa_context_set_sink_input_mute)
+    _pa_context_set_source_output_volume = _lock_and_block(_pa.pa_context_set_source_output_volume)
+    _pa_context_set_source_output_mute = _lock_and_block(_pa.pa_context_set_source_output_mute)
+    _pa_context_move_source_output_by_name = _lock_and_block(_pa.pa_context_move_source_output_by_name)
     _pa_sample_spec_valid = _lock(_pa.pa_sample_spec_valid)
     _pa_stream_new = _lock(_pa.pa_stream_new)
     _pa_stream_get_channel_map = _lock(_pa.pa_stream_get_channel_map)
+    _pa_stream_get_buffer_attr = _lock(_pa.pa_stream_get_buffer_attr)
+    _pa_stream_set_buffer_attr = _lock_and_block(_pa.pa_stream_set_buffer_attr)
     _pa_stream_drain = _lock_and_block(_pa.pa_stream_drain)
     _pa_stream_disconnect = _lock(_pa.pa_stream_disconnect)
     _pa_stream_unref = _lock(_pa.pa_stream_unref)
@@ -286,6 +767,14 @@ class _PulseAudio:
     _pa_stream_writable_size = _lock(_pa.pa_stream_writable_size)
     _pa_stream_write = _lock(_pa.pa_stream_write)
     _pa_stream_set_read_callback = _pa.pa_stream_set_read_callback
+    _pa_stream_set_write_callback = _lock(_pa.pa_stream_set_write_callback)
+    _pa_stream_set_state_callback = _lock(_pa.pa_stream_set_state_callback)
+    _pa_stream_connect_upload = _lock(_pa.pa_stream_connect_upload)
+    _pa_stream_finish_upload = _lock(_pa.pa_stream_finish_upload)
+    _pa_context_play_sample = _lock_and_block(_pa.pa_context_play_sample)
+    _pa_context_remove_sample = _lock_and_block(_pa.pa_context_remove_sample)
+    _pa_stream_set_underflow_callback = _lock(_pa.pa_stream_set_underflow_callback)
+    _pa_stream_set_overflow_callback = _lock(_pa.pa_stream_set_overflow_callback)
 
 _pulse = _PulseAudio()
 atexit.register(_pulse._shutdown)
@@ -301,14 +790,24 @@ def all_speakers():
     return [_Speaker(id=s['id']) for s in _pulse.sink_list]
 
 
-def default_speaker():
+def default_speaker(follow=False):
     """The default speaker of the system.
 
+    Parameters
+    ----------
+    follow : bool, optional
+        Linux only: instead of the current default speaker, return a
+        speaker that always refers to the default speaker. Players of
+        this speaker are not pinned to a device, and are moved by the
+        server whenever the default speaker changes.
+
     Returns
     -------
     speaker : _Speaker
 
     """
+    if follow:
+        return _Speaker(id=None)
     name = _pulse.server_info['default sink id']
     return get_speaker(name)
 
@@ -361,13 +860,24 @@ def all_microphones(include_loopback=False, exclude_monitors=True):
         return mics
 
 
-def default_microphone():
+def default_microphone(follow=False):
     """The default microphone of the system.
 
+    Parameters
+    ----------
+    follow : bool, optional
+        Linux only: instead of the current default microphone, return
+        a microphone that always refers to the default microphone.
+        Recorders of this microphone are not pinned to a device, and
+        are moved by the server whenever the default microphone
+        changes.
+
     Returns
     -------
     microphone : _Microphone
     """
+    if follow:
+        return _Microphone(id=None)
     name = _pulse.server_info['default source id']
     return get_microphone(name, include_loopback=True)
 
@@ -401,6 +911,321 @@ def get_microphone(id, include_loopback=False, exclude_monitors=True):
     return _Microphone(id=_match_soundcard(id, microphones, include_loopback)['id'])
 
 
+def all_application_streams():
+    """A list of all audio streams that applications are playing.
+
+    Each application stream can be recorded on its own, without the
+    audio of other applications that play on the same speaker.
+
+    .. note::
+       Currently only works on Linux.
+
+    Returns
+    -------
+    streams : list(_ApplicationStream)
+
+    """
+    return [_ApplicationStream(id=s['index']) for s in _pulse.sink_input_list]
+
+
+def get_application_stream(id):
+    """Get a specific application stream by a variety of means.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    id : int or str
+        can be a stream index, a substring of the application name or
+        stream name, or a fuzzy-matched pattern for either.
+
+    Returns
+    -------
+    stream : _ApplicationStream
+
+    """
+    streams = _pulse.sink_input_list
+    if isinstance(id, int):
+        for stream in streams:
+            if stream['index'] == id:
+                return _ApplicationStream(id=id)
+        raise IndexError('no application stream with id {}'.format(id))
+    names = []
+    for stream in streams:
+        for name in [stream['application'], stream['name']]:
+            if name is not None:
+                names.append(dict(id=stream['index'], name=name))
+    return _ApplicationStream(id=_match_soundcard(id, names, include_loopback=True)['id'])
+
+
+def on_device_change(callback):
+    """Get notified when speakers or microphones change.
+
+    `callback` is called as ``callback(event, device)`` whenever a
+    device is added, removed, or changed, or when the default device
+    changes. `event` is one of ``'added'``, ``'removed'``,
+    ``'changed'``, or ``'default-changed'``, and `device` is the
+    affected :class:`_Speaker` or :class:`_Microphone` (for
+    ``'default-changed'``, the new default device). Removed devices
+    can no longer be queried for their name or channels.
+
+    Callbacks are called from a background thread. This can be used
+    as a decorator.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    callback : callable
+
+    Returns
+    -------
+    callback : callable
+    """
+    _pulse.add_device_callback(callback)
+    return callback
+
+
+def remove_device_change_callback(callback):
+    """Stop calling a callback registered with :func:`on_device_change`.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    callback : callable
+    """
+    _pulse.remove_device_callback(callback)
+
+
+def upload_sample(name, data, samplerate):
+    """Upload audio data into the sound server's sample cache.
+
+    Cached samples can be played with :func:`_Speaker.play_sample`
+    with almost no overhead, since the data is not transferred again.
+    Uploading a sample with an existing name replaces that sample.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    name : str
+        The name of the sample.
+    data : numpy array
+        The audio data. Must be a *frames x channels* Numpy array.
+    samplerate : int
+        The sampling rate of the data in Hz.
+    """
+    _pulse.upload_sample(name, data, samplerate)
+
+
+def remove_sample(name):
+    """Remove a sample from the sound server's sample cache.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    name : str
+        The name of the sample.
+    """
+    _pulse.remove_sample(name)
+
+
+def set_sample_cache_limit(nbytes):
+    """Limit the size of samples uploaded by :func:`upload_sample`.
+
+    If an upload would exceed the limit, the least recently played
+    samples are removed from the cache first.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    nbytes : int or None
+        The maximum total size of all uploaded samples in bytes, or
+        ``None`` for no limit.
+    """
+    _pulse.sample_cache_limit = nbytes
+
+
+def enable_instrumentation(trace=False):
+    """Start collecting performance counters.
+
+    Counters include mainloop lock acquisitions and wait times, sleep
+    iterations, bytes written and read, peek and drop calls, and time
+    spent converting data. They can be queried for the whole process
+    with :func:`instrumentation_stats`, and for a single stream with
+    :func:`_Player.stats` or :func:`_Recorder.stats`.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    trace : bool
+        Additionally record timed events, which can be saved with
+        :func:`export_trace`.
+    """
+    _pulse.enable_instrumentation(trace)
+
+
+def disable_instrumentation():
+    """Stop collecting performance counters.
+
+    .. note::
+       Currently only works on Linux.
+    """
+    _pulse.disable_instrumentation()
+
+
+def instrumentation_stats():
+    """Get the performance counters of all streams.
+
+    .. note::
+       Currently only works on Linux.
+
+    Returns
+    -------
+    stats : dict
+    """
+    return _pulse.stats()
+
+
+def export_trace(filename):
+    """Save recorded trace events as a Chrome trace JSON file.
+
+    The file can be opened in ``chrome://tracing`` or Perfetto.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    filename : str
+    """
+    _pulse.instrumentation.export_trace(filename)
+
+
+def wait(streams, timeout=None):
+    """Wait until any of several streams can be read or written.
+
+    This lets a single thread serve many players and recorders. A
+    recorder is ready if :attr:`readable_frames` is not zero, and a
+    player is ready if :attr:`writable_frames` is not zero. Failed
+    streams are ready as well, so that reading or writing them raises
+    an error.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    streams : list(_Player or _Recorder)
+        The streams to wait for.
+    timeout : float, optional
+        The maximum time to wait in seconds. Waits forever if None.
+
+    Returns
+    -------
+    ready : list(_Player or _Recorder)
+        The streams that are ready, or an empty list after a timeout.
+
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        generation = _pulse.readiness.generation
+        ready = [stream for stream in streams if stream._is_ready()]
+        if ready:
+            return ready
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            return []
+        _pulse.readiness.wait(generation, remaining)
+
+
+def simple_play(data, samplerate, speaker=None, channels=None, blocksize=None,
+                latency=None, buffer_attr=None):
+    """Play some audio data through a blocking pa_simple connection.
+
+    Unlike ``play(..., simple=True)`` of a speaker, this never uses
+    the shared threaded mainloop, so a process that only calls
+    :func:`simple_play` and :func:`simple_record` never starts the
+    mainloop thread or its context.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    data : numpy array
+        The audio data to play. Must be a *frames x channels* Numpy array.
+    samplerate : int
+        The desired sampling rate in Hz
+    speaker : str, optional
+        The pulseaudio name of the sink to play on. Defaults to the
+        default sink.
+    channels : {int, list(int)}, optional
+        Play on these channels. Defaults to the channels of ``data``.
+    blocksize : int
+        Will play this many samples at a time.
+    latency : float, optional
+        The desired latency in seconds.
+    buffer_attr : dict, optional
+        Explicit pulseaudio buffer attributes in frames.
+    """
+    if channels is None:
+        channels = numpy.shape(data)[1] if numpy.ndim(data) == 2 else 1
+    with _SimplePlayer(speaker, samplerate, channels, blocksize,
+                       latency=latency, buffer_attr=buffer_attr) as s:
+        s.play(data)
+
+
+def simple_record(numframes, samplerate, channels, microphone=None, blocksize=None,
+                  latency=None, buffer_attr=None):
+    """Record some audio data through a blocking pa_simple connection.
+
+    Unlike ``record(..., simple=True)`` of a microphone, this never
+    uses the shared threaded mainloop, see :func:`simple_play`.
+
+    .. note::
+       Currently only works on Linux.
+
+    Parameters
+    ----------
+    numframes: int
+        The number of frames to record.
+    samplerate : int
+        The desired sampling rate in Hz
+    channels : {int, list(int)}
+        Record on these channels.
+    microphone : str, optional
+        The pulseaudio name of the source to record from, such as
+        ``'<sink name>.monitor'`` for a loopback. Defaults to the
+        default source.
+    blocksize : int
+        Will record this many samples at a time.
+    latency : float, optional
+        The desired latency in seconds.
+    buffer_attr : dict, optional
+        Explicit pulseaudio buffer attributes in frames.
+
+    Returns
+    -------
+    data : numpy array
+        The recorded audio data. Will be a *frames x channels* Numpy array.
+    """
+    with _SimpleRecorder(microphone, samplerate, channels, blocksize,
+                         latency=latency, buffer_attr=buffer_attr) as r:
+        return r.record(numframes)
+
+
 def _match_soundcard(id, soundcards, include_loopback=False):
     """Find id in a list of soundcards.
 
@@ -473,7 +1298,11 @@ class _SoundCard:
 
     @property
     def id(self):
-        """object: A backend-dependent unique ID."""
+        """object: A backend-dependent unique ID.
+
+        ``None`` for a soundcard that follows the default device.
+
+        """
         return self._id
 
     @property
@@ -482,6 +1311,8 @@ class _SoundCard:
         return self._get_info()['name']
 
     def _get_info(self):
+        if self._id is None:
+            return _pulse.source_info(_pulse.server_info['default source id'])
         return _pulse.source_info(self._id)
 
 
@@ -501,7 +1332,8 @@ class _Speaker(_SoundCard):
     def __repr__(self):
         return '<Speaker {} ({} channels)>'.format(self.name, self.channels)
 
-    def player(self, samplerate, channels=None, blocksize=None):
+    def player(self, samplerate, channels=None, blocksize=None,
+               latency=None, buffer_attr=None, low_latency=False, adaptive=False, volume=None):
         """Create Player for playing audio.
 
         Parameters
@@ -521,6 +1353,29 @@ class _Speaker(_SoundCard):
             Windows only: open sound card in exclusive mode, which
             might be necessary for short block lengths or high
             sample rates or optimal performance. Default is ``False``.
+        latency : float, optional
+            Linux only: the desired latency in seconds. This sets the
+            server-side buffer length, and overrides the buffer length
+            derived from ``blocksize``.
+        buffer_attr : dict, optional
+            Linux only: explicit pulseaudio buffer attributes
+            ``maxlength``, ``tlength``, ``prebuf``, ``minreq``, and
+            ``fragsize``, in frames. These override the values derived
+            from ``blocksize`` and ``latency``.
+        low_latency : bool, optional
+            Linux only: request data in small fragments as early as
+            possible, instead of at the last possible moment. This
+            trades CPU usage for lower latency. Without ``latency``
+            or ``blocksize``, this targets a latency of 20 ms.
+            Default is ``False``.
+        adaptive : bool, optional
+            Linux only: start with a small buffer, and adjust the
+            buffer length at runtime to the smallest latency that plays
+            without underflows. ``latency`` is used as the starting
+            point, if given. Default is ``False``.
+        volume : float, optional
+            Linux only: the initial linear volume between 0 and 1,
+            applied by the server. Defaults to the server's choice.
 
         Returns
         -------
@@ -528,9 +1383,12 @@ class _Speaker(_SoundCard):
         """
         if channels is None:
             channels = self.channels
-        return _Player(self._id, samplerate, channels, blocksize)
+        return _Player(self._id, samplerate, channels, blocksize,
+                       latency=latency, buffer_attr=buffer_attr, low_latency=low_latency,
+                       adaptive=adaptive, volume=volume)
 
-    def play(self, data, samplerate, channels=None, blocksize=None):
+    def play(self, data, samplerate, channels=None, blocksize=None,
+             latency=None, buffer_attr=None, low_latency=False, volume=None, simple=False):
         """Play some audio data.
 
         Parameters
@@ -548,30 +1406,105 @@ class _Speaker(_SoundCard):
         blocksize : int
             Will play this many samples at a time. Choose a lower
             block size for lower latency and more CPU usage.
+        latency : float, optional
+            Linux only: the desired latency in seconds. This sets the
+            server-side buffer length, and overrides the buffer length
+            derived from ``blocksize``.
+        buffer_attr : dict, optional
+            Linux only: explicit pulseaudio buffer attributes
+            ``maxlength``, ``tlength``, ``prebuf``, ``minreq``, and
+            ``fragsize``, in frames. These override the values derived
+            from ``blocksize`` and ``latency``.
+        low_latency : bool, optional
+            Linux only: request data in small fragments as early as
+            possible, instead of at the last possible moment. This
+            trades CPU usage for lower latency. Without ``latency``
+            or ``blocksize``, this targets a latency of 20 ms.
+            Default is ``False``.
+        volume : float, optional
+            Linux only: the initial linear volume between 0 and 1,
+            applied by the server. Defaults to the server's choice.
+        simple : bool, optional
+            Linux only: play through a blocking pa_simple connection
+            instead of the shared threaded mainloop. This has less
+            overhead for sequential playback, but does not support
+            ``low_latency`` or ``volume``. Default is ``False``.
+            The speaker itself still queries the server through the
+            mainloop; use :func:`simple_play` to avoid the mainloop
+            entirely.
         """
         if channels is None:
             channels = self.channels
-        with _Player(self._id, samplerate, channels, blocksize) as s:
+        if simple:
+            with _SimplePlayer(self._id, samplerate, channels, blocksize,
+                               latency=latency, buffer_attr=buffer_attr) as s:
+                s.play(data)
+            return
+        with _Player(self._id, samplerate, channels, blocksize,
+                     latency=latency, buffer_attr=buffer_attr, low_latency=low_latency,
+                     volume=volume) as s:
             s.play(data)
 
-    def _get_info(self):
-        return _pulse.sink_info(self._id)
+    def play_sample(self, name, volume=None):
+        """Play a sample from the sound server's sample cache.
 
+        Samples must be uploaded with :func:`upload_sample` first.
+        This returns immediately, and does not open a stream.
 
-class _Microphone(_SoundCard):
-    """A soundcard input. Can be used to record audio.
+        .. note::
+           Currently only works on Linux.
 
-    Use the :func:`record` method to record one piece of audio, or use
-    the :func:`recorder` method to get a context manager for recording
-    continuous audio.
+        Parameters
+        ----------
+        name : str
+            The name of the sample.
+        volume : float, optional
+            Linear volume between 0 and 1. Defaults to the default
+            volume of the sample.
+        """
+        _pulse.play_sample(name, self._id, volume)
 
-    Multiple calls to :func:`record` record immediately and
-    concurrently, while the :func:`recorder` schedules multiple pieces
-    of audio to be recorded one after another.
+    def meter(self, rate=25):
+        """Create Meter for measuring the level of the audio output.
 
-    """
+        The meter records the peak levels of this speaker's output, as
+        computed by the server. This is far cheaper than recording the
+        output with a loopback microphone and computing the levels.
 
-    def __repr__(self):
+        .. note::
+           Currently only works on Linux.
+
+        Parameters
+        ----------
+        rate : int, optional
+            The number of peak values per second. Default is 25.
+
+        Returns
+        -------
+        meter : _Meter
+        """
+        return _Meter(self._get_info()['monitor_source'], rate)
+
+    def _get_info(self):
+        if self._id is None:
+            return _pulse.sink_info(_pulse.server_info['default sink id'])
+        return _pulse.sink_info(self._id)
+
+
+class _Microphone(_SoundCard, _SharedRecorderMixin):
+    """A soundcard input. Can be used to record audio.
+
+    Use the :func:`record` method to record one piece of audio, or use
+    the :func:`recorder` method to get a context manager for recording
+    continuous audio.
+
+    Multiple calls to :func:`record` record immediately and
+    concurrently, while the :func:`recorder` schedules multiple pieces
+    of audio to be recorded one after another.
+
+    """
+
+    def __repr__(self):
         if self.isloopback:
             return '<Loopback {} ({} channels)>'.format(self.name, self.channels)
         else:
@@ -582,7 +1515,8 @@ class _Microphone(_SoundCard):
         """bool : Whether this microphone is recording a speaker."""
         return self._get_info()['device.class'] == 'monitor'
 
-    def recorder(self, samplerate, channels=None, blocksize=None):
+    def recorder(self, samplerate, channels=None, blocksize=None,
+                 latency=None, buffer_attr=None, low_latency=False, volume=None):
         """Create Recorder for recording audio.
 
         Parameters
@@ -602,6 +1536,24 @@ class _Microphone(_SoundCard):
             Windows only: open sound card in exclusive mode, which
             might be necessary for short block lengths or high
             sample rates or optimal performance. Default is ``False``.
+        latency : float, optional
+            Linux only: the desired latency in seconds. This sets the
+            server-side buffer length, and overrides the buffer length
+            derived from ``blocksize``.
+        buffer_attr : dict, optional
+            Linux only: explicit pulseaudio buffer attributes
+            ``maxlength``, ``tlength``, ``prebuf``, ``minreq``, and
+            ``fragsize``, in frames. These override the values derived
+            from ``blocksize`` and ``latency``.
+        low_latency : bool, optional
+            Linux only: request data in small fragments as early as
+            possible, instead of at the last possible moment. This
+            trades CPU usage for lower latency. Without ``latency``
+            or ``blocksize``, this targets a latency of 20 ms.
+            Default is ``False``.
+        volume : float, optional
+            Linux only: the initial linear volume between 0 and 1,
+            applied by the server. Defaults to the server's choice.
 
         Returns
         -------
@@ -609,9 +1561,35 @@ class _Microphone(_SoundCard):
         """
         if channels is None:
             channels = self.channels
-        return _Recorder(self._id, samplerate, channels, blocksize)
+        id, monitor_stream = self._record_source()
+        return _Recorder(id, samplerate, channels, blocksize,
+                         latency=latency, buffer_attr=buffer_attr, low_latency=low_latency,
+                         volume=volume, monitor_stream=monitor_stream)
+
+    def meter(self, rate=25):
+        """Create Meter for measuring the level of the audio input.
+
+        The meter records the peak levels of this microphone, as
+        computed by the server. This is far cheaper than recording the
+        audio at full rate and computing the levels.
 
-    def record(self, numframes, samplerate, channels=None, blocksize=None):
+        .. note::
+           Currently only works on Linux.
+
+        Parameters
+        ----------
+        rate : int, optional
+            The number of peak values per second. Default is 25.
+
+        Returns
+        -------
+        meter : _Meter
+        """
+        id, monitor_stream = self._record_source()
+        return _Meter(id, rate, monitor_stream=monitor_stream)
+
+    def record(self, numframes, samplerate, channels=None, blocksize=None,
+               latency=None, buffer_attr=None, low_latency=False, volume=None, simple=False):
         """Record some audio data.
 
         Parameters
@@ -629,17 +1607,103 @@ class _Microphone(_SoundCard):
         blocksize : int
             Will record this many samples at a time. Choose a lower
             block size for lower latency and more CPU usage.
+        latency : float, optional
+            Linux only: the desired latency in seconds. This sets the
+            server-side buffer length, and overrides the buffer length
+            derived from ``blocksize``.
+        buffer_attr : dict, optional
+            Linux only: explicit pulseaudio buffer attributes
+            ``maxlength``, ``tlength``, ``prebuf``, ``minreq``, and
+            ``fragsize``, in frames. These override the values derived
+            from ``blocksize`` and ``latency``.
+        low_latency : bool, optional
+            Linux only: request data in small fragments as early as
+            possible, instead of at the last possible moment. This
+            trades CPU usage for lower latency. Without ``latency``
+            or ``blocksize``, this targets a latency of 20 ms.
+            Default is ``False``.
+        volume : float, optional
+            Linux only: the initial linear volume between 0 and 1,
+            applied by the server. Defaults to the server's choice.
+        simple : bool, optional
+            Linux only: record through a blocking pa_simple connection
+            instead of the shared threaded mainloop. This has less
+            overhead for sequential recording, but requires
+            ``numframes``, and does not support ``low_latency``,
+            ``volume``, or application streams. Default is ``False``.
+            The microphone itself still queries the server through
+            the mainloop; use :func:`simple_record` to avoid the
+            mainloop entirely.
 
         Returns
         -------
         data : numpy array
             The recorded audio data. Will be a *frames x channels* Numpy array.
         """
-        if channels is None:
-            channels = self.channels
-        with _Recorder(self._id, samplerate, channels, blocksize) as r:
+        if simple:
+            id, monitor_stream = self._record_source()
+            if monitor_stream is not None:
+                raise TypeError('application streams can not be recorded with simple=True')
+            if numframes is None:
+                raise TypeError('numframes is required with simple=True')
+            if channels is None:
+                channels = self.channels
+            with _SimpleRecorder(id, samplerate, channels, blocksize,
+                                 latency=latency, buffer_attr=buffer_attr) as r:
+                return r.record(numframes)
+        with self.recorder(samplerate, channels, blocksize,
+                           latency=latency, buffer_attr=buffer_attr, low_latency=low_latency,
+                           volume=volume) as r:
             return r.record(numframes)
 
+    def _record_source(self):
+        """Return the source id and sink input index to record from."""
+        return self._id, None
+
+
+class _ApplicationStream(_Microphone):
+    """The audio output of a single application. Can be used to record audio.
+
+    Recording an application stream records only the audio of this
+    stream, as it is played on its speaker, instead of the mix of all
+    audio on that speaker. Application streams can be listed with
+    :func:`all_application_streams`.
+
+    Use the :func:`record` method to record one piece of audio, or use
+    the :func:`recorder` method to get a context manager for recording
+    continuous audio.
+
+    .. note::
+       Currently only works on Linux.
+
+    """
+
+    def __repr__(self):
+        return '<ApplicationStream {} ({} channels)>'.format(self.name, self.channels)
+
+    @property
+    def isloopback(self):
+        """bool : Whether this microphone is recording a speaker."""
+        return True
+
+    @property
+    def application(self):
+        """str: The name of the application that plays this stream."""
+        return self._get_info()['application']
+
+    def _get_info(self):
+        return _pulse.sink_input_info(self._id)
+
+    def _record_source(self):
+        sink = _pulse._device_id('sink', self._get_info()['sink'])
+        return _pulse.sink_info(sink)['monitor_source'], self._id
+
+
+_buffer_attr_names = ['maxlength', 'tlength', 'prebuf', 'minreq', 'fragsize']
+
+# target latency in seconds of low_latency streams without latency or blocksize:
+_low_latency_default = 0.02
+
 
 class _Stream:
     """A context manager for an active audio stream.
@@ -648,19 +1712,45 @@ class _Stream:
     `_connect_stream` method which takes a `pa_buffer_attr*` struct,
     and connects an appropriate stream.
 
+    The server-side buffering is configured by `blocksize`, `latency`
+    (in seconds), and `buffer_attr` (a dict of pulseaudio buffer
+    attributes in frames), in increasing order of precedence. Any
+    attribute that is not configured is chosen by the server. With
+    `low_latency`, the server requests data as early as possible in
+    small fragments, for a latency of 20 ms unless `latency` or
+    `blocksize` say otherwise.
+
+    The volume and mute state of the stream are applied by the server,
+    and can be changed at any time through :attr:`volume` and
+    :attr:`mute`, without any processing of the audio data.
+
     This context manager can only be entered once, and can not be used
     after it is closed.
 
     """
 
-    def __init__(self, id, samplerate, channels, blocksize=None, name='outputstream'):
+    def __init__(self, id, samplerate, channels, blocksize=None, name='outputstream',
+                 latency=None, buffer_attr=None, low_latency=False, volume=None):
         self._id = id
+        self._volume = volume
         self._samplerate = samplerate
         self._name = name
         self._blocksize = blocksize
+        self._latency = latency
+        self._buffer_attr = dict(buffer_attr or {})
+        unknown_attributes = set(self._buffer_attr) - set(_buffer_attr_names)
+        if unknown_attributes:
+            raise TypeError('unknown buffer attributes {}'.format(', '.join(sorted(unknown_attributes))))
+        if low_latency and latency is None and blocksize is None:
+            # otherwise, the server would choose a buffer of about two seconds:
+            self._latency = _low_latency_default
+        # PA_STREAM_EARLY_REQUESTS can not be combined with PA_STREAM_ADJUST_LATENCY:
+        self._flags = _pa.PA_STREAM_EARLY_REQUESTS if low_latency else _pa.PA_STREAM_ADJUST_LATENCY
         self.channels = channels
+        self._counters = collections.Counter()
 
-    def __enter__(self):
+    def _make_sample_spec(self):
+        """Create the `pa_sample_spec*` and `pa_channel_map*` of the stream."""
         samplespec = _ffi.new("pa_sample_spec*")
         samplespec.format = _pa.PA_SAMPLE_FLOAT32LE
         samplespec.rate = self._samplerate
@@ -670,7 +1760,8 @@ class _Stream:
             samplespec.channels = self.channels
         else:
             raise TypeError('channels must be iterable or integer')
-        if not _pulse._pa_sample_spec_valid(samplespec):
+        # validating does not need the mainloop, which pa_simple streams never start:
+        if not _pa.pa_sample_spec_valid(samplespec):
             raise RuntimeError('invalid sample spec')
 
         # pam and channelmap refer to the same object, but need different
@@ -687,19 +1778,22 @@ class _Stream:
 
         if not _pa.pa_channel_map_valid(channelmap):
             raise RuntimeError('invalid channel map')
+        return samplespec, pam
 
+    def __enter__(self):
+        samplespec, channelmap = self._make_sample_spec()
         self.stream = _pulse._pa_stream_new(_pulse.context, self._name.encode(), samplespec, channelmap)
         if not self.stream:
             errno = _pulse._pa_context_errno(_pulse.context)
             raise RuntimeError("stream creation failed with error ", errno)
-        bufattr = _ffi.new("pa_buffer_attr*")
-        bufattr.maxlength = 2**32-1 # max buffer length
         numchannels = self.channels if isinstance(self.channels, int) else len(self.channels)
-        bufattr.fragsize = self._blocksize*numchannels*4 if self._blocksize else 2**32-1 # recording block sys.getsizeof()
-        bufattr.minreq = 2**32-1 # start requesting more data at this bytes
-        bufattr.prebuf = 2**32-1 # start playback after this bytes are available
-        bufattr.tlength = self._blocksize*numchannels*4 if self._blocksize else 2**32-1 # buffer length in bytes on server
-        self._connect_stream(bufattr)
+        @_ffi.callback("pa_stream_notify_cb_t")
+        def state_callback(stream, userdata):
+            # wake up waiters, so they notice failed streams:
+            _pulse.readiness.notify()
+        self._state_callback = state_callback
+        _pulse._pa_stream_set_state_callback(self.stream, state_callback, _ffi.NULL)
+        self._connect_stream(self._make_buffer_attr(numchannels * 4))
         while _pulse._pa_stream_get_state(self.stream) not in [_pa.PA_STREAM_READY, _pa.PA_STREAM_FAILED]:
             time.sleep(0.01)
         if _pulse._pa_stream_get_state(self.stream) == _pa.PA_STREAM_FAILED:
@@ -709,6 +1803,41 @@ class _Stream:
         self.channels = int(channel_map.channels)
         return self
 
+    def _make_buffer_attr(self, framesize):
+        """Create the `pa_buffer_attr*` for connecting the stream.
+
+        All values are in bytes. ``2**32-1`` lets the server choose.
+
+        """
+        bufattr = _ffi.new("pa_buffer_attr*")
+        bufattr.maxlength = 2**32-1 # max buffer length
+        bufattr.fragsize = self._blocksize*framesize if self._blocksize else 2**32-1 # recording block sys.getsizeof()
+        bufattr.minreq = 2**32-1 # start requesting more data at this bytes
+        bufattr.prebuf = 2**32-1 # start playback after this bytes are available
+        bufattr.tlength = self._blocksize*framesize if self._blocksize else 2**32-1 # buffer length in bytes on server
+        if self._latency is not None:
+            latency = max(1, int(self._latency * self._samplerate)) * framesize
+            bufattr.tlength = latency
+            bufattr.fragsize = latency
+            if self._blocksize:
+                bufattr.minreq = self._blocksize*framesize
+        if self._flags & _pa.PA_STREAM_EARLY_REQUESTS and bufattr.tlength != 2**32-1:
+            # request data in fragments, as soon as a fragment is free:
+            if bufattr.minreq == 2**32-1:
+                bufattr.minreq = max(framesize, bufattr.tlength // 4 // framesize * framesize)
+            bufattr.fragsize = bufattr.minreq
+        for name, frames in self._buffer_attr.items():
+            setattr(bufattr, name, 2**32-1 if frames is None or frames < 0 else int(frames)*framesize)
+        return bufattr
+
+    @property
+    def buffer_attr(self):
+        """dict : The server-side buffer attributes in frames (only available on Linux)"""
+        attr = _pulse._pa_stream_get_buffer_attr(self.stream)
+        framesize = 4 * self.channels
+        return {name: getattr(attr, name) // framesize if getattr(attr, name) != 2**32-1 else None
+                for name in _buffer_attr_names}
+
     def __exit__(self, exc_type, exc_value, traceback):
         if isinstance(self, _Player): # only playback streams need to drain
             _pulse._pa_stream_drain(self.stream, _ffi.NULL, _ffi.NULL)
@@ -725,6 +1854,102 @@ class _Stream:
         _pulse._pa_stream_get_latency(self.stream, microseconds, _ffi.NULL)
         return microseconds[0] / 1000000 # 1_000_000 (3.5 compat)
 
+    def _cvolume(self, volume):
+        """Create a `pa_cvolume*` with the same linear volume on all channels."""
+        cvolume = _ffi.new("pa_cvolume*")
+        _pa.pa_cvolume_set(cvolume, self.channels if isinstance(self.channels, int) else len(self.channels),
+                           _pa.pa_sw_volume_from_linear(volume))
+        return cvolume
+
+    def _stream_info(self):
+        """Return the server's volume and mute state of the stream."""
+        info = []
+        def callback(context, stream_info, eol, userdata):
+            if not eol:
+                values = [stream_info.volume.values[idx] for idx in range(stream_info.volume.channels)]
+                info.append(dict(volume=_pa.pa_sw_volume_to_linear(sum(values) // max(1, len(values))),
+                                 mute=bool(stream_info.mute)))
+        callback = _ffi.callback(self._info_callback_type, callback)
+        self._get_stream_info(_pulse.context, _pulse._pa_stream_get_index(self.stream), callback, _ffi.NULL)
+        return info[0]
+
+    def _set_stream_property(self, name, set_function, value):
+        rv = None
+        @_ffi.callback("pa_context_success_cb_t")
+        def callback(context, success, userdata):
+            nonlocal rv
+            rv = success
+        set_function(_pulse.context, _pulse._pa_stream_get_index(self.stream), value, callback, _ffi.NULL)
+        if not rv:
+            raise RuntimeError('Changing the {} of the stream failed'.format(name))
+
+    @property
+    def volume(self):
+        """float : Linear volume of the stream, applied by the server (only available on Linux)"""
+        return self._stream_info()['volume']
+
+    @volume.setter
+    def volume(self, volume):
+        self._set_stream_property('volume', self._set_stream_volume, self._cvolume(volume))
+
+    @property
+    def mute(self):
+        """bool : Whether the stream is muted by the server (only available on Linux)"""
+        return self._stream_info()['mute']
+
+    @mute.setter
+    def mute(self, mute):
+        self._set_stream_property('mute state', self._set_stream_mute, int(bool(mute)))
+
+    def _device_name(self):
+        """The device to connect to, or NULL to let the server choose the default."""
+        return self._id.encode() if self._id is not None else _ffi.NULL
+
+    def _move(self, move_function, device_id):
+        """Move the stream to another device, keeping its buffers and state."""
+        rv = None
+        @_ffi.callback("pa_context_success_cb_t")
+        def callback(context, success, userdata):
+            nonlocal rv
+            rv = success
+        index = _pulse._pa_stream_get_index(self.stream)
+        move_function(_pulse.context, index, device_id.encode(), callback, _ffi.NULL)
+        if not rv:
+            raise RuntimeError('Moving stream to {} failed'.format(device_id))
+        self._id = device_id
+
+    def stats(self):
+        """Return a dict of the instrumentation counters of this stream.
+
+        Counters are only collected while instrumentation is enabled
+        (see :func:`enable_instrumentation`).
+
+        """
+        return _pulse.instrumentation.snapshot(self._counters)
+
+    def _failed(self):
+        return _pulse._pa_stream_get_state(self.stream) == _pa.PA_STREAM_FAILED
+
+    def _is_ready(self):
+        """Whether :func:`wait` should return this stream."""
+        raise TypeError('{} can not be used with wait()'.format(type(self).__name__))
+
+    def _count(self, name, value=1):
+        _pulse.instrumentation.count(name, value, self._counters)
+
+    def _prepare_data(self, data):
+        """Convert data to a C-contiguous float32 *frames × channels* array."""
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        if data.shape[1] == 1 and self.channels != 1:
+            data = numpy.tile(data, [1, self.channels])
+        if data.shape[1] != self.channels:
+            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        return data
+
 
 class _Player(_Stream):
     """A context manager for an active output stream.
@@ -734,14 +1959,177 @@ class _Player(_Stream):
     Successive calls to :func:`play` will queue up the audio one piece
     after another. If no audio is queued up, this will play silence.
 
+    In adaptive mode, the player starts with a small server buffer.
+    Whenever the buffer underflows or runs almost empty, it grows the
+    buffer. After a period without problems, it tries a smaller buffer
+    again, but never goes below a latency that caused an underflow
+    recently. Use :attr:`target_latency` to monitor the result.
+
     This context manager can only be entered once, and can not be used
     after it is closed.
 
     """
 
+    # adaptive mode parameters, latencies in seconds:
+    _adaptive_initial_latency = 0.005
+    _adaptive_min_latency = 0.002
+    _adaptive_max_latency = 0.5
+    _adaptive_calm_period = 2.0
+    _adaptive_idle_period = 0.5
+
+    def __init__(self, *args, adaptive=False, **kwargs):
+        super(_Player, self).__init__(*args, **kwargs)
+        self._underflows = 0
+        self.on_underflow = None
+        self._adaptive = adaptive
+        # adaptive mode picks its own initial latency, even with low_latency:
+        if adaptive and kwargs.get('latency') is None:
+            self._latency = self._adaptive_initial_latency
+
+    def __enter__(self):
+        super(_Player, self).__enter__()
+        if self._adaptive:
+            self._adaptive_latency = self._latency
+            self._adaptive_floor = self._adaptive_min_latency
+            self._adaptive_underflows = 0
+            self._adaptive_min_fill = 1.0
+            self._adaptive_time = time.perf_counter()
+            self._adaptive_last_play = -float('inf')
+        return self
+
+    @property
+    def underflows(self):
+        """int : Number of buffer underflows (only available on Linux)
+
+        An underflow happens whenever the server runs out of data to
+        play, either because data was not provided fast enough, or
+        because no data was provided at all. Set ``on_underflow`` to a
+        function that takes the player as argument to be notified of
+        every underflow. It is called from the PulseAudio thread, and
+        must return quickly without calling into SoundCard.
+
+        """
+        return self._underflows
+
+    @property
+    def target_latency(self):
+        """float : Length of the server-side buffer in seconds (only available on Linux)
+
+        This is the latency that the player currently aims for. In
+        adaptive mode, it changes over time.
+
+        """
+        return _pulse._pa_stream_get_buffer_attr(self.stream).tlength / (4 * self.channels) / self._samplerate
+
+    def _set_target_latency(self, latency):
+        """Change the server-side buffer length while playing."""
+        latency = min(max(latency, self._adaptive_floor), self._adaptive_max_latency)
+        if latency == self._adaptive_latency:
+            return
+        framesize = 4 * self.channels
+        bufattr = _ffi.new("pa_buffer_attr*")
+        bufattr.maxlength = 2**32-1
+        bufattr.tlength = max(1, int(latency * self._samplerate)) * framesize
+        bufattr.prebuf = 2**32-1
+        bufattr.minreq = self._blocksize*framesize if self._blocksize and self._blocksize*framesize < bufattr.tlength else 2**32-1
+        bufattr.fragsize = 2**32-1
+        _pulse._pa_stream_set_buffer_attr(self.stream, bufattr, _ffi.NULL, _ffi.NULL)
+        self._adaptive_latency = latency
+
+    def _adapt(self, writable_bytes, resumed):
+        """Grow or shrink the server buffer, depending on underflows and headroom.
+
+        `writable_bytes` is the free space in the server buffer before
+        writing. If `resumed`, playback is starting after an idle
+        period, where underflows and an empty buffer are expected.
+
+        """
+        now = time.perf_counter()
+        if resumed:
+            # underflows while idle don't count:
+            self._adaptive_underflows = self._underflows
+            return
+        # give the server time to settle after every change, but keep
+        # counting its underflows until then:
+        if now - self._adaptive_time < 2 * self._adaptive_latency:
+            return
+        underflows = self._underflows - self._adaptive_underflows
+        self._adaptive_underflows = self._underflows
+        tlength = max(1, int(self._adaptive_latency * self._samplerate)) * 4 * self.channels
+        fill = max(0.0, 1 - writable_bytes / tlength)
+        self._adaptive_min_fill = min(self._adaptive_min_fill, fill)
+        if underflows:
+            # never shrink below a latency that glitched:
+            self._adaptive_floor = min(self._adaptive_latency * 1.5, self._adaptive_max_latency)
+            self._set_target_latency(self._adaptive_latency * 1.5)
+        elif fill < 0.1:
+            self._set_target_latency(self._adaptive_latency * 1.25)
+        elif now - self._adaptive_time > self._adaptive_calm_period:
+            self._adaptive_floor = max(self._adaptive_floor * 0.98, self._adaptive_min_latency)
+            if self._adaptive_min_fill > 0.5:
+                self._set_target_latency(self._adaptive_latency * 0.9)
+        else:
+            return
+        self._adaptive_time = now
+        self._adaptive_min_fill = 1.0
+
+    def move_to(self, speaker):
+        """Move playback to another speaker.
+
+        The stream keeps playing without interruption, and keeps all
+        queued data and its configuration.
+
+        .. note::
+           Currently only works on Linux.
+
+        Parameters
+        ----------
+        speaker : _Speaker
+            The new speaker. A speaker that follows the default
+            speaker moves the player to the current default speaker.
+        """
+        device_id = speaker.id if speaker.id is not None else _pulse.server_info['default sink id']
+        self._move(_pulse._pa_context_move_sink_input_by_name, device_id)
+
+    _info_callback_type = "pa_sink_input_info_cb_t"
+    _get_stream_info = _pulse._pa_context_get_sink_input_info
+    _set_stream_volume = _pulse._pa_context_set_sink_input_volume
+    _set_stream_mute = _pulse._pa_context_set_sink_input_mute
+
     def _connect_stream(self, bufattr):
-        _pulse._pa_stream_connect_playback(self.stream, self._id.encode(), bufattr, _pa.PA_STREAM_ADJUST_LATENCY,
-                                                _ffi.NULL, _ffi.NULL)
+        @_ffi.callback("pa_stream_notify_cb_t")
+        def underflow_callback(stream, userdata):
+            self._underflows += 1
+            if self.on_underflow is not None:
+                self.on_underflow(self)
+        self._underflow_callback = underflow_callback
+        _pulse._pa_stream_set_underflow_callback(self.stream, underflow_callback, _ffi.NULL)
+        @_ffi.callback("pa_stream_request_cb_t")
+        def write_callback(stream, nbytes, userdata):
+            _pulse.readiness.notify()
+        self._write_callback = write_callback
+        _pulse._pa_stream_set_write_callback(self.stream, write_callback, _ffi.NULL)
+        # the initial volume is applied by the server right away:
+        volume = self._cvolume(self._volume) if self._volume is not None else _ffi.NULL
+        _pulse._pa_stream_connect_playback(self.stream, self._device_name(), bufattr, self._flags,
+                                                volume, _ffi.NULL)
+
+    @property
+    def writable_frames(self):
+        """int : Number of frames that can be played without blocking (only available on Linux)
+
+        Use :func:`wait` to wait until any of several players can be
+        written to.
+
+        """
+        with _pulse.locked():
+            nbytes = _pa.pa_stream_writable_size(self.stream)
+        if nbytes == _size_t_error:
+            return 0
+        return nbytes // (4 * self.channels)
+
+    def _is_ready(self):
+        return self.writable_frames > 0 or self._failed()
 
     def play(self, data):
         """Play some audio data.
@@ -768,24 +2156,43 @@ class _Player(_Stream):
 
         """
 
-        data = numpy.array(data, dtype='float32', order='C')
-        if data.ndim == 1:
-            data = data[:, None] # force 2d
-        if data.ndim != 2:
-            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
-        if data.shape[1] == 1 and self.channels != 1:
-            data = numpy.tile(data, [1, self.channels])
-        if data.shape[1] != self.channels:
-            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        instrumented = _pulse.instrumentation.enabled
+        if instrumented:
+            start_time = time.perf_counter()
+        data = self._prepare_data(data)
+        if instrumented:
+            self._count('conversion_time', time.perf_counter() - start_time)
+        if self._adaptive:
+            idle_time = time.perf_counter() - self._adaptive_last_play
+            resumed = idle_time > max(self._adaptive_idle_period, 2 * self._adaptive_latency)
         while data.nbytes > 0:
-            nwrite = _pulse._pa_stream_writable_size(self.stream) // (4 * self.channels) # 4 bytes per sample
-
+            # query the buffer and write to it under a single lock:
+            with _pulse.locked():
+                writable_bytes = _pa.pa_stream_writable_size(self.stream)
+                nwrite = writable_bytes // (4 * self.channels) # 4 bytes per sample
+                if nwrite > 0:
+                    if instrumented:
+                        conversion_time = time.perf_counter()
+                    bytes = data[:nwrite].ravel().tobytes()
+                    if instrumented:
+                        self._count('conversion_time', time.perf_counter() - conversion_time)
+                        self._count('write_calls')
+                        self._count('bytes_written', len(bytes))
+                    _pa.pa_stream_write(self.stream, bytes, len(bytes), _ffi.NULL, 0, _pa.PA_SEEK_RELATIVE)
+            # adapting waits for the server, so it must not hold the lock:
+            if self._adaptive:
+                self._adapt(writable_bytes, resumed)
+                resumed = False
             if nwrite == 0:
+                if instrumented:
+                    self._count('sleeps')
                 time.sleep(0.001)
                 continue
-            bytes = data[:nwrite].ravel().tobytes()
-            _pulse._pa_stream_write(self.stream, bytes, len(bytes), _ffi.NULL, 0, _pa.PA_SEEK_RELATIVE)
             data = data[nwrite:]
+        if self._adaptive:
+            self._adaptive_last_play = time.perf_counter()
+        if instrumented:
+            _pulse.instrumentation.event('play', start_time, time.perf_counter(), stream=self._name)
 
 class _Recorder(_Stream):
     """A context manager for an active input stream.
@@ -800,48 +2207,177 @@ class _Recorder(_Stream):
 
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, monitor_stream=None, **kwargs):
         super(_Recorder, self).__init__(*args, **kwargs)
+        self._monitor_stream = monitor_stream
         self._pending_chunk = numpy.zeros((0, ), dtype='float32')
         self._record_event = threading.Event()
+        self._holes = 0
+        self.on_hole = None
+        self._overflows = 0
+        self.on_overflow = None
+
+    def move_to(self, microphone):
+        """Move recording to another microphone.
+
+        The stream keeps recording without interruption, and keeps all
+        buffered data and its configuration.
+
+        .. note::
+           Currently only works on Linux.
+
+        Parameters
+        ----------
+        microphone : _Microphone
+            The new microphone. A microphone that follows the default
+            microphone moves the recorder to the current default
+            microphone.
+        """
+        device_id = microphone.id if microphone.id is not None else _pulse.server_info['default source id']
+        self._move(_pulse._pa_context_move_source_output_by_name, device_id)
+
+    _info_callback_type = "pa_source_output_info_cb_t"
+    _get_stream_info = _pulse._pa_context_get_source_output_info
+    _set_stream_volume = _pulse._pa_context_set_source_output_volume
+    _set_stream_mute = _pulse._pa_context_set_source_output_mute
+
+    def __enter__(self):
+        super(_Recorder, self).__enter__()
+        # record streams can not be connected with an initial volume:
+        if self._volume is not None:
+            self.volume = self._volume
+        return self
 
     def _connect_stream(self, bufattr):
-        _pulse._pa_stream_connect_record(self.stream, self._id.encode(), bufattr, _pa.PA_STREAM_ADJUST_LATENCY)
+        if self._monitor_stream is not None:
+            # record only this sink input from the monitor source:
+            _pulse._pa_stream_set_monitor_stream(self.stream, self._monitor_stream)
+        @_ffi.callback("pa_stream_notify_cb_t")
+        def overflow_callback(stream, userdata):
+            self._overflows += 1
+            if self.on_overflow is not None:
+                self.on_overflow(self)
+        self._overflow_callback = overflow_callback
+        _pulse._pa_stream_set_overflow_callback(self.stream, overflow_callback, _ffi.NULL)
+        _pulse._pa_stream_connect_record(self.stream, self._device_name(), bufattr, self._flags)
         @_ffi.callback("pa_stream_request_cb_t")
         def read_callback(stream, nbytes, userdata):
             self._record_event.set()
+            _pulse.readiness.notify()
         self._callback = read_callback
         _pulse._pa_stream_set_read_callback(self.stream, read_callback, _ffi.NULL)
 
-    def _record_chunk(self):
+    @property
+    def overflows(self):
+        """int : Number of buffer overflows (only available on Linux)
+
+        An overflow happens if the server reports that recorded data
+        could not be stored, because it was not read fast enough. Set
+        ``on_overflow`` to a function that takes the recorder as
+        argument to be notified of every overflow. It is called from
+        the PulseAudio thread, and must return quickly without calling
+        into SoundCard.
+
+        """
+        return self._overflows
+
+    @property
+    def holes(self):
+        """int : Number of holes in the recording (only available on Linux)
+
+        A hole is a stretch of audio that the server could not deliver,
+        for example because it was dropped after a buffer overrun. Holes
+        are returned as silence. Set ``on_hole`` to a function that
+        takes the recorder and the number of missing frames as
+        arguments to be notified of every hole. It is called from the
+        thread that calls :func:`record`.
+
+        """
+        return self._holes
+
+    @property
+    def readable_frames(self):
+        """int : Number of frames that can be recorded without blocking (only available on Linux)
+
+        This includes frames that are pending from previous calls to
+        :func:`record`. Use :func:`wait` to wait until any of several
+        recorders can be read from.
+
+        """
+        with _pulse.locked():
+            nbytes = _pa.pa_stream_readable_size(self.stream)
+        if nbytes == _size_t_error:
+            nbytes = 0
+        return (len(self._pending_chunk) + nbytes // 4) // self.channels
+
+    def _is_ready(self):
+        return self.readable_frames > 0 or self._failed()
+
+    def _record_chunk(self, timeout=None):
         '''Record one chunk of audio data, as returned by pulseaudio
 
         The data will be returned as a 1D numpy array, which will be used by
         the `record` method. This function is the interface of the `_Recorder`
         object with pulseaudio
+
+        If no data arrives within `timeout` seconds, returns None.
         '''
+        instrumented = _pulse.instrumentation.enabled
+        if instrumented:
+            start_time = time.perf_counter()
+        deadline = time.monotonic() + timeout if timeout is not None else None
         data_ptr = _ffi.new('void**')
         nbytes_ptr = _ffi.new('size_t*')
-        readable_bytes = _pulse._pa_stream_readable_size(self.stream)
-        while not readable_bytes:
-            if not self._record_event.wait(timeout=1):
+        while True:
+            # check for data, and copy it out of the stream, under a single lock:
+            with _pulse.locked():
+                if _pa.pa_stream_readable_size(self.stream):
+                    data_ptr[0] = _ffi.NULL
+                    nbytes_ptr[0] = 0
+                    _pa.pa_stream_peek(self.stream, data_ptr, nbytes_ptr)
+                    if instrumented:
+                        conversion_time = time.perf_counter()
+                    if data_ptr[0] != _ffi.NULL:
+                        buffer = _ffi.buffer(data_ptr[0], nbytes_ptr[0])
+                        chunk = numpy.frombuffer(buffer, dtype='float32').copy()
+                    if instrumented:
+                        end_time = time.perf_counter()
+                    if nbytes_ptr[0] > 0:
+                        _pa.pa_stream_drop(self.stream)
+                    break
+            # wake up at least once a second, to check for failed streams:
+            wait_timeout = 1
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait_timeout = min(wait_timeout, remaining)
+            if instrumented:
+                wait_time = time.perf_counter()
+            if not self._record_event.wait(timeout=wait_timeout):
                 if _pulse._pa_stream_get_state(self.stream) == _pa.PA_STREAM_FAILED:
                     raise RuntimeError('Recording failed, stream is in status FAILED')
+            if instrumented:
+                self._count('waits')
+                self._count('wait_time', time.perf_counter() - wait_time)
             self._record_event.clear()
-            readable_bytes = _pulse._pa_stream_readable_size(self.stream)
-        data_ptr[0] = _ffi.NULL
-        nbytes_ptr[0] = 0
-        _pulse._pa_stream_peek(self.stream, data_ptr, nbytes_ptr)
-        if data_ptr[0] != _ffi.NULL:
-            buffer = _ffi.buffer(data_ptr[0], nbytes_ptr[0])
-            chunk = numpy.frombuffer(buffer, dtype='float32').copy()
         if data_ptr[0] == _ffi.NULL and nbytes_ptr[0] != 0:
             chunk = numpy.zeros(nbytes_ptr[0]//4, dtype='float32')
+            self._holes += 1
+            if self.on_hole is not None:
+                self.on_hole(self, nbytes_ptr[0] // (4 * self.channels))
+        if instrumented:
+            self._count('peek_calls')
+            self._count('conversion_time', end_time - conversion_time)
+            self._count('bytes_read', nbytes_ptr[0])
+            _pulse.instrumentation.event('record chunk', start_time, end_time,
+                                         stream=self._name, nbytes=nbytes_ptr[0])
         if nbytes_ptr[0] > 0:
-            _pulse._pa_stream_drop(self.stream)
+            if instrumented:
+                self._count('drop_calls')
             return chunk
 
-    def record(self, numframes=None):
+    def record(self, numframes=None, timeout=None):
         """Record a block of audio data.
 
         The data will be returned as a *frames × channels* float32
@@ -861,10 +2397,17 @@ class _Recorder(_Stream):
         block. (If you want to empty the last buffered frame instead,
         use :func:`flush`)
 
+        If ``timeout`` is given, and not enough data arrives in time,
+        this raises a `TimeoutError`. All data recorded so far is kept
+        for the next call, or can be retrieved with
+        :func:`record_nowait` or :func:`flush`.
+
         Parameters
         ----------
         numframes : int, optional
             The number of frames to record.
+        timeout : float, optional
+            The maximum time to wait in seconds (only available on Linux).
 
         Returns
         -------
@@ -872,8 +2415,14 @@ class _Recorder(_Stream):
             The recorded audio data. Will be a *frames x channels* Numpy array.
 
         """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        def remaining():
+            return max(0, deadline - time.monotonic()) if deadline is not None else None
         if numframes is None:
-            return numpy.reshape(numpy.concatenate([self.flush().ravel(), self._record_chunk()]),
+            chunk = self._record_chunk(remaining())
+            if chunk is None:
+                raise TimeoutError('no audio data was recorded within {} seconds'.format(timeout))
+            return numpy.reshape(numpy.concatenate([self.flush().ravel(), chunk]),
                                  [-1, self.channels])
         else:
             captured_data = [self._pending_chunk]
@@ -884,13 +2433,41 @@ class _Recorder(_Stream):
                 return numpy.reshape(keep, [-1, self.channels])
             else:
                 while captured_frames < numframes:
-                    chunk = self._record_chunk()
+                    chunk = self._record_chunk(remaining())
+                    if chunk is None:
+                        # keep everything for the next call:
+                        self._pending_chunk = numpy.concatenate(captured_data)
+                        raise TimeoutError('only {} of {} frames were recorded within {} seconds'
+                                           .format(int(captured_frames), numframes, timeout))
                     captured_data.append(chunk)
                     captured_frames += len(chunk)/self.channels
                 to_split = int(len(chunk) - (captured_frames - numframes) * self.channels)
                 captured_data[-1], self._pending_chunk = numpy.split(captured_data[-1], [to_split])
                 return numpy.reshape(numpy.concatenate(captured_data), [-1, self.channels])
 
+    def record_nowait(self):
+        """Record all audio data that is available right now.
+
+        This never blocks. It returns the pending chunk and all data
+        the server has delivered so far, which might be no data at all.
+
+        .. note::
+           Currently only works on Linux.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        chunks = [self.flush().ravel()]
+        while True:
+            chunk = self._record_chunk(timeout=0)
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        return numpy.reshape(numpy.concatenate(chunks), [-1, self.channels])
+
     def flush(self):
         """Return the last pending chunk.
 
@@ -906,3 +2483,154 @@ class _Recorder(_Stream):
         last_chunk = numpy.reshape(self._pending_chunk, [-1, self.channels])
         self._pending_chunk = numpy.zeros((0, ), dtype='float32')
         return last_chunk
+
+
+class _Meter(_Recorder):
+    """A context manager for measuring audio levels.
+
+    The meter records a stream of peak values instead of audio data.
+    The server computes the peak of the mono mix of all channels for
+    every ``1/rate`` seconds of audio, so only a few values per
+    second need to be transferred and processed.
+
+    Use the :attr:`peak` property to get the most recent peak value,
+    or :func:`record` to get a series of peak values.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, id, rate, monitor_stream=None):
+        # deliver every single peak value as soon as it is available:
+        super(_Meter, self).__init__(id, rate, 1, name='peakmeter', buffer_attr={'fragsize': 1},
+                                     monitor_stream=monitor_stream)
+        self._flags |= _pa.PA_STREAM_PEAK_DETECT
+        self._peak = 0.0
+
+    @property
+    def peak(self):
+        """float : The most recent peak level, between 0 and 1.
+
+        This does not block. If no new peak value is available, it
+        returns the previous one.
+
+        """
+        while _pulse._pa_stream_readable_size(self.stream):
+            chunk = self._record_chunk()
+            if chunk is not None and len(chunk) > 0:
+                self._peak = float(chunk[-1])
+        return self._peak
+
+
+def _unsupported(name):
+    """A property of `_Stream` that pa_simple streams can not provide."""
+    def fail(self, *args):
+        raise TypeError('{} does not support {}, use a player or recorder instead'
+                        .format(type(self).__name__, name))
+    return property(fail, fail)
+
+
+class _SimpleStream(_Stream):
+    """A context manager for a blocking pa_simple stream.
+
+    The pa_simple API connects every stream with its own context and
+    mainloop, and blocks in every call until the data is transferred.
+    This avoids the mainloop lock and the callbacks of the shared
+    context, which makes it cheaper for plain sequential playback and
+    recording, but it offers none of the controls of the shared
+    context. Children set `_direction`.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    buffer_attr = _unsupported('buffer_attr')
+    volume = _unsupported('volume')
+    mute = _unsupported('mute')
+
+    def __enter__(self):
+        samplespec, channelmap = self._make_sample_spec()
+        self.channels = samplespec.channels
+        self._error = _ffi.new("int*")
+        self.stream = _load_pa_simple().pa_simple_new(
+            _ffi.NULL, _PulseAudio._infer_program_name().encode(), self._direction,
+            self._device_name(), self._name.encode(), samplespec, channelmap,
+            self._make_buffer_attr(self.channels * 4), self._error)
+        if self.stream == _ffi.NULL:
+            self._raise_error('Stream creation failed')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _pa_simple.pa_simple_free(self.stream)
+
+    @property
+    def latency(self):
+        """float : Latency of the stream in seconds (only available on Linux)"""
+        latency = _pa_simple.pa_simple_get_latency(self.stream, self._error)
+        if latency == 2**64-1:
+            self._raise_error('Getting the latency failed')
+        return latency / 1e6
+
+    def _raise_error(self, message):
+        raise RuntimeError('{}: {}'.format(
+            message, _ffi.string(_pa.pa_strerror(self._error[0])).decode('utf-8')))
+
+
+class _SimplePlayer(_SimpleStream):
+    """A context manager for blocking playback through pa_simple.
+
+    Closing the player waits until all data has been played.
+
+    """
+
+    _direction = _pa.PA_STREAM_PLAYBACK
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and _pa_simple.pa_simple_drain(self.stream, self._error) < 0:
+            _pa_simple.pa_simple_free(self.stream)
+            self._raise_error('Draining failed')
+        super(_SimplePlayer, self).__exit__(exc_type, exc_value, traceback)
+
+    def play(self, data):
+        """Play some audio data, and block until the server has received it.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+
+        """
+        data = self._prepare_data(data)
+        if _pa_simple.pa_simple_write(self.stream, _ffi.from_buffer(data), data.nbytes, self._error) < 0:
+            self._raise_error('Playback failed')
+
+
+class _SimpleRecorder(_SimpleStream):
+    """A context manager for blocking recording through pa_simple."""
+
+    _direction = _pa.PA_STREAM_RECORD
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('name', 'inputstream')
+        super(_SimpleRecorder, self).__init__(*args, **kwargs)
+
+    def record(self, numframes):
+        """Record a block of audio data, and block until it is recorded.
+
+        Parameters
+        ----------
+        numframes : int
+            The number of frames to record.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        data = numpy.empty([numframes, self.channels], dtype='float32')
+        if _pa_simple.pa_simple_read(self.stream, _ffi.from_buffer(data), data.nbytes, self._error) < 0:
+            self._raise_error('Recording failed')
+        return data
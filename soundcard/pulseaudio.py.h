@@ -134,6 +134,12 @@ pa_simple* pa_simple_new(
     const pa_buffer_attr *attr,
     int *error
     );
+void pa_simple_free(pa_simple *s);
+int pa_simple_write(pa_simple *s, const void *data, size_t bytes, int *error);
+int pa_simple_drain(pa_simple *s, int *error);
+int pa_simple_read(pa_simple *s, void *data, size_t bytes, int *error);
+uint64_t pa_simple_get_latency(pa_simple *s, int *error);
+const char *pa_strerror(int error);
 
 typedef struct pa_mainloop pa_mainloop;
 pa_mainloop *pa_mainloop_new(void);
@@ -323,12 +329,105 @@ pa_operation* pa_context_get_sink_info_by_name(pa_context *c, const char *name,
 typedef void (*pa_source_info_cb_t)(pa_context *c, const pa_source_info *i, int eol, void *userdata);
 pa_operation* pa_context_get_source_info_list(pa_context *c, pa_source_info_cb_t cb, void *userdata);
 pa_operation* pa_context_get_source_info_by_name(pa_context *c, const char *name, pa_source_info_cb_t cb, void *userdata);
+pa_operation* pa_context_get_sink_info_by_index(pa_context *c, uint32_t idx, pa_sink_info_cb_t cb, void *userdata);
+pa_operation* pa_context_get_source_info_by_index(pa_context *c, uint32_t idx, pa_source_info_cb_t cb, void *userdata);
+typedef struct pa_sink_input_info {
+    uint32_t index;
+    const char *name;
+    uint32_t owner_module;
+    uint32_t client;
+    uint32_t sink;
+    pa_sample_spec sample_spec;
+    pa_channel_map channel_map;
+    pa_cvolume volume;
+    pa_usec_t buffer_usec;
+    pa_usec_t sink_usec;
+    const char *resample_method;
+    const char *driver;
+    int mute;
+    pa_proplist *proplist;
+    int corked;
+    int has_volume;
+    int volume_writable;
+    pa_format_info *format;
+} pa_sink_input_info;
+typedef void (*pa_sink_input_info_cb_t)(pa_context *c, const pa_sink_input_info *i, int eol, void *userdata);
+pa_operation* pa_context_get_sink_input_info(pa_context *c, uint32_t idx, pa_sink_input_info_cb_t cb, void *userdata);
+pa_operation* pa_context_get_sink_input_info_list(pa_context *c, pa_sink_input_info_cb_t cb, void *userdata);
+
+typedef struct pa_source_output_info {
+    uint32_t index;
+    const char *name;
+    uint32_t owner_module;
+    uint32_t client;
+    uint32_t source;
+    pa_sample_spec sample_spec;
+    pa_channel_map channel_map;
+    pa_usec_t buffer_usec;
+    pa_usec_t source_usec;
+    const char *resample_method;
+    const char *driver;
+    pa_proplist *proplist;
+    int corked;
+    pa_cvolume volume;
+    int mute;
+    int has_volume;
+    int volume_writable;
+    pa_format_info *format;
+} pa_source_output_info;
+typedef void (*pa_source_output_info_cb_t)(pa_context *c, const pa_source_output_info *i, int eol, void *userdata);
+pa_operation* pa_context_get_source_output_info(pa_context *c, uint32_t idx, pa_source_output_info_cb_t cb, void *userdata);
+
 typedef void (*pa_context_notify_cb)(pa_context *c, void *userdata);
 pa_operation* pa_context_drain(pa_context *c, pa_context_notify_cb cb, void *userdata);
 typedef void (*pa_context_success_cb_t)(pa_context *c, int success, void *userdata);
 pa_operation* pa_context_set_name(pa_context *c, const char *name, pa_context_success_cb_t cb, void *userdata);
+pa_operation* pa_context_set_sink_input_volume(pa_context *c, uint32_t idx, const pa_cvolume *volume, pa_context_success_cb_t cb, void *userdata);
+pa_operation* pa_context_set_sink_input_mute(pa_context *c, uint32_t idx, int mute, pa_context_success_cb_t cb, void *userdata);
+pa_operation* pa_context_set_source_output_volume(pa_context *c, uint32_t idx, const pa_cvolume *volume, pa_context_success_cb_t cb, void *userdata);
+pa_operation* pa_context_set_source_output_mute(pa_context *c, uint32_t idx, int mute, pa_context_success_cb_t cb, void *userdata);
+pa_cvolume* pa_cvolume_set(pa_cvolume *a, unsigned channels, pa_volume_t v);
+pa_volume_t pa_sw_volume_from_linear(double v);
+double pa_sw_volume_to_linear(pa_volume_t v);
 uint32_t pa_context_get_index(const pa_context *s);
 
+typedef enum pa_subscription_mask {
+    PA_SUBSCRIPTION_MASK_NULL = 0x0000,
+    PA_SUBSCRIPTION_MASK_SINK = 0x0001,
+    PA_SUBSCRIPTION_MASK_SOURCE = 0x0002,
+    PA_SUBSCRIPTION_MASK_SINK_INPUT = 0x0004,
+    PA_SUBSCRIPTION_MASK_SOURCE_OUTPUT = 0x0008,
+    PA_SUBSCRIPTION_MASK_MODULE = 0x0010,
+    PA_SUBSCRIPTION_MASK_CLIENT = 0x0020,
+    PA_SUBSCRIPTION_MASK_SAMPLE_CACHE = 0x0040,
+    PA_SUBSCRIPTION_MASK_SERVER = 0x0080,
+    PA_SUBSCRIPTION_MASK_AUTOLOAD = 0x0100,
+    PA_SUBSCRIPTION_MASK_CARD = 0x0200,
+    PA_SUBSCRIPTION_MASK_ALL = 0x02ff
+} pa_subscription_mask_t;
+
+typedef enum pa_subscription_event_type {
+    PA_SUBSCRIPTION_EVENT_SINK = 0x0000,
+    PA_SUBSCRIPTION_EVENT_SOURCE = 0x0001,
+    PA_SUBSCRIPTION_EVENT_SINK_INPUT = 0x0002,
+    PA_SUBSCRIPTION_EVENT_SOURCE_OUTPUT = 0x0003,
+    PA_SUBSCRIPTION_EVENT_MODULE = 0x0004,
+    PA_SUBSCRIPTION_EVENT_CLIENT = 0x0005,
+    PA_SUBSCRIPTION_EVENT_SAMPLE_CACHE = 0x0006,
+    PA_SUBSCRIPTION_EVENT_SERVER = 0x0007,
+    PA_SUBSCRIPTION_EVENT_AUTOLOAD = 0x0008,
+    PA_SUBSCRIPTION_EVENT_CARD = 0x0009,
+    PA_SUBSCRIPTION_EVENT_FACILITY_MASK = 0x000F,
+    PA_SUBSCRIPTION_EVENT_NEW = 0x0000,
+    PA_SUBSCRIPTION_EVENT_CHANGE = 0x0010,
+    PA_SUBSCRIPTION_EVENT_REMOVE = 0x0020,
+    PA_SUBSCRIPTION_EVENT_TYPE_MASK = 0x0030
+} pa_subscription_event_type_t;
+
+typedef void (*pa_context_subscribe_cb_t)(pa_context *c, pa_subscription_event_type_t t, uint32_t idx, void *userdata);
+pa_operation* pa_context_subscribe(pa_context *c, pa_subscription_mask_t m, pa_context_success_cb_t cb, void *userdata);
+void pa_context_set_subscribe_callback(pa_context *c, pa_context_subscribe_cb_t cb, void *userdata);
+
 typedef struct pa_client_info {
     uint32_t index;
     const char *name;
@@ -403,6 +502,7 @@ int pa_stream_drop(pa_stream *p);
 int pa_stream_get_latency(pa_stream *s, pa_usec_t *r_usec, int *negative);
 const pa_channel_map* pa_stream_get_channel_map(pa_stream *s);
 const pa_buffer_attr* pa_stream_get_buffer_attr(pa_stream *s);
+pa_operation* pa_stream_set_buffer_attr(pa_stream *s, const pa_buffer_attr *attr, pa_stream_success_cb_t cb, void *userdata);
 
 typedef enum pa_stream_state {
     PA_STREAM_UNCONNECTED,
@@ -412,8 +512,23 @@ typedef enum pa_stream_state {
     PA_STREAM_TERMINATED
 } pa_stream_state_t;
 pa_stream_state_t pa_stream_get_state(pa_stream *p);
+uint32_t pa_stream_get_index(const pa_stream *s);
+int pa_stream_set_monitor_stream(pa_stream *s, uint32_t sink_input_idx);
+pa_operation* pa_context_move_sink_input_by_name(pa_context *c, uint32_t idx, const char *sink_name, pa_context_success_cb_t cb, void *userdata);
+pa_operation* pa_context_move_source_output_by_name(pa_context *c, uint32_t idx, const char *source_name, pa_context_success_cb_t cb, void *userdata);
 
 typedef void(*pa_stream_request_cb_t)(pa_stream *p, size_t nbytes, void *userdata);
 void pa_stream_set_read_callback(pa_stream *p, pa_stream_request_cb_t cb, void *userdata);
+void pa_stream_set_write_callback(pa_stream *p, pa_stream_request_cb_t cb, void *userdata);
+typedef void(*pa_stream_notify_cb_t)(pa_stream *p, void *userdata);
+void pa_stream_set_state_callback(pa_stream *s, pa_stream_notify_cb_t cb, void *userdata);
+void pa_stream_set_overflow_callback(pa_stream *p, pa_stream_notify_cb_t cb, void *userdata);
+void pa_stream_set_underflow_callback(pa_stream *p, pa_stream_notify_cb_t cb, void *userdata);
 
 pa_operation* pa_stream_update_timing_info(pa_stream *s, pa_stream_success_cb_t cb, void *userdata);
+
+int pa_stream_connect_upload(pa_stream *s, size_t length);
+int pa_stream_finish_upload(pa_stream *s);
+pa_operation* pa_context_play_sample(pa_context *c, const char *name, const char *dev, pa_volume_t volume, pa_context_success_cb_t cb, void *userdata);
+pa_operation* pa_context_remove_sample(pa_context *c, const char *name, pa_context_success_cb_t cb, void *userdata);
+
@@ -0,0 +1,528 @@
+import inspect
+import os
+import struct
+import threading
+import time
+
+import numpy
+
+# Layout of the header of a shared memory ring buffer, see
+# SharedMemoryReader. All fields are little-endian:
+#
+#   offset  type     field
+#        0  char[8]  magic, b'SNDCARD\0'
+#        8  uint32   version, currently 1
+#       12  uint32   header size in bytes, currently 64
+#       16  uint32   sample rate in Hz
+#       20  uint32   number of channels
+#       24  uint32   capacity in frames
+#       28  uint32   flags, bit 0 is set once the recording has stopped
+#       32  uint64   write index, the number of frames written so far
+#       40  float64  start time, time.time() when recording started
+#       48  float64  write time, time.time() of the latest write
+#       56           reserved
+#       64  float32  capacity x channels samples, frame n is at row n % capacity
+_header = struct.Struct('<8sIIIIII')
+_header_size = 64
+_magic = b'SNDCARD\0'
+_version = 1
+_stopped = 1
+
+
+class SharedRecorder:
+    """A context manager for sharing one recording with many consumers.
+
+    Instead of opening one recorder for every consumer, the shared
+    recorder holds a single recorder, and copies every recorded block
+    into a ring buffer. Every consumer subscribes with
+    :func:`subscribe`, and reads from the ring buffer at its own pace,
+    starting with the first block after subscribing.
+
+    Recording happens in a background thread. If a subscriber falls
+    behind by more than the capacity of the ring buffer, the
+    ``policy`` decides what happens: with ``'drop'``, the subscriber
+    skips the oldest audio, and counts the lost frames in
+    :attr:`_Subscriber.dropped_frames`. With ``'block'``, recording
+    waits until the slowest subscriber has caught up, which eventually
+    makes the recorder itself overflow.
+
+    Parameters
+    ----------
+    microphone : _Microphone
+        The microphone to record from.
+    samplerate : int
+        The desired sampling rate in Hz
+    channels : {int, list(int)}, optional
+        Record on these channels. Defaults to use all available channels.
+    blocksize : int
+        Record and distribute this many frames at a time.
+    capacity : int, optional
+        Length of the ring buffer in frames. Defaults to one second.
+    policy : {'drop', 'block'}
+        What to do with subscribers that fall behind.
+    shared_memory : {bool, str}, optional
+        Place the ring buffer in a ``multiprocessing.shared_memory``
+        segment, with this name, or with a random name if True. Other
+        processes can then read the recording with a
+        :class:`SharedMemoryReader`, without pickling any audio. The
+        name is available as :attr:`shared_memory_name`. Requires Python
+        3.8 or newer.
+    **kwargs
+        Further arguments for the recorder of the microphone.
+
+    """
+
+    # how often the recording thread checks whether it should stop, in seconds:
+    _poll_interval = 0.1
+
+    def __init__(self, microphone, samplerate, channels=None, blocksize=1024, capacity=None,
+                 policy='drop', shared_memory=None, **kwargs):
+        if policy not in ('drop', 'block'):
+            raise TypeError("policy must be 'drop' or 'block', not {}".format(policy))
+        self._microphone = microphone
+        self._samplerate = samplerate
+        self._channels = channels
+        self._blocksize = blocksize
+        self.capacity = max(capacity or samplerate, blocksize)
+        self.policy = policy
+        self._kwargs = kwargs
+        self._shared_memory = shared_memory
+        self.shared_memory_name = None
+        self._subscribers = []
+        self._position = 0 # in frames, since the start of the recording
+        self._condition = threading.Condition()
+        self._running = False
+        self._error = None
+
+    def __enter__(self):
+        channels = self._channels if self._channels is not None else self._microphone.channels
+        self._recorder = self._microphone.recorder(self._samplerate, channels, self._blocksize, **self._kwargs)
+        self._recorder.__enter__()
+        self.channels = self._recorder.channels
+        # without a timeout, stopping waits for the current block:
+        self._record_timeout = 'timeout' in inspect.signature(self._recorder.record).parameters
+        if self._shared_memory:
+            self._create_shared_memory()
+        else:
+            self._buffer = numpy.zeros([self.capacity, self.channels], dtype='float32')
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        self._recorder.__exit__(exc_type, exc_value, traceback)
+        if self._shared_memory:
+            self._close_shared_memory()
+        self._raise_error()
+
+    def _create_shared_memory(self):
+        """Allocate the ring buffer in a shared memory segment, and write its header."""
+        from multiprocessing import shared_memory
+        name = self._shared_memory if isinstance(self._shared_memory, str) else None
+        size = _header_size + self.capacity * self.channels * 4
+        self._segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.shared_memory_name = self._segment.name
+        _header.pack_into(self._segment.buf, 0, _magic, _version, _header_size,
+                          self._samplerate, self.channels, self.capacity, 0)
+        self._flags = numpy.ndarray(1, '<u4', self._segment.buf, 28)
+        self._write_index = numpy.ndarray(1, '<u8', self._segment.buf, 32)
+        self._times = numpy.ndarray(2, '<f8', self._segment.buf, 40)
+        self._write_index[0] = 0
+        self._times[:] = time.time()
+        self._buffer = numpy.ndarray([self.capacity, self.channels], '<f4',
+                                     self._segment.buf, _header_size)
+
+    def _close_shared_memory(self):
+        """Mark the recording as stopped, and remove the shared memory segment.
+
+        Readers that are still attached keep their mapping of the
+        segment until they close it.
+
+        """
+        self._flags[0] |= _stopped
+        # the segment can only be closed once no arrays refer to it:
+        self._buffer = self._flags = self._write_index = self._times = None
+        self._segment.close()
+        if os.name == 'posix':
+            # a reader in a process that shares our resource tracker
+            # might have unregistered the segment, but unlinking
+            # expects it to be registered:
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self._segment._name, 'shared_memory')
+        self._segment.unlink()
+
+    def subscribe(self):
+        """Add a consumer of the recording.
+
+        Returns
+        -------
+        subscriber : _Subscriber
+            Reads the recording from the next block on. Can be used as
+            a context manager that unsubscribes on exit.
+
+        """
+        self._raise_error()
+        with self._condition:
+            subscriber = _Subscriber(self, self._position)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    @property
+    def subscribers(self):
+        """int : The number of active subscribers."""
+        return len(self._subscribers)
+
+    def _unsubscribe(self, subscriber):
+        with self._condition:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            self._condition.notify_all()
+
+    def _write(self, block):
+        """Copy a block into the ring buffer, wrapping around at the end."""
+        start = self._position % self.capacity
+        numframes = min(len(block), self.capacity - start)
+        self._buffer[start:start+numframes] = block[:numframes]
+        self._buffer[:len(block)-numframes] = block[numframes:]
+
+    def _run(self):
+        try:
+            while self._running:
+                if self._record_timeout:
+                    try:
+                        block = self._recorder.record(self._blocksize, timeout=self._poll_interval)
+                    except TimeoutError:
+                        continue
+                else:
+                    block = self._recorder.record(self._blocksize)
+                with self._condition:
+                    if self.policy == 'block':
+                        # wait until the slowest subscriber has made room:
+                        self._condition.wait_for(lambda: not self._running or all(
+                            self._position + len(block) - s._position <= self.capacity
+                            for s in self._subscribers))
+                        if not self._running:
+                            break
+                    self._write(block)
+                    self._position += len(block)
+                    if self._shared_memory:
+                        # publish the new write index only after the
+                        # data, so readers never see incomplete blocks:
+                        self._times[1] = time.time()
+                        self._write_index[0] = self._position
+                    self._condition.notify_all()
+        except Exception as error:
+            self._error = error
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError('recording failed') from self._error
+
+
+class _SharedRecorderMixin:
+    """Adds :func:`shared_recorder` to the microphones of every backend."""
+
+    def shared_recorder(self, samplerate, channels=None, blocksize=1024, capacity=None,
+                        policy='drop', shared_memory=None, **kwargs):
+        """Create a SharedRecorder, for sharing one recording with many consumers.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. Defaults to use all available channels.
+        blocksize : int
+            Record and distribute this many frames at a time.
+        capacity : int, optional
+            Length of the ring buffer in frames. Defaults to one second.
+        policy : {'drop', 'block'}
+            Whether subscribers that fall behind lose audio, or hold up
+            the recording.
+        shared_memory : {bool, str}, optional
+            Publish the recording in a shared memory segment of this
+            name, or of a random name if True, for
+            :class:`SharedMemoryReader` in other processes.
+        **kwargs
+            Further arguments for :func:`recorder`.
+
+        Returns
+        -------
+        shared_recorder : SharedRecorder
+        """
+        return SharedRecorder(self, samplerate, channels, blocksize, capacity, policy,
+                              shared_memory, **kwargs)
+
+
+class _Subscriber:
+    """One consumer of a :class:`SharedRecorder`.
+
+    Every subscriber has its own read position in the ring buffer of
+    the shared recorder.
+
+    """
+
+    def __init__(self, shared, position):
+        self._shared = shared
+        self._position = position
+        self._dropped_frames = 0
+        self.channels = shared.channels
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop receiving the recording."""
+        self._shared._unsubscribe(self)
+
+    @property
+    def dropped_frames(self):
+        """int : The number of frames that were lost because this subscriber fell behind."""
+        with self._shared._condition:
+            self._skip_overwritten()
+            return self._dropped_frames
+
+    @property
+    def readable_frames(self):
+        """int : The number of frames that can be recorded without blocking."""
+        with self._shared._condition:
+            self._skip_overwritten()
+            return self._shared._position - self._position
+
+    def _skip_overwritten(self):
+        """Skip audio that was overwritten in the ring buffer, in 'drop' policy."""
+        oldest = self._shared._position - self._shared.capacity
+        if self._position < oldest:
+            self._dropped_frames += oldest - self._position
+            self._position = oldest
+
+    def _read(self, numframes):
+        """Copy `numframes` frames out of the ring buffer."""
+        buffer = self._shared._buffer
+        capacity = self._shared.capacity
+        start = self._position % capacity
+        first = min(numframes, capacity - start)
+        data = numpy.concatenate([buffer[start:start+first], buffer[:numframes-first]])
+        self._position += numframes
+        self._shared._condition.notify_all()
+        return data
+
+    def record(self, numframes=None, timeout=None):
+        """Record a block of audio data.
+
+        The data will be returned as a *frames × channels* float32
+        numpy array. This function will wait until ``numframes``
+        frames have been recorded.
+
+        If ``numframes`` is None, it will return whatever is available,
+        and wait for one block if nothing is available yet.
+
+        Parameters
+        ----------
+        numframes : int, optional
+            The number of frames to record. Can be at most the
+            capacity of the shared recorder.
+        timeout : float, optional
+            The maximum time to wait in seconds. Raises a
+            `TimeoutError` if not enough data arrives in time, and keeps
+            the data for the next call.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        shared = self._shared
+        if numframes is not None and numframes > shared.capacity:
+            raise TypeError('can not record more than the capacity of {} frames at once'
+                            .format(shared.capacity))
+        needed = numframes if numframes is not None else 1
+        with shared._condition:
+            def available():
+                self._skip_overwritten()
+                return not shared._running or shared._position - self._position >= needed
+            if not shared._condition.wait_for(available, timeout):
+                raise TimeoutError('not enough audio data was recorded within {} seconds'.format(timeout))
+            shared._raise_error()
+            if shared._position - self._position < needed:
+                raise RuntimeError('the shared recorder is closed')
+            if numframes is None:
+                numframes = shared._position - self._position
+            return self._read(numframes)
+
+
+class SharedMemoryReader:
+    """Read the recording of a :class:`SharedRecorder` from another process.
+
+    Attaches to the shared memory ring buffer of a shared recorder
+    that was created with ``shared_memory``, by the name in its
+    :attr:`SharedRecorder.shared_memory_name`. Like a subscriber, every
+    reader has its own read position, and starts at the latest frame.
+    Readers can not hold up the recording, so a reader that falls
+    behind by more than the capacity loses the oldest audio.
+
+    Recorded data is returned as views into the shared memory wherever
+    possible, without copying. Such a view stays valid until the
+    recording wraps around the ring buffer and overwrites it, i.e. for
+    roughly ``capacity - numframes`` frames. Copy the data if it needs
+    to live longer than that.
+
+    The segment starts with a 64 byte header, followed by the samples
+    as *capacity × channels* float32. The header contains, all
+    little-endian: the magic ``b'SNDCARD\\0'``, the uint32 version,
+    header size, sample rate, channels, capacity, and flags, the uint64
+    write index in frames, and the float64 ``time.time()`` of the start
+    of the recording and of the latest write, in this order. Bit 0 of
+    the flags is set once the recording has stopped. The write index
+    is updated after the data, and frame ``n`` is stored at row
+    ``n % capacity``.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory segment.
+
+    """
+
+    def __init__(self, name):
+        from multiprocessing import shared_memory
+        try:
+            self._segment = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13, attaching registers the segment with the
+            # resource tracker, which would remove it when this process
+            # exits (bpo-39959):
+            self._segment = shared_memory.SharedMemory(name=name)
+            if os.name == 'posix':
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self._segment._name, 'shared_memory')
+        magic, version, header_size, self.samplerate, self.channels, self.capacity, _ = \
+            _header.unpack_from(self._segment.buf)
+        if magic != _magic or version != _version:
+            self._segment.close()
+            raise RuntimeError('{} is not a SoundCard ring buffer of version {}'.format(name, _version))
+        self._flags = numpy.ndarray(1, '<u4', self._segment.buf, 28)
+        self._write_index = numpy.ndarray(1, '<u8', self._segment.buf, 32)
+        self._times = numpy.ndarray(2, '<f8', self._segment.buf, 40)
+        self._buffer = numpy.ndarray([self.capacity, self.channels], '<f4',
+                                     self._segment.buf, header_size)
+        self._position = self.write_index
+        self._dropped_frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Detach from the shared memory.
+
+        Views returned by :func:`record` must not be used afterwards.
+
+        """
+        self._buffer = self._flags = self._write_index = self._times = None
+        self._segment.close()
+
+    @property
+    def write_index(self):
+        """int : The number of frames recorded since the start of the recording."""
+        return int(self._write_index[0])
+
+    @property
+    def start_time(self):
+        """float : The ``time.time()`` at the start of the recording."""
+        return float(self._times[0])
+
+    @property
+    def write_time(self):
+        """float : The ``time.time()`` of the latest recorded block."""
+        return float(self._times[1])
+
+    @property
+    def stopped(self):
+        """bool : Whether the recording has stopped."""
+        return bool(self._flags[0] & _stopped)
+
+    @property
+    def dropped_frames(self):
+        """int : The number of frames that were lost because this reader fell behind."""
+        self._skip_overwritten(self.write_index)
+        return self._dropped_frames
+
+    @property
+    def readable_frames(self):
+        """int : The number of frames that can be recorded without blocking."""
+        write_index = self.write_index
+        self._skip_overwritten(write_index)
+        return write_index - self._position
+
+    def _skip_overwritten(self, write_index):
+        """Skip audio that was overwritten in the ring buffer."""
+        oldest = write_index - self.capacity
+        if self._position < oldest:
+            self._dropped_frames += oldest - self._position
+            self._position = oldest
+
+    def record(self, numframes=None, timeout=None):
+        """Record a block of audio data.
+
+        The data will be returned as a *frames × channels* float32
+        numpy array. This function will wait until ``numframes``
+        frames have been recorded. Since there is no notification
+        across processes, it polls the write index while waiting.
+
+        If ``numframes`` is None, it will return whatever is available,
+        and wait for one frame if nothing is available yet.
+
+        Parameters
+        ----------
+        numframes : int, optional
+            The number of frames to record. Can be at most the
+            capacity of the shared recorder.
+        timeout : float, optional
+            The maximum time to wait in seconds. Raises a
+            `TimeoutError` if not enough data arrives in time, and keeps
+            the data for the next call.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy
+            array, and a view into the shared memory unless it wraps
+            around the end of the ring buffer.
+
+        """
+        if numframes is not None and numframes > self.capacity:
+            raise TypeError('can not record more than the capacity of {} frames at once'
+                            .format(self.capacity))
+        needed = numframes if numframes is not None else 1
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.readable_frames < needed:
+            if self.stopped:
+                raise RuntimeError('the shared recorder is closed')
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError('not enough audio data was recorded within {} seconds'.format(timeout))
+            time.sleep(0.001)
+        if numframes is None:
+            numframes = self.write_index - self._position
+        start = self._position % self.capacity
+        if start + numframes <= self.capacity:
+            data = self._buffer[start:start+numframes]
+        else:
+            first = self.capacity - start
+            data = numpy.concatenate([self._buffer[start:], self._buffer[:numframes-first]])
+        self._position += numframes
+        return data
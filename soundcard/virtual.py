@@ -0,0 +1,970 @@
+"""In-process virtual backend, for testing and benchmarking.
+
+Select this backend by setting the environment variable
+``SOUNDCARD_BACKEND=virtual`` before importing :mod:`soundcard`. This
+is required wherever the default backend of the platform can not be
+loaded, since importing :mod:`soundcard.virtual` first imports
+:mod:`soundcard` and its default backend.
+
+Virtual speakers and microphones exist only inside the current
+process, and need no sound server or hardware. Every speaker can be
+recorded through a loopback microphone, whose id is the id of the
+speaker followed by ``.monitor``, and microphones can be routed to
+hear any number of speakers, like a cable from a speaker output to a
+microphone input. Devices can add latency and drop periods of audio,
+to test how a pipeline copes with unreliable devices.
+
+Time is simulated: streams advance a shared clock whenever they wait
+for audio to be played or recorded, and the clock runs at a
+configurable multiple of real time (see :func:`set_speed`). The
+recorded audio only depends on the played audio and the device
+configuration, not on the speed of the clock, so a pipeline that
+runs in a single thread records the same data at any speed.
+
+By default, there is one stereo speaker ``'virtual-speaker'``, and
+one stereo microphone ``'virtual-microphone'`` that hears it.
+
+"""
+
+import os
+import re
+import sys
+import math
+import time
+import zlib
+import threading
+from fractions import Fraction
+
+import numpy
+
+from soundcard.shared import _SharedRecorderMixin
+
+# audio older than this many seconds is discarded from speakers:
+_history = 10
+
+
+class _Clock:
+    """The simulated time of all virtual devices.
+
+    The clock only moves forward when a stream waits for it with
+    :func:`advance_to`, which sleeps for the simulated duration
+    divided by the speed of the clock.
+
+    """
+
+    def __init__(self, speed=1):
+        self.speed = speed
+        self.time = Fraction(0) # in seconds
+        self.lock = threading.RLock()
+
+    def advance_to(self, time_):
+        """Wait until the clock has reached `time_`."""
+        with self.lock:
+            delta = time_ - self.time
+        if delta <= 0:
+            return
+        if self.speed != float('inf'):
+            time.sleep(float(delta) / self.speed)
+        with self.lock:
+            if time_ > self.time:
+                self.time = time_
+
+
+class _Timeline:
+    """The audio of a virtual speaker, as frames at its sample rate.
+
+    Players add their audio into the timeline, where it is mixed with
+    all other players, and loopbacks read from it.
+
+    """
+
+    def __init__(self, channels):
+        self.start = 0 # frame index of data[0]
+        self.data = numpy.zeros([0, channels], dtype='float32')
+
+    def add(self, position, block):
+        """Mix `block` into the timeline, starting at frame `position`."""
+        if position < self.start:
+            block = block[self.start-position:]
+            position = self.start
+        end = position + len(block)
+        if end > self.start + len(self.data):
+            data = numpy.zeros([end - self.start, self.data.shape[1]], dtype='float32')
+            data[:len(self.data)] = self.data
+            self.data = data
+        self.data[position-self.start:end-self.start] += block
+
+    def read(self, position, numframes):
+        """Read `numframes` frames, starting at frame `position`."""
+        block = numpy.zeros([numframes, self.data.shape[1]], dtype='float32')
+        first = max(position, self.start)
+        last = min(position + numframes, self.start + len(self.data))
+        if last > first:
+            block[first-position:last-position] = self.data[first-self.start:last-self.start]
+        return block
+
+    def trim(self, position):
+        """Discard all frames before frame `position`."""
+        if position > self.start:
+            self.data = self.data[position-self.start:]
+            self.start = position
+
+
+class _Device:
+    """The configuration and state of a virtual device."""
+
+    def __init__(self, id, kind, channels, name, samplerate, latency, dropouts, sources=()):
+        if not 0 <= dropouts <= 1:
+            raise TypeError('dropouts must be a probability between 0 and 1')
+        self.id = id
+        self.kind = kind
+        self.channels = channels
+        self.name = name if name is not None else id
+        self.samplerate = samplerate
+        # exact for latencies given as decimal floats, such as 0.01:
+        self.latency = Fraction(latency).limit_denominator(10**6)
+        self.dropouts = dropouts
+        self.sources = list(sources)
+        self.timeline = _Timeline(channels) if kind == 'speaker' else None
+        self.random = numpy.random.RandomState((_seed + zlib.crc32(id.encode())) % 2**32)
+
+
+_clock = _Clock()
+_devices = {}
+_seed = 0
+_name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+
+def _add_device(device):
+    with _clock.lock:
+        if device.id in _devices:
+            raise TypeError('there already is a virtual device with id {}'.format(device.id))
+        _devices[device.id] = device
+
+
+def add_speaker(id, channels=2, name=None, samplerate=48000, latency=0, dropouts=0):
+    """Add a virtual speaker.
+
+    Parameters
+    ----------
+    id : str
+        The unique id of the speaker.
+    channels : int
+        The number of channels of the speaker.
+    name : str, optional
+        The human-readable name of the speaker. Defaults to the id.
+    samplerate : int
+        The sample rate at which the speaker mixes its players. Players
+        at other sample rates are resampled by linear interpolation.
+    latency : float
+        The time in seconds between playing audio and the audio
+        reaching the speaker output.
+    dropouts : float
+        The probability that one block of played audio is lost.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    _add_device(_Device(id, 'speaker', channels, name, samplerate, latency, dropouts))
+    return _Speaker(id=id)
+
+
+def add_microphone(id, channels=2, name=None, samplerate=48000, latency=0, dropouts=0, sources=()):
+    """Add a virtual microphone.
+
+    Parameters
+    ----------
+    id : str
+        The unique id of the microphone.
+    channels : int
+        The number of channels of the microphone.
+    name : str, optional
+        The human-readable name of the microphone. Defaults to the id.
+    samplerate : int
+        The sample rate at which the microphone records. Recorders at
+        other sample rates are resampled by linear interpolation.
+    latency : float
+        The time in seconds between audio reaching the microphone and
+        the audio being recorded.
+    dropouts : float
+        The probability that one block of recorded audio is lost.
+    sources : list(str)
+        The ids of the speakers this microphone hears. Without
+        sources, the microphone records silence.
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    _add_device(_Device(id, 'microphone', channels, name, samplerate, latency, dropouts, sources))
+    return _Microphone(id=id)
+
+
+def remove_device(id):
+    """Remove a virtual speaker or microphone.
+
+    Parameters
+    ----------
+    id : str
+        The id of the device.
+
+    """
+    with _clock.lock:
+        if _devices.pop(id, None) is None:
+            raise IndexError('no device with id {}'.format(id))
+
+
+def reset(seed=0):
+    """Restore the default devices, and restart the clock at zero.
+
+    Parameters
+    ----------
+    seed : int
+        Seeds the random dropouts of all devices.
+
+    """
+    global _seed
+    with _clock.lock:
+        _seed = seed
+        _devices.clear()
+        _clock.time = Fraction(0)
+        add_speaker('virtual-speaker', name='Virtual Speaker')
+        add_microphone('virtual-microphone', name='Virtual Microphone', sources=['virtual-speaker'])
+
+
+def set_speed(speed):
+    """Set the speed of the simulated clock.
+
+    Parameters
+    ----------
+    speed : float
+        Multiple of real time. ``1`` plays and records in real time,
+        ``100`` runs a hundred times faster, and ``float('inf')``
+        never waits.
+
+    """
+    if not speed > 0:
+        raise TypeError('speed must be positive, not {}'.format(speed))
+    _clock.speed = speed
+
+
+def now():
+    """The simulated time.
+
+    Returns
+    -------
+    time : float
+        Seconds since the last :func:`reset`.
+
+    """
+    return float(_clock.time)
+
+
+def wait(streams, timeout=None):
+    """Wait until any of several streams can be read or written.
+
+    This lets a single thread serve many players and recorders. A
+    recorder is ready if :attr:`readable_frames` is not zero, and a
+    player is ready if :attr:`writable_frames` is not zero. If no
+    stream is ready, the clock advances until the first one is.
+
+    Parameters
+    ----------
+    streams : list(_Player or _Recorder)
+        The streams to wait for.
+    timeout : float, optional
+        The maximum time to wait in simulated seconds. Waits as long
+        as necessary if None.
+
+    Returns
+    -------
+    ready : list(_Player or _Recorder)
+        The streams that are ready, or an empty list after a timeout.
+
+    """
+    if timeout is not None:
+        deadline = _clock.time + Fraction(timeout).limit_denominator(10**6)
+    while True:
+        ready = [stream for stream in streams if stream._is_ready()]
+        if ready or not streams:
+            return ready
+        next_time = min(stream._ready_time() for stream in streams)
+        if timeout is not None and next_time > deadline:
+            _clock.advance_to(deadline)
+            return []
+        _clock.advance_to(next_time)
+
+
+def all_speakers():
+    """A list of all virtual speakers.
+
+    Returns
+    -------
+    speakers : list(_Speaker)
+
+    """
+    return [_Speaker(id=device.id) for device in list(_devices.values()) if device.kind == 'speaker']
+
+
+def default_speaker():
+    """The default speaker, which is the first virtual speaker.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    speakers = all_speakers()
+    if not speakers:
+        raise RuntimeError('there is no default speaker')
+    return speakers[0]
+
+
+def get_speaker(id):
+    """Get a specific speaker by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be a device id, a substring of the speaker name, or a
+        fuzzy-matched pattern for the speaker name.
+
+    Returns
+    -------
+    speaker : _Speaker
+
+    """
+    return _match_device(id, all_speakers())
+
+
+def all_microphones(include_loopback=False):
+    """A list of all virtual microphones.
+
+    By default, this does not include loopbacks (virtual microphones
+    that record the output of a speaker).
+
+    Parameters
+    ----------
+    include_loopback : bool
+        allow recording of speaker outputs
+
+    Returns
+    -------
+    microphones : list(_Microphone)
+
+    """
+    mics = [_Microphone(id=device.id) for device in list(_devices.values()) if device.kind == 'microphone']
+    if include_loopback:
+        mics += [_Microphone(id=speaker.id + '.monitor') for speaker in all_speakers()]
+    return mics
+
+
+def default_microphone():
+    """The default microphone, which is the first virtual microphone.
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    mics = all_microphones()
+    if not mics:
+        raise RuntimeError('there is no default microphone')
+    return mics[0]
+
+
+def get_microphone(id, include_loopback=False):
+    """Get a specific microphone by a variety of means.
+
+    Parameters
+    ----------
+    id : str
+        can be a device id, a substring of the microphone name, or a
+        fuzzy-matched pattern for the microphone name.
+    include_loopback : bool
+        allow recording of speaker outputs
+
+    Returns
+    -------
+    microphone : _Microphone
+
+    """
+    return _match_device(id, all_microphones(include_loopback))
+
+
+def _match_device(id, devices):
+    """Find id in a list of devices.
+
+    id can be a device id, a substring of the device name, or a
+    fuzzy-matched pattern for the device name.
+
+    """
+    devices_by_id = {device.id: device for device in devices}
+    devices_by_name = {device.name: device for device in devices}
+    if id in devices_by_id:
+        return devices_by_id[id]
+    # try substring match:
+    for name, device in devices_by_name.items():
+        if id in name:
+            return device
+    # try fuzzy match:
+    pattern = '.*'.join(id)
+    for name, device in devices_by_name.items():
+        if re.match(pattern, name):
+            return device
+    raise IndexError('no device with id {}'.format(id))
+
+
+def get_name():
+    """Get application name.
+
+    Returns
+    -------
+    name : str
+    """
+    return _name
+
+
+def set_name(name):
+    """Set application name.
+
+    Parameters
+    ----------
+    name :  str
+        The application using the soundcard
+        will be identified by the OS using this name.
+    """
+    global _name
+    _name = name
+
+
+class _SoundCard:
+    def __init__(self, *, id):
+        self._id = id
+
+    @property
+    def channels(self):
+        """int : The number of channels of the device."""
+        return self._get_device().channels
+
+    @property
+    def id(self):
+        """str : The id of the virtual device."""
+        return self._id
+
+    @property
+    def name(self):
+        """str : The human-readable name of the soundcard."""
+        return self._get_device().name
+
+    def _get_device(self):
+        try:
+            return _devices[self._id]
+        except KeyError:
+            raise IndexError('no device with id {}'.format(self._id)) from None
+
+
+class _Speaker(_SoundCard):
+    """A soundcard output. Can be used to play audio.
+
+    Use the :func:`play` method to play one piece of audio, or use the
+    :func:`player` method to get a context manager for playing continuous
+    audio.
+
+    """
+
+    def __repr__(self):
+        return '<Speaker {} ({} channels)>'.format(self.name, self.channels)
+
+    def player(self, samplerate, channels=None, blocksize=None):
+        """Create Player for playing audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. Dropouts affect
+            whole blocks.
+
+        Returns
+        -------
+        player : _Player
+        """
+        if channels is None:
+            channels = self.channels
+        return _Player(self._get_device(), samplerate, channels, blocksize)
+
+    def play(self, data, samplerate, channels=None, blocksize=None):
+        """Play some audio data.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Play on these channels. For example, ``[0, 3]`` will play
+            stereo data on the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will play this many samples at a time. Dropouts affect
+            whole blocks.
+        """
+        with self.player(samplerate, channels, blocksize) as p:
+            p.play(data)
+
+
+class _Microphone(_SoundCard, _SharedRecorderMixin):
+    """A soundcard input. Can be used to record audio.
+
+    Use the :func:`record` method to record one piece of audio, or use
+    the :func:`recorder` method to get a context manager for recording
+    continuous audio.
+
+    """
+
+    def __repr__(self):
+        if self.isloopback:
+            return '<Loopback {} ({} channels)>'.format(self.name, self.channels)
+        else:
+            return '<Microphone {} ({} channels)>'.format(self.name, self.channels)
+
+    @property
+    def isloopback(self):
+        """bool : Whether this microphone is recording a speaker."""
+        return self._get_device().kind == 'speaker'
+
+    def _get_device(self):
+        if self._id.endswith('.monitor') and self._id not in _devices:
+            speaker = _devices.get(self._id[:-len('.monitor')])
+            if speaker is not None and speaker.kind == 'speaker':
+                return speaker
+        return super(_Microphone, self)._get_device()
+
+    def recorder(self, samplerate, channels=None, blocksize=None):
+        """Create Recorder for recording audio.
+
+        Parameters
+        ----------
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. Dropouts affect
+            whole blocks.
+
+        Returns
+        -------
+        recorder : _Recorder
+        """
+        if channels is None:
+            channels = self.channels
+        return _Recorder(self._get_device(), samplerate, channels, blocksize)
+
+    def record(self, numframes, samplerate, channels=None, blocksize=None):
+        """Record some audio data.
+
+        Parameters
+        ----------
+        numframes: int
+            The number of frames to record.
+        samplerate : int
+            The desired sampling rate in Hz
+        channels : {int, list(int)}, optional
+            Record on these channels. For example, ``[0, 3]`` will record
+            stereo data from the physical channels one and four.
+            Defaults to use all available channels.
+        blocksize : int
+            Will record this many samples at a time. Dropouts affect
+            whole blocks.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+        """
+        with self.recorder(samplerate, channels, blocksize) as r:
+            return r.record(numframes)
+
+
+class _Stream:
+    """A context manager for an active virtual stream.
+
+    Streams keep their own position in simulated time, which starts at
+    the current time of the clock when the context manager is entered,
+    and advances by one block with every block that is played or
+    recorded.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, device, samplerate, channels, blocksize=None):
+        self._device = device
+        self._samplerate = samplerate
+        if isinstance(channels, int):
+            self._channelmap = list(range(channels))
+        else:
+            self._channelmap = list(channels)
+        if any(not isinstance(ch, int) or ch < 0 or ch >= device.channels for ch in self._channelmap):
+            raise TypeError('channels must be a number of channels or a list of channel indices '
+                            'of the {} available channels'.format(device.channels))
+        self.channels = len(self._channelmap)
+        self._blocksize = blocksize or 1024
+        self._dropouts = 0
+
+    def __enter__(self):
+        # streams start at the next frame of the device:
+        self._time = self._align(_clock.time)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    @property
+    def latency(self):
+        """float : The latency of the device in seconds."""
+        return float(self._device.latency)
+
+    @property
+    def dropouts(self):
+        """int : The number of blocks that were lost."""
+        return self._dropouts
+
+    def _align(self, time_):
+        """Round a time up to the next frame of the device."""
+        rate = self._device.samplerate
+        return Fraction(math.ceil(time_ * rate), rate)
+
+    def _drop(self):
+        """Whether to drop the next block, counting dropouts."""
+        if self._device.dropouts and self._device.random.random_sample() < self._device.dropouts:
+            self._dropouts += 1
+            return True
+        return False
+
+    def _resample(self, block, start, numframes, from_rate, to_rate):
+        """Linearly interpolate `numframes` frames at `to_rate` from a block at `from_rate`.
+
+        `start` is the offset of the first output frame in seconds
+        after the first frame of the block.
+
+        """
+        if from_rate == to_rate and start == 0:
+            return block[:numframes]
+        positions = (float(start) + numpy.arange(numframes) / to_rate) * from_rate
+        indices = numpy.arange(len(block))
+        return numpy.stack([numpy.interp(positions, indices, block[:, ch])
+                            for ch in range(block.shape[1])], axis=1).astype('float32')
+
+
+class _Player(_Stream):
+    """A context manager for an active output stream.
+
+    Audio playback is available as soon as the context manager is
+    entered. Audio data can be played using the :func:`play` method.
+    Successive calls to :func:`play` will queue up the audio one piece
+    after another. If no audio is queued up, this will play silence.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_Player, self).__init__(*args, **kwargs)
+        self._underflows = 0
+
+    def __enter__(self):
+        super(_Player, self).__enter__()
+        self._time = self._align(self._time + self._device.latency)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            # wait until all audio has been played:
+            _clock.advance_to(self._time)
+        super(_Player, self).__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def underflows(self):
+        """int : The number of times the clock overtook the queued audio."""
+        return self._underflows
+
+    def play(self, data):
+        """Play some audio data.
+
+        Internally, all data is handled as ``float32`` and with the
+        appropriate number of channels. For maximum performance,
+        provide data as a *frames × channels* float32 numpy array.
+
+        If single-channel or one-dimensional data is given, this data
+        will be played on all available channels.
+
+        This function will return *before* all data has been played,
+        so that additional data can be provided for gapless playback.
+        It waits while more than the latency of the speaker and one
+        block of audio is queued up.
+
+        Parameters
+        ----------
+        data : numpy array
+            The audio data to play. Must be a *frames x channels* Numpy array.
+
+        """
+        data = numpy.array(data, dtype='float32', order='C')
+        if data.ndim == 1:
+            data = data[:, None] # force 2d
+        if data.ndim != 2:
+            raise TypeError('data must be 1d or 2d, not {}d'.format(data.ndim))
+        if data.shape[1] == 1 and self.channels != 1:
+            data = numpy.tile(data, [1, self.channels])
+        if data.shape[1] != self.channels:
+            raise TypeError('second dimension of data must be equal to the number of channels, not {}'.format(data.shape[1]))
+        while len(data) > 0:
+            self._play_block(data[:self._blocksize])
+            data = data[self._blocksize:]
+
+    @property
+    def writable_frames(self):
+        """int : The number of frames that can be played without waiting.
+
+        Use :func:`wait` to wait until any of several players can be
+        written to.
+
+        """
+        with _clock.lock:
+            free = _clock.time + self._queued() - self._time
+        return max(0, math.floor(free * self._samplerate))
+
+    def _queued(self):
+        """How far ahead of the clock the player may play, in seconds."""
+        return Fraction(self._blocksize, self._samplerate) + self._device.latency
+
+    def _is_ready(self):
+        return self.writable_frames > 0
+
+    def _ready_time(self):
+        """The time at which the player becomes writable."""
+        return self._time - self._queued() + Fraction(1, self._samplerate)
+
+    def _play_block(self, block):
+        device = self._device
+        _clock.advance_to(self._time - self._queued())
+        with _clock.lock:
+            if self._time < _clock.time + device.latency:
+                # the clock has overtaken this player while it did not play:
+                self._underflows += 1
+                self._time = self._align(_clock.time + device.latency)
+            start = self._time
+            self._time += Fraction(len(block), self._samplerate)
+            if self._drop():
+                return
+            first = math.ceil(start * device.samplerate)
+            numframes = math.ceil(self._time * device.samplerate) - first
+            frames = numpy.zeros([len(block), device.channels], dtype='float32')
+            frames[:, self._channelmap] = block
+            frames = self._resample(frames, Fraction(first, device.samplerate) - start,
+                                    numframes, self._samplerate, device.samplerate)
+            device.timeline.add(first, frames)
+            device.timeline.trim(int((_clock.time - _history) * device.samplerate))
+
+
+class _Recorder(_Stream):
+    """A context manager for an active input stream.
+
+    Audio recording is available as soon as the context manager is
+    entered. Recorded audio data can be read using the :func:`record`
+    method. If no audio data is available, :func:`record` will block until
+    the requested amount of audio data has been recorded.
+
+    This context manager can only be entered once, and can not be used
+    after it is closed.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_Recorder, self).__init__(*args, **kwargs)
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+
+    def _sources(self):
+        """The speakers this recorder hears."""
+        if self._device.kind == 'speaker':
+            return [self._device]
+        return [_devices[id] for id in self._device.sources if id in _devices]
+
+    def _read(self, start, numframes):
+        """Mix the audio of all sources, from time `start` at the device rate."""
+        device = self._device
+        frames = numpy.zeros([numframes, device.channels], dtype='float32')
+        end = start + Fraction(numframes, device.samplerate)
+        for source in self._sources():
+            first = math.floor(start * source.samplerate)
+            # one more frame at the end, for interpolation:
+            count = math.ceil(end * source.samplerate) - first + 1
+            block = self._resample(source.timeline.read(first, count),
+                                   start - Fraction(first, source.samplerate),
+                                   numframes, source.samplerate, device.samplerate)
+            channels = min(source.channels, device.channels)
+            frames[:, :channels] += block[:, :channels]
+        return frames
+
+    @property
+    def readable_frames(self):
+        """int : The number of frames that can be recorded without waiting.
+
+        This includes frames that are pending from previous calls to
+        :func:`record`. Use :func:`wait` to wait until any of several
+        recorders can be read from.
+
+        """
+        duration = Fraction(self._blocksize, self._samplerate)
+        with _clock.lock:
+            blocks = math.floor((_clock.time - self._capture_latency() - self._time) / duration)
+        return len(self._pending_chunk) + max(0, blocks) * self._blocksize
+
+    def _capture_latency(self):
+        # loopbacks record the speaker output right away:
+        return self._device.latency if self._device.kind == 'microphone' else 0
+
+    def _is_ready(self):
+        return self.readable_frames > 0
+
+    def _ready_time(self):
+        """The time at which the next block becomes readable."""
+        return self._time + Fraction(self._blocksize, self._samplerate) + self._capture_latency()
+
+    def _record_chunk(self, deadline=None):
+        """Record one block of audio data.
+
+        If the block is not available before the simulated time
+        `deadline`, advance the clock to the deadline and return None.
+
+        """
+        if deadline is not None and self._ready_time() > deadline:
+            _clock.advance_to(deadline)
+            return None
+        device = self._device
+        start = self._time
+        self._time += Fraction(self._blocksize, self._samplerate)
+        _clock.advance_to(self._time + self._capture_latency())
+        with _clock.lock:
+            first = math.floor(start * device.samplerate)
+            # one more frame at the end, for interpolation:
+            numframes = math.ceil(self._time * device.samplerate) - first + 1
+            frames = self._read(Fraction(first, device.samplerate), numframes)
+        frames = self._resample(frames, start - Fraction(first, device.samplerate),
+                                self._blocksize, device.samplerate, self._samplerate)
+        chunk = frames[:, self._channelmap]
+        # loopbacks already contain the dropouts of their speaker:
+        if device.kind == 'microphone' and self._drop():
+            chunk[:] = 0
+        return chunk
+
+    def record(self, numframes=None, timeout=None):
+        """Record a block of audio data.
+
+        The data will be returned as a *frames × channels* float32
+        numpy array. This function will wait until ``numframes``
+        frames have been recorded. If numframes is given, it will
+        return exactly ``numframes`` frames, and buffer the rest for
+        later.
+
+        If ``numframes`` is None, it will return the pending chunk and
+        one more block.
+
+        If ``timeout`` is given, and not enough data is available in
+        time, this raises a `TimeoutError`. All data recorded so far is
+        kept for the next call, or can be retrieved with
+        :func:`record_nowait` or :func:`flush`.
+
+        Parameters
+        ----------
+        numframes : int, optional
+            The number of frames to record.
+        timeout : float, optional
+            The maximum time to wait in simulated seconds.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = _clock.time + Fraction(timeout).limit_denominator(10**6)
+        if numframes is None:
+            chunk = self._record_chunk(deadline)
+            if chunk is None:
+                raise TimeoutError('no audio data was recorded within {} seconds'.format(timeout))
+            return numpy.concatenate([self.flush(), chunk])
+        else:
+            blocks = [self._pending_chunk]
+            self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+            recorded_frames = len(blocks[0])
+            while recorded_frames < numframes:
+                block = self._record_chunk(deadline)
+                if block is None:
+                    # keep everything for the next call:
+                    self._pending_chunk = numpy.concatenate(blocks, axis=0)
+                    raise TimeoutError('only {} of {} frames were recorded within {} seconds'
+                                       .format(recorded_frames, numframes, timeout))
+                blocks.append(block)
+                recorded_frames += len(block)
+            if recorded_frames > numframes:
+                to_split = -(recorded_frames-numframes)
+                blocks[-1], self._pending_chunk = numpy.split(blocks[-1], [to_split])
+            return numpy.concatenate(blocks, axis=0)
+
+    def record_nowait(self):
+        """Record all audio data that is available right now.
+
+        This never waits. It returns the pending chunk and all blocks
+        that are complete at the current simulated time, which might be
+        no data at all.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        blocks = [self.flush()]
+        while True:
+            block = self._record_chunk(deadline=_clock.time)
+            if block is None:
+                return numpy.concatenate(blocks, axis=0)
+            blocks.append(block)
+
+    def flush(self):
+        """Return the last pending chunk.
+
+        After using the :func:`record` method, this will return the
+        last incomplete chunk and delete it.
+
+        Returns
+        -------
+        data : numpy array
+            The recorded audio data. Will be a *frames x channels* Numpy array.
+
+        """
+        last_chunk = self._pending_chunk
+        self._pending_chunk = numpy.zeros([0, self.channels], dtype='float32')
+        return last_chunk
+
+
+reset()
@@ -1,5 +1,7 @@
+import importlib
 import os
 import sys
+import time
 
 import numpy
 import pytest
@@ -12,6 +14,15 @@ xfail_if_ci = pytest.mark.xfail(os.getenv('CI') == 'true', reason='Testing on Gi
 ones = numpy.ones(1024)
 signal = numpy.concatenate([[ones], [-ones]]).T
 
+def import_backend(name):
+    """Import a backend and list its devices, or skip if its library or server is missing."""
+    try:
+        backend = importlib.import_module('soundcard.' + name)
+        backend.all_speakers()
+    except (OSError, RuntimeError) as error:
+        pytest.skip('{} is not available: {}'.format(name, error))
+    return backend
+
 def test_speakers():
     for speaker in soundcard.all_speakers():
         assert isinstance(speaker.name, str)
@@ -169,3 +180,246 @@ def test_loopback_multichannel_channelmap(loopback_speaker, loopback_microphone)
     assert right.mean() < 0
     assert (left > 0.5).sum() == len(signal)
     assert (right < -0.5).sum() == len(signal)
+
+@skip_if_not_linux
+def test_instrumentation(tmp_path):
+    import json
+    soundcard.enable_instrumentation(trace=True)
+    try:
+        with soundcard.default_speaker().player(44100, channels=2, blocksize=256) as player:
+            player.play(signal)
+            stats = player.stats()
+    finally:
+        soundcard.disable_instrumentation()
+    assert stats['bytes_written'] == signal.size * 4
+    assert soundcard.instrumentation_stats()['lock_acquisitions'] > 0
+    soundcard.export_trace(str(tmp_path / 'trace.json'))
+    with open(str(tmp_path / 'trace.json')) as f:
+        assert any(event['name'] == 'play' for event in json.load(f)['traceEvents'])
+
+@skip_if_not_linux
+def test_underflow_callback():
+    underflows = []
+    with soundcard.default_speaker().player(44100, channels=2, blocksize=256) as player:
+        player.on_underflow = underflows.append
+        player.play(signal)
+        time.sleep(0.2) # let the buffer run dry
+    assert player.underflows > 0
+    assert len(underflows) == player.underflows
+
+@skip_if_not_linux
+def test_buffer_attr():
+    with soundcard.default_speaker().player(48000, channels=2, latency=0.02,
+                                            buffer_attr={'minreq': 240}) as player:
+        # the server is free to adjust the requested attributes:
+        assert set(player.buffer_attr) == {'maxlength', 'tlength', 'prebuf', 'minreq', 'fragsize'}
+        assert player.buffer_attr['tlength'] > 0
+
+@skip_if_not_linux
+def test_low_latency_without_latency():
+    with soundcard.default_speaker().player(48000, channels=2, low_latency=True) as player:
+        # far below the server's default buffer of about two seconds:
+        assert player.buffer_attr['tlength'] < 48000 // 2
+        player.play(signal)
+
+@skip_if_not_linux
+def test_adaptive_player():
+    with soundcard.default_speaker().player(48000, channels=2, adaptive=True) as player:
+        for _ in range(20):
+            player.play(signal)
+        assert 0 < player.target_latency <= 0.5
+
+@skip_if_not_linux
+def test_sample_cache():
+    soundcard.upload_sample('soundcard-test', signal, 48000)
+    try:
+        assert 'soundcard-test' in soundcard.pulseaudio._pulse.samples
+        soundcard.default_speaker().play_sample('soundcard-test', volume=0.5)
+    finally:
+        soundcard.remove_sample('soundcard-test')
+    with pytest.raises(RuntimeError):
+        soundcard.default_speaker().play_sample('soundcard-test')
+
+@xfail_if_ci
+def test_loopback_mixer(loopback_speaker, loopback_recorder):
+    with soundcard.Mixer(loopback_speaker, 48000, channels=2, blocksize=512) as mixer:
+        mixer.submit(signal, gain=0.5)
+        mixer.submit(signal, offset=len(signal), gain=0.5)
+        recording = loopback_recorder.record(1024*12)
+    left, right = recording.T
+    assert (left > 0.25).sum() == 2*len(signal)
+    assert (right < -0.25).sum() == 2*len(signal)
+
+@skip_if_not_linux
+def test_device_change_events():
+    events = []
+    callback = soundcard.on_device_change(lambda event, device: events.append((event, device.id)))
+    try:
+        speaker = soundcard.default_speaker()
+        # playing changes the state of the speaker:
+        speaker.play(signal, 48000, channels=2)
+        time.sleep(0.5)
+    finally:
+        soundcard.remove_device_change_callback(callback)
+    assert ('changed', speaker.id) in events
+
+@skip_if_not_linux
+def test_follow_default_and_move(loopback_speaker):
+    speaker = soundcard.default_speaker(follow=True)
+    assert speaker.id is None
+    assert speaker.name == soundcard.default_speaker().name
+    with speaker.player(48000, channels=2, blocksize=512) as player:
+        player.play(signal)
+        player.move_to(loopback_speaker)
+        assert player._id == loopback_speaker.id
+        player.play(signal)
+
+@skip_if_not_linux
+@xfail_if_ci
+def test_loopback_meter(loopback_speaker, loopback_player):
+    with loopback_speaker.meter(rate=100) as meter:
+        loopback_player.play(numpy.tile(signal, [20, 1]))
+        peaks = meter.record(20)
+    assert peaks.shape == (20, 1)
+    assert peaks.max() > 0.5
+
+@skip_if_not_linux
+def test_stream_volume_and_mute():
+    with soundcard.default_speaker().player(48000, channels=2, volume=0.5) as player:
+        assert player.volume == pytest.approx(0.5, abs=0.01)
+        player.volume = 0.25
+        assert player.volume == pytest.approx(0.25, abs=0.01)
+        player.mute = True
+        assert player.mute
+        player.play(signal)
+
+@skip_if_not_linux
+@xfail_if_ci
+def test_loopback_application_stream(loopback_speaker):
+    with loopback_speaker.player(48000, channels=2, blocksize=512) as player:
+        player.play(signal)
+        stream = soundcard.get_application_stream(soundcard.get_name())
+        assert stream.isloopback
+        with stream.recorder(48000, channels=2, blocksize=512) as recorder:
+            player.play(numpy.tile(signal, [10, 1]))
+            recording = recorder.record(1024*8)
+    left, right = recording.T
+    assert left.mean() > 0
+    assert right.mean() < 0
+
+def _speaker_names_in_child(_):
+    return [speaker.name for speaker in soundcard.all_speakers()]
+
+@skip_if_not_linux
+def test_fork_reconnects():
+    import multiprocessing
+    speakers = _speaker_names_in_child(None)
+    with multiprocessing.get_context('fork').Pool(2) as pool:
+        results = pool.map(_speaker_names_in_child, range(2), chunksize=1)
+    assert results == [speakers, speakers]
+    # the parent's connection is still usable:
+    assert _speaker_names_in_child(None) == speakers
+
+@skip_if_not_linux
+def test_simple_play_and_record():
+    soundcard.default_speaker().play(signal, 48000, channels=2, simple=True)
+    recording = soundcard.default_microphone().record(1024, 48000, channels=2, simple=True)
+    assert recording.shape == (1024, 2)
+
+@skip_if_not_linux
+def test_simple_functions_do_not_connect():
+    import subprocess
+    code = ('import numpy, soundcard\n'
+            'soundcard.simple_play(numpy.zeros([480, 2]), 48000)\n'
+            'assert soundcard.simple_record(480, 48000, 2).shape == (480, 2)\n'
+            'assert soundcard.pulseaudio._pulse._unconnected\n')
+    env = dict(os.environ, SOUNDCARD_BACKEND='pulseaudio')
+    subprocess.check_call([sys.executable, '-c', code], env=env)
+
+@skip_if_not_linux
+@pytest.mark.parametrize('mmap', [False, True])
+def test_alsa_null_device(mmap):
+    alsa = import_backend('alsa')
+    speaker = alsa.get_speaker('null')
+    with speaker.player(48000, channels=2, period_size=256, periods=4, mmap=mmap) as player:
+        assert player.period_size == 256
+        assert alsa.wait([player], timeout=1) == [player]
+        player.play(signal)
+    microphone = alsa.get_microphone('null')
+    recording = microphone.record(1024, 48000, channels=2, period_size=256, mmap=mmap)
+    assert recording.shape == (1024, 2)
+    with microphone.recorder(48000, channels=2, period_size=256, mmap=mmap) as recorder:
+        assert recorder.record(1024, timeout=5).shape == (1024, 2)
+
+@skip_if_not_linux
+def test_alsa_file_device(tmp_path):
+    alsa = import_backend('alsa')
+    filename = str(tmp_path / 'out.raw')
+    speaker = alsa.get_speaker('file:FILE={},FORMAT=raw'.format(filename))
+    speaker.play(signal, 48000, channels=2)
+    played = numpy.fromfile(filename, dtype='float32').reshape([-1, 2])
+    assert numpy.all(played == signal)
+
+@skip_if_not_linux
+@xfail_if_ci
+def test_pipewire_loopback():
+    pipewire = import_backend('pipewire')
+    speaker = pipewire.default_speaker()
+    loopback = pipewire.get_microphone(speaker.id + '.monitor', include_loopback=True)
+    assert loopback.isloopback
+    with loopback.recorder(48000, channels=2, blocksize=512) as recorder:
+        with speaker.player(48000, channels=2, blocksize=512) as player:
+            player.play(signal)
+        recording = recorder.record(1024)
+        assert pipewire.wait([recorder], timeout=1) == [recorder]
+        assert recorder.readable_frames > 0
+        with pytest.raises(TimeoutError):
+            recorder.record(48000*10, timeout=0.1)
+        assert len(recorder.record_nowait()) > 0
+    assert recording.shape == (1024, 2)
+
+@skip_if_not_linux
+@xfail_if_ci
+def test_jack_dummy_loopback():
+    # needs a running `jackd -d dummy -r 48000`
+    jack = import_backend('jack')
+    speaker = jack.default_speaker()
+    microphone = jack.default_microphone()
+    with microphone.recorder(48000, channels=[0], blocksize=512) as recorder:
+        with speaker.player(48000, channels=[0, 1], blocksize=512) as player:
+            player.play(signal)
+            assert player.xruns >= 0
+        recording = recorder.record(1024)
+        assert jack.wait([recorder], timeout=1) == [recorder]
+        assert recorder.readable_frames > 0
+        with pytest.raises(TimeoutError):
+            recorder.record(48000*10, timeout=0.1)
+        assert len(recorder.record_nowait()) > 0
+    assert recording.shape == (1024, 1)
+
+@skip_if_not_linux
+def test_wait_for_recorders(loopback_speaker, loopback_microphone):
+    with loopback_microphone.recorder(48000, blocksize=512) as first, \
+         loopback_microphone.recorder(48000, blocksize=1024) as second:
+        recorders = [first, second]
+        recorded = {id(r): 0 for r in recorders}
+        while min(recorded.values()) < 4096:
+            ready = soundcard.wait(recorders, timeout=1)
+            assert ready
+            for recorder in ready:
+                numframes = recorder.readable_frames
+                assert numframes > 0
+                recorded[id(recorder)] += len(recorder.record(numframes))
+    with loopback_speaker.player(48000, blocksize=512) as player:
+        assert soundcard.wait([player], timeout=1) == [player]
+        assert player.writable_frames > 0
+
+@skip_if_not_linux
+def test_record_timeout(loopback_microphone):
+    with loopback_microphone.recorder(48000, blocksize=512) as recorder:
+        with pytest.raises(TimeoutError):
+            recorder.record(48000*10, timeout=0.1)
+        recorded = recorder.record_nowait()
+        assert len(recorded) > 0
+        assert recorded.shape[1] == recorder.channels
+        assert len(recorder.record(512, timeout=1)) == 512
@@ -0,0 +1,166 @@
+import concurrent.futures
+import os
+import time
+
+import numpy
+import pytest
+
+# fall back to the virtual backend if soundcard was not imported yet,
+# without changing the environment of other tests and their subprocesses:
+_backend = os.environ.get('SOUNDCARD_BACKEND')
+os.environ.setdefault('SOUNDCARD_BACKEND', 'virtual')
+try:
+    import soundcard
+    from soundcard import virtual
+finally:
+    if _backend is None:
+        del os.environ['SOUNDCARD_BACKEND']
+
+ones = numpy.ones(1024)
+signal = numpy.concatenate([[ones], [-ones]]).T
+
+@pytest.fixture(autouse=True)
+def fast_clock():
+    virtual.reset()
+    virtual.set_speed(float('inf'))
+    yield
+    virtual.set_speed(1)
+
+def test_devices():
+    assert [s.id for s in virtual.all_speakers()] == ['virtual-speaker']
+    assert [m.id for m in virtual.all_microphones()] == ['virtual-microphone']
+    loopback = virtual.get_microphone('virtual-speaker.monitor', include_loopback=True)
+    assert loopback.isloopback
+    assert loopback.channels == 2
+    assert virtual.get_speaker('Virtual').id == 'virtual-speaker'
+
+def test_loopback_with_latency():
+    speaker = virtual.add_speaker('delayed', latency=0.01)
+    loopback = virtual.get_microphone('delayed.monitor', include_loopback=True)
+    with loopback.recorder(48000, blocksize=256) as recorder:
+        with speaker.player(48000, blocksize=256) as player:
+            player.play(signal)
+        recording = recorder.record(2048)
+    assert numpy.all(recording[:480] == 0)
+    assert numpy.all(recording[480:480+1024] == signal)
+    assert numpy.all(recording[480+1024:] == 0)
+
+def test_routed_microphone_and_channelmap():
+    microphone = virtual.default_microphone()
+    with microphone.recorder(48000, channels=[1, 0]) as recorder:
+        virtual.default_speaker().play(signal, 48000)
+        recording = recorder.record(1024)
+    assert numpy.all(recording == signal[:, ::-1])
+
+def test_resampling():
+    sine = numpy.sin(numpy.arange(48000) / 48000 * 2 * numpy.pi * 100)
+    with virtual.default_microphone().recorder(44100, channels=1) as recorder:
+        virtual.default_speaker().play(sine, 48000)
+        recording = recorder.record(44100)
+    expected = numpy.sin(numpy.arange(44100) / 44100 * 2 * numpy.pi * 100)
+    assert numpy.allclose(recording[:, 0], expected, atol=1e-3)
+
+def test_dropouts_are_deterministic():
+    def record_with_dropouts():
+        virtual.reset(seed=42)
+        speaker = virtual.add_speaker('unreliable', dropouts=0.5)
+        loopback = virtual.get_microphone('unreliable.monitor', include_loopback=True)
+        with loopback.recorder(48000, blocksize=128) as recorder:
+            with speaker.player(48000, blocksize=128) as player:
+                player.play(numpy.ones([2048, 2]))
+            return recorder.record(2048), player.dropouts
+    recording, dropouts = record_with_dropouts()
+    silent_blocks = numpy.sum(numpy.all(recording.reshape([16, 128, 2]) == 0, axis=(1, 2)))
+    assert 0 < dropouts < 16
+    assert silent_blocks == dropouts
+    again, _ = record_with_dropouts()
+    assert numpy.all(recording == again)
+
+def test_simulated_clock():
+    virtual.default_speaker().play(numpy.zeros([48000*60, 2]), 48000, blocksize=48000)
+    assert virtual.now() == pytest.approx(60)
+
+def test_wait_for_many_streams():
+    speaker = virtual.default_speaker()
+    loopback = virtual.get_microphone('virtual-speaker.monitor', include_loopback=True)
+    with loopback.recorder(48000, blocksize=480) as fast, \
+         virtual.default_microphone().recorder(48000, blocksize=960) as slow:
+        assert fast.readable_frames == 0
+        assert virtual.wait([fast, slow], timeout=0.001) == []
+        assert virtual.wait([fast, slow]) == [fast]
+        assert fast.readable_frames == 480
+        assert virtual.wait([slow]) == [slow]
+        assert fast.readable_frames == 960
+        with speaker.player(48000, blocksize=480) as player:
+            assert virtual.wait([player]) == [player]
+            assert player.writable_frames > 0
+            player.play(numpy.zeros([player.writable_frames, 2]))
+            assert player.writable_frames == 0
+
+def test_record_timeout_keeps_data():
+    virtual.add_microphone('slow', latency=0.05)
+    microphone = virtual.get_microphone('slow')
+    with microphone.recorder(48000, blocksize=480) as recorder:
+        with pytest.raises(TimeoutError):
+            recorder.record(4800, timeout=0.02)
+        assert virtual.now() == pytest.approx(0.02)
+        assert len(recorder.record_nowait()) == 0
+        with pytest.raises(TimeoutError):
+            recorder.record(4800, timeout=0.05)
+        # blocks that arrived before the timeout are pending:
+        assert len(recorder.flush()) == 960
+        assert len(recorder.record(480, timeout=1)) == 480
+        assert len(recorder.record_nowait()) == 0
+
+def test_shared_recorder_fans_out():
+    virtual.set_speed(100)
+    microphone = virtual.default_microphone()
+    with microphone.shared_recorder(48000, blocksize=480, policy='block') as shared:
+        with shared.subscribe() as first, shared.subscribe() as second:
+            assert shared.subscribers == 2
+            virtual.default_speaker().play(signal, 48000)
+            one = first.record(4800, timeout=10)
+            two = second.record(4800, timeout=10)
+    assert numpy.all(one == two)
+    assert numpy.sum(one != 0) == signal.size
+    assert first.dropped_frames == second.dropped_frames == 0
+
+def test_shared_recorder_drops_slow_subscribers():
+    microphone = virtual.default_microphone()
+    with microphone.shared_recorder(48000, blocksize=480, capacity=960, policy='drop') as shared:
+        with shared.subscribe() as slow:
+            with pytest.raises(TypeError):
+                slow.record(961)
+            while slow.dropped_frames == 0:
+                time.sleep(0.001)
+            assert len(slow.record(960, timeout=1)) == 960
+    assert slow.dropped_frames > 0
+
+def _record_in_process(name, numframes):
+    with soundcard.SharedMemoryReader(name) as reader:
+        return reader.samplerate, reader.channels, float(numpy.sum(reader.record(numframes, timeout=10)))
+
+def test_shared_memory_reader():
+    virtual.set_speed(100)
+    microphone = virtual.default_microphone()
+    with microphone.shared_recorder(48000, blocksize=480, shared_memory=True) as shared:
+        reader = soundcard.SharedMemoryReader(shared.shared_memory_name)
+        assert (reader.samplerate, reader.channels, reader.capacity) == (48000, 2, 48000)
+        assert reader.start_time <= time.time()
+        virtual.default_speaker().play(signal * 0.5, 48000)
+        recording = reader.record(4800, timeout=10)
+        # the recording is a view into the shared memory, not a copy:
+        assert not recording.flags.owndata
+        assert numpy.sum(recording != 0) == signal.size
+        assert reader.write_index >= 4800
+        assert reader.dropped_frames == 0
+        with concurrent.futures.ProcessPoolExecutor(1) as pool:
+            result = pool.submit(_record_in_process, shared.shared_memory_name, 4800).result()
+        assert result == (48000, 2, 0.0)
+    # attached readers outlive the recorder:
+    assert reader.stopped
+    with pytest.raises(RuntimeError):
+        reader.record(48000)
+    reader.close()
+    with pytest.raises(FileNotFoundError):
+        soundcard.SharedMemoryReader(shared.shared_memory_name)